@@ -0,0 +1,245 @@
+"""
+Incremental mood/emoji analytics.
+
+``HistoryAnalytics`` keeps running counters of emoji-sequence frequency,
+translations per type and activity per hour and day. The history store feeds
+it every appended entry, and the counters are persisted to a small JSON sidecar
+next to the history file, so dashboards never rescan the history itself.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from history import HistoryEntry
+from jsonfile import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_VERSION = 1
+HOURLY_RETENTION_DAYS = 14
+MAX_SEQUENCES = 5000
+_SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+def sidecar_path(history_path: str) -> str:
+    """Analytics sidecar file for a history file ("storage.json" -> "storage.analytics.json")."""
+    root, _ = os.path.splitext(history_path)
+    return root + ".analytics.json"
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def emoji_sequence(entry: HistoryEntry) -> str:
+    """The emoji side of an entry: the result of a translation, or the input of an interpretation."""
+    return entry.input if entry.type == "emoji_to_text" else entry.translation
+
+
+def sparkline(values: Sequence[int]) -> str:
+    """One block character per value, scaled to the largest (e.g. ``[0, 2, 5]`` -> "▁▄█")."""
+    peak = max(values, default=0)
+    if not peak:
+        return _SPARK_BLOCKS[0] * len(values)
+    return "".join(_SPARK_BLOCKS[round(value / peak * (len(_SPARK_BLOCKS) - 1))] for value in values)
+
+
+class HistoryAnalytics:
+    """
+    Counters maintained on every history append and queryable in O(1).
+
+    Hourly buckets older than ``HOURLY_RETENTION_DAYS`` and the rarest
+    sequences beyond ``MAX_SEQUENCES`` are pruned so the sidecar stays small.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize empty counters.
+
+        Args:
+            path: Sidecar file to persist to (None keeps the counters in memory only)
+        """
+        self.path = path
+        self.total = 0
+        self.sequences: Counter = Counter()
+        self.types: Counter = Counter()
+        self.hourly: Counter = Counter()
+        self.daily: Counter = Counter()
+        self._lock = threading.Lock()
+        # (mtime_ns, size) of the sidecar as last loaded or saved by this instance
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def load(cls, path: str) -> "HistoryAnalytics":
+        """Load counters from a sidecar file, starting empty if it is missing or unreadable."""
+        analytics = cls(path)
+        analytics._read()
+        return analytics
+
+    def _read(self) -> None:
+        stamp = _file_stamp(self.path)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid analytics sidecar, starting over: {e}")
+            return
+        if data.get("v") != ANALYTICS_VERSION:
+            logger.info("Analytics sidecar has an old format, starting over")
+            return
+        with self._lock:
+            self.total = data["total"]
+            self.sequences = Counter(data["sequences"])
+            self.types = Counter(data["types"])
+            self.hourly = Counter(data["hourly"])
+            self.daily = Counter(data["daily"])
+            self._stamp = stamp
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-read the sidecar if another process saved it since this instance last loaded or saved it.
+
+        Only call this under the history store's file lock (see
+        ``HistoryStore.refresh_analytics``): the store reloads before recording,
+        so counters saved by the app and by the transfer CLI are merged rather
+        than overwritten.
+
+        Returns:
+            Whether the counters were reloaded
+        """
+        if self.path is None or _file_stamp(self.path) in (None, self._stamp):
+            return False
+        self._read()
+        return True
+
+    def exists(self) -> bool:
+        """Whether the sidecar file has been written."""
+        return self.path is not None and os.path.exists(self.path)
+
+    def record(self, entries: Iterable[HistoryEntry]) -> None:
+        """Update the counters with newly appended entries."""
+        with self._lock:
+            for entry in entries:
+                self._count(entry.type, emoji_sequence(entry), entry.timestamp)
+            self._prune()
+
+    def record_dicts(self, records: Iterable[Dict]) -> None:
+        """Like ``record``, for entries still in their JSON form (e.g. during bulk imports)."""
+        # Collect the columns first and count them with Counter.update, which runs in C
+        records = list(records)
+        types = [record.get("type", "") for record in records]
+        sequences = [
+            record.get("input" if entry_type == "emoji_to_text" else "translation", "")
+            for record, entry_type in zip(records, types)
+        ]
+        timestamps = [timestamp for timestamp in (record.get("timestamp", "") for record in records) if timestamp]
+        with self._lock:
+            self.total += len(records)
+            self.types.update(types)
+            self.sequences.update(filter(None, sequences))
+            self.daily.update(timestamp[:10] for timestamp in timestamps)
+            self.hourly.update(timestamp[:13] for timestamp in timestamps)
+            self._prune()
+
+    def _count(self, entry_type: str, sequence: str, timestamp: str) -> None:
+        self.total += 1
+        self.types[entry_type] += 1
+        if sequence:
+            self.sequences[sequence] += 1
+        if timestamp:
+            self.daily[timestamp[:10]] += 1
+            self.hourly[timestamp[:13]] += 1
+
+    def _prune(self) -> None:
+        if self.hourly:
+            newest = max(self.hourly)[:10]
+            try:
+                cutoff = (date.fromisoformat(newest) - timedelta(days=HOURLY_RETENTION_DAYS)).isoformat()
+            except ValueError:
+                cutoff = ""
+            for hour in [hour for hour in self.hourly if hour < cutoff]:
+                del self.hourly[hour]
+        # Trim in bulk once the table is twice the cap, so pruning stays amortized O(1)
+        if len(self.sequences) > 2 * MAX_SEQUENCES:
+            self.sequences = Counter(dict(self.sequences.most_common(MAX_SEQUENCES)))
+
+    def rebuild(self, entries: Iterable[HistoryEntry]) -> None:
+        """Recompute the counters from scratch, e.g. when the sidecar is missing."""
+        self.reset()
+        self.record(entries)
+
+    def reset(self) -> None:
+        """Forget all counters."""
+        with self._lock:
+            self.total = 0
+            self.sequences.clear()
+            self.types.clear()
+            self.hourly.clear()
+            self.daily.clear()
+
+    def save(self) -> None:
+        """Persist the counters to the sidecar file."""
+        if self.path is None:
+            return
+        with self._lock:
+            data = {
+                "v": ANALYTICS_VERSION,
+                "total": self.total,
+                "types": dict(self.types),
+                "sequences": dict(self.sequences),
+                "hourly": dict(self.hourly),
+                "daily": dict(self.daily),
+            }
+        atomic_write_json(self.path, data, separators=(",", ":"))
+        self._stamp = _file_stamp(self.path)
+
+    def sequence_count(self, sequence: str) -> int:
+        """How often an emoji sequence has been produced or interpreted."""
+        return self.sequences.get(sequence, 0)
+
+    def type_count(self, entry_type: str) -> int:
+        """Number of translations of a given type."""
+        return self.types.get(entry_type, 0)
+
+    def day_count(self, day: str) -> int:
+        """Translations on a day ("2024-03-05")."""
+        return self.daily.get(day, 0)
+
+    def hour_count(self, hour: str) -> int:
+        """Translations in an hour ("2024-03-05T14")."""
+        return self.hourly.get(hour, 0)
+
+    # The readers below iterate the counters under the lock: the history writer
+    # thread may be recording (and pruning) while the app renders them.
+
+    def type_mix(self) -> Dict[str, float]:
+        """Share of translations per type."""
+        with self._lock:
+            if not self.total:
+                return {}
+            return {entry_type: count / self.total for entry_type, count in self.types.items()}
+
+    def top_sequences(self, n: int = 10) -> List[Tuple[str, int]]:
+        """The ``n`` most frequent emoji sequences with their counts."""
+        with self._lock:
+            return self.sequences.most_common(n)
+
+    def daily_series(self, days: int = 14, today: Optional[date] = None) -> List[Tuple[str, int]]:
+        """Translations per day for the last ``days`` days, oldest first, zero-filled."""
+        today = today or date.today()
+        with self._lock:
+            return [
+                (day, self.daily.get(day, 0))
+                for day in ((today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1))
+            ]
@@ -1,49 +1,79 @@
 import streamlit as st
-from translator import EmojiTranslator
-import json
+from translator import EmojiTranslator, build_translator, configure, repair_rates
+from history import HistoryEntry, make_entry
+from store import HistoryStore
+from analytics import HistoryAnalytics, sidecar_path, sparkline
+from writer import HistoryWriter
+from jobs import EMOJI_TO_TEXT, ROUND_TRIP, TEXT_TO_EMOJI, TranslationJob, completed_job, pop_finished, submit_job
+from cache import TranslationCache
+from warm import start_background_warmup
+from speculation import Speculator
+from metrics import metrics
+from ratelimit import RateBudget
+from concurrent.futures import ThreadPoolExecutor
+import time
 import os
 import logging
-from datetime import datetime
-from typing import Optional, List, Dict
-from dotenv import load_dotenv
-import pyperclip
+from typing import Optional, List
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 # Constants
 MAX_CHARS = 200
 HISTORY_FILE = "storage.json"
-MAX_HISTORY_ITEMS = 50
+TRANSLATION_CACHE_FILE = "translation_cache.json"
 
-def load_history() -> List[Dict]:
-    """Load translation history from JSON file."""
-    try:
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        logger.info("No history file found, creating new one")
-        return []
-    except json.JSONDecodeError:
-        logger.error("Invalid JSON in history file, resetting")
-        return []
-
-def save_history(history: List[Dict]) -> None:
-    """Save translation history to JSON file."""
+@st.cache_resource
+def init_app() -> None:
+    """Load .env and configure logging once per process instead of on every rerun."""
+    configure()
+
+@st.cache_resource
+def get_translator(model: str, backends: str = "") -> EmojiTranslator:
+    """
+    Shared translator per model; its OpenAI client is only built on the first request.
+
+    With a comma-separated ``backends`` list the translator routes across those
+    models/endpoints by observed latency and health instead.
+    """
+    return build_translator(model, backends, max_latency=ROUTER_MAX_LATENCY)
+
+@st.cache_resource
+def get_history_store(hot_limit: int) -> HistoryStore:
+    """Shared tiered history store: recent items in HISTORY_FILE, older ones archived."""
+    analytics = HistoryAnalytics.load(sidecar_path(HISTORY_FILE))
+    store = HistoryStore(HISTORY_FILE, hot_limit=hot_limit, analytics=analytics)
+    if not analytics.exists():
+        # One-off backfill for history written before the analytics sidecar existed
+        analytics.rebuild(store.iter_entries())
+        analytics.save()
+    return store
+
+@st.cache_resource
+def get_history_writer(hot_limit: int) -> HistoryWriter:
+    """Shared write-behind writer; history is appended in batches off the script thread."""
+    return HistoryWriter(get_history_store(hot_limit))
+
+def load_history() -> List[HistoryEntry]:
+    """Load the recent (hot) translation history, including entries not yet written."""
+    return get_history_writer(MAX_HISTORY_ITEMS).load_recent()
+
+def save_entry(entry: HistoryEntry) -> None:
+    """Queue a translation for the history store without waiting for the disk."""
     try:
-        # Keep only the most recent items
-        if len(history) > MAX_HISTORY_ITEMS:
-            history = history[-MAX_HISTORY_ITEMS:]
-        
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
+        get_history_writer(MAX_HISTORY_ITEMS).submit(entry)
     except Exception as e:
         logger.error(f"Failed to save history: {e}")
         st.error("Failed to save translation history")
 
+def clear_history() -> None:
+    """Delete all translation history, including archived segments."""
+    try:
+        get_history_writer(MAX_HISTORY_ITEMS).clear()
+    except Exception as e:
+        logger.error(f"Failed to clear history: {e}")
+        st.error("Failed to clear translation history")
+
 def get_emoji_codes(text: str) -> List[str]:
     """Extract Unicode codes for emojis in the text."""
     return [f"U+{ord(c):04X}" for c in text if ord(c) > 127]  # Only non-ASCII characters
@@ -51,6 +81,8 @@ def get_emoji_codes(text: str) -> List[str]:
 def copy_to_clipboard_safe(text: str, message: str) -> None:
     """Safely copy text to clipboard with error handling."""
     try:
+        import pyperclip
+
         pyperclip.copy(text)
         st.success(f"✅ {message}")
     except Exception as e:
@@ -65,6 +97,173 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+init_app()
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+TRANSLATION_BACKENDS = os.getenv("TRANSLATION_BACKENDS", "")
+ROUTER_MAX_LATENCY = float(os.getenv("ROUTER_MAX_LATENCY", "0")) or None
+MAX_HISTORY_ITEMS = int(os.getenv("MAX_HISTORY_ITEMS", "50"))
+TRANSLATION_WORKERS = int(os.getenv("TRANSLATION_WORKERS", "8"))
+TRANSLATION_CANDIDATES = int(os.getenv("TRANSLATION_CANDIDATES", "3"))
+SPECULATIVE_DEFAULT = os.getenv("SPECULATIVE_TRANSLATION", "false").lower() in ("1", "true", "yes")
+SPECULATION_MAX_PER_MINUTE = int(os.getenv("SPECULATION_MAX_PER_MINUTE", "20"))
+SPECULATION_DEBOUNCE = float(os.getenv("SPECULATION_DEBOUNCE", "1.0"))
+CACHE_WARM_ON_START = os.getenv("CACHE_WARM_ON_START", "false").lower() in ("1", "true", "yes")
+CACHE_WARM_TOP = int(os.getenv("CACHE_WARM_TOP", "50"))
+CACHE_WARM_PER_MINUTE = int(os.getenv("CACHE_WARM_PER_MINUTE", "30"))
+CACHE_WARM_SEED = os.getenv("CACHE_WARM_SEED", "")
+JOB_POLL_INTERVAL = 0.5
+JOB_LABELS = {
+    TEXT_TO_EMOJI: "🤖 Translating your mood...",
+    EMOJI_TO_TEXT: "🤖 Interpreting emojis...",
+    ROUND_TRIP: "🤖 Translating and interpreting...",
+}
+
+@st.cache_resource
+def get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Thread pool shared by all sessions for translation calls."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+
+@st.cache_resource
+def get_translation_cache() -> TranslationCache:
+    """Shared cache of finished translations, pre-filled by the cache warmer."""
+    return TranslationCache.load(TRANSLATION_CACHE_FILE)
+
+@st.cache_resource
+def start_cache_warmup() -> None:
+    """Warm the translation cache from history once per process, in the background."""
+    start_background_warmup(
+        get_history_store(MAX_HISTORY_ITEMS),
+        get_translation_cache(),
+        get_translator(OPENAI_MODEL, TRANSLATION_BACKENDS),
+        get_executor(TRANSLATION_WORKERS),
+        RateBudget(CACHE_WARM_PER_MINUTE),
+        top=CACHE_WARM_TOP,
+        seed_path=CACHE_WARM_SEED or None,
+        candidates=TRANSLATION_CANDIDATES,
+    )
+
+@st.cache_resource
+def get_speculator() -> Speculator:
+    """Shared speculator; its budget caps speculative API calls across all sessions."""
+    return Speculator(
+        get_executor(TRANSLATION_WORKERS),
+        lambda text: get_translator(OPENAI_MODEL, TRANSLATION_BACKENDS).translate_candidates(
+            text, TRANSLATION_CANDIDATES
+        ),
+        budget=RateBudget(SPECULATION_MAX_PER_MINUTE),
+        debounce=SPECULATION_DEBOUNCE,
+        # start_job answers cached texts without a request, so never speculate on them
+        is_cached=lambda text: get_translation_cache().lookup(text) is not None,
+    )
+
+def start_job(kind: str, text: str) -> None:
+    """Submit a translation for this session without waiting for the result."""
+    style = st.session_state.translation_style
+    if kind == TEXT_TO_EMOJI:
+        cached = get_translation_cache().lookup(text, style)
+        metrics.incr("translation_cache.hits" if cached is not None else "translation_cache.misses")
+        if cached is not None:
+            st.session_state.jobs[kind] = completed_job(kind, text, cached)
+            return
+    # Speculation always uses the default style, so only its results can be reused
+    if kind == TEXT_TO_EMOJI and st.session_state.get("speculative") and style == "Standard":
+        future = get_speculator().take(text)
+        if future is not None:
+            st.session_state.jobs[kind] = TranslationJob(kind, text, future, time.monotonic())
+            return
+    try:
+        translator = get_translator(OPENAI_MODEL, TRANSLATION_BACKENDS)
+        st.session_state.jobs[kind] = submit_job(
+            get_executor(TRANSLATION_WORKERS), translator, kind, text,
+            candidates=TRANSLATION_CANDIDATES, style=style,
+        )
+    except ValueError as e:
+        st.error(f"Configuration error: {e}")
+        st.info("💡 Make sure your OpenAI API key is set in the .env file")
+
+def show_result(
+    result: str,
+    emoji_codes: List[str],
+    reverse: str = "",
+    candidates: Optional[List[str]] = None,
+    kind: str = TEXT_TO_EMOJI,
+) -> None:
+    """Display a translation result, keeping its alternatives for instant switching."""
+    st.session_state.translation_result = result
+    st.session_state.emoji_codes = ", ".join(emoji_codes)
+    st.session_state.reverse_translation = reverse
+    st.session_state.candidates = candidates or [result]
+    st.session_state.candidate_kind = kind
+    st.session_state.candidate_choice = result
+
+def next_candidate() -> None:
+    """Regenerate by switching to the next cached alternative; no new request is made."""
+    candidates = st.session_state.candidates
+    current = st.session_state.candidate_choice
+    index = candidates.index(current) if current in candidates else -1
+    st.session_state.candidate_choice = candidates[(index + 1) % len(candidates)]
+    metrics.incr("app.candidates.regenerated")
+
+def finish_job(job: TranslationJob) -> None:
+    """Apply a finished job to the session and queue it for history."""
+    messages = st.session_state.job_messages
+    try:
+        result = job.future.result()
+    except Exception as e:
+        logger.error(f"Translation job {job.kind} failed: {e}")
+        messages.append(("error", "❌ Translation failed. Please try again later."))
+        return
+
+    if job.kind == TEXT_TO_EMOJI:
+        candidates, result = result, result[0]
+        if result and not result.startswith("❌"):
+            emoji_codes = get_emoji_codes(result)
+            show_result(result, emoji_codes, candidates=candidates)
+            save_entry(make_entry(job.text, result, emoji_codes, TEXT_TO_EMOJI))
+            messages.append(("success", "✨ Translation completed!"))
+        else:
+            messages.append(("error", "Translation failed. Please try again or check your API key."))
+    elif job.kind == EMOJI_TO_TEXT:
+        candidates, result = result, result[0]
+        if result and not result.startswith("Error:"):
+            emoji_codes = get_emoji_codes(job.text)
+            show_result(result, emoji_codes, candidates=candidates, kind=EMOJI_TO_TEXT)
+            save_entry(make_entry(job.text, result, emoji_codes, EMOJI_TO_TEXT))
+            messages.append(("success", "✨ Interpretation completed!"))
+        else:
+            messages.append(("error", "Interpretation failed. Please try again or check your API key."))
+    else:
+        emojis, interpretation = result
+        if interpretation is None:
+            messages.append(("error", "Translation failed. Please try again or check your API key."))
+            return
+        emoji_codes = get_emoji_codes(emojis)
+        save_entry(make_entry(job.text, emojis, emoji_codes, TEXT_TO_EMOJI))
+        if interpretation.startswith("Error:"):
+            show_result(emojis, emoji_codes)
+            messages.append(("warning", "Translated, but the interpretation failed."))
+            return
+        show_result(emojis, emoji_codes, reverse=interpretation)
+        save_entry(make_entry(emojis, interpretation, emoji_codes, EMOJI_TO_TEXT))
+        messages.append(("success", "✨ Round trip completed!"))
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def speculation_monitor(text: str) -> None:
+    """Keep telling the speculator the committed input (sent on blur or Ctrl+Enter), so it can start once it settles."""
+    get_speculator().observe(st.session_state.speculation, text)
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def job_monitor() -> None:
+    """Poll this session's jobs; rerun the whole app as soon as one finishes."""
+    jobs = st.session_state.jobs
+    finished = pop_finished(jobs)
+    for job in finished:
+        finish_job(job)
+    if finished:
+        st.rerun()
+    for job in jobs.values():
+        st.info(f"{JOB_LABELS[job.kind]} ({job.elapsed():.0f}s)")
+
 # Add FontAwesome to the head
 st.markdown("""
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css">
@@ -409,6 +608,8 @@ st.markdown("""
 
 # Add copy functions
 def copy_to_clipboard(text, message):
+    import pyperclip
+
     pyperclip.copy(text)
     st.toast(f"✅ {message}", icon="🔄")
 
@@ -416,6 +617,8 @@ def copy_to_clipboard(text, message):
 if 'translation_result' not in st.session_state:
     st.session_state.translation_result = ""
     st.session_state.emoji_codes = ""
+    st.session_state.candidates = []
+    st.session_state.candidate_kind = TEXT_TO_EMOJI
 
 if 'translation_style' not in st.session_state:
     st.session_state.translation_style = "Standard"
@@ -423,6 +626,16 @@ if 'translation_style' not in st.session_state:
 if 'reverse_translation' not in st.session_state:
     st.session_state.reverse_translation = ""
 
+if CACHE_WARM_ON_START:
+    try:
+        start_cache_warmup()
+    except ValueError as e:
+        logger.error(f"Cache warm-up disabled: {e}")
+
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+    st.session_state.job_messages = []
+
 # Move input components to sidebar
 with st.sidebar:
     st.markdown('<div class="title">Input</div>', unsafe_allow_html=True)
@@ -441,97 +654,48 @@ with st.sidebar:
     
     st.markdown(f'<div class="{counter_class}">{chars_left} characters remaining</div>', unsafe_allow_html=True)
     
+    speculative = st.checkbox(
+        "⚡ Speculative translation", value=SPECULATIVE_DEFAULT, key="speculative",
+        help="Start translating once you leave the text box (Tab or Ctrl+Enter), "
+             "so the result is ready when you click"
+    )
+    if speculative:
+        if 'speculation' not in st.session_state:
+            st.session_state.speculation = get_speculator().new_session()
+        speculation_monitor(user_input)
+        st.caption(f"Speculation hit rate: {get_speculator().hit_rate():.0%}")
+    
     # Move translation style selector to sidebar
     st.session_state.translation_style = st.selectbox(
         "Select Translation Style:",
         ["Standard", "Minimal", "Expressive"],
         help="Standard: Basic translation\nMinimal: 1-2 emojis\nExpressive: More detailed emotions"
     )
+    if metrics.get("translator.repair.valid") or metrics.get("translator.repair.repaired"):
+        rates = repair_rates()
+        st.caption(f"Responses repaired: {rates['repaired']:.0%} · unusable: {rates['unsalvageable']:.0%}")
     
     # Move translate button to sidebar
-    if st.button("🔁 Translate to Emoji", use_container_width=True, disabled=not user_input.strip()):
+    if st.button("🔁 Translate to Emoji", use_container_width=True,
+                 disabled=not user_input.strip() or TEXT_TO_EMOJI in st.session_state.jobs):
         if user_input.strip():
-            with st.spinner("🤖 Translating your mood..."):
-                try:
-                    translator = EmojiTranslator()
-                    emoji_result = translator.translate(user_input.strip())
-                    
-                    if emoji_result and not emoji_result.startswith("❌"):
-                        # Get emoji codes
-                        emoji_codes = get_emoji_codes(emoji_result)
-                        emoji_codes_str = ", ".join(emoji_codes)
-
-                        # Update session state
-                        st.session_state.translation_result = emoji_result
-                        st.session_state.emoji_codes = emoji_codes_str
-
-                        # Save to history
-                        history = load_history()
-                        history.append({
-                            "input": user_input.strip(),
-                            "translation": emoji_result,
-                            "emoji_codes": emoji_codes,
-                            "timestamp": datetime.now().isoformat(),
-                            "type": "text_to_emoji"
-                        })
-                        save_history(history)
-                        
-                        st.success("✨ Translation completed!")
-                        st.rerun()
-                    else:
-                        st.error("Translation failed. Please try again or check your API key.")
-                        
-                except ValueError as e:
-                    st.error(f"Configuration error: {e}")
-                    st.info("💡 Make sure your OpenAI API key is set in the .env file")
-                except Exception as e:
-                    logger.error(f"Translation error: {e}")
-                    st.error("❌ Translation failed. Please try again later.")
+            start_job(TEXT_TO_EMOJI, user_input.strip())
         else:
             st.warning("⚠️ Please enter some text to translate.")
+
+    if st.button("🔃 Round Trip", use_container_width=True,
+                 disabled=not user_input.strip() or ROUND_TRIP in st.session_state.jobs,
+                 help="Translate to emoji, then interpret the emojis back into text"):
+        start_job(ROUND_TRIP, user_input.strip())
     
     st.markdown("---")
     st.markdown("### 🔄 Reverse Translation")
     emoji_input = st.text_input("Enter emojis to interpret:", placeholder="e.g. 🎉✈️🌍")
     
-    if st.button("🔄 Interpret Emojis", use_container_width=True, disabled=not emoji_input.strip()):
+    if st.button("🔄 Interpret Emojis", use_container_width=True,
+                 disabled=not emoji_input.strip() or EMOJI_TO_TEXT in st.session_state.jobs):
         if emoji_input.strip():
-            with st.spinner("🤖 Interpreting emojis..."):
-                try:
-                    translator = EmojiTranslator()
-                    text_result = translator.translate_reverse(emoji_input.strip())
-                    
-                    if text_result and not text_result.startswith("Error:"):
-                        # Get emoji codes for the input emojis
-                        emoji_codes = get_emoji_codes(emoji_input.strip())
-                        emoji_codes_str = ", ".join(emoji_codes)
-
-                        # Update session state
-                        st.session_state.translation_result = text_result
-                        st.session_state.emoji_codes = emoji_codes_str
-
-                        # Add to history
-                        history = load_history()
-                        history.append({
-                            "input": emoji_input.strip(),
-                            "translation": text_result,
-                            "emoji_codes": emoji_codes,
-                            "timestamp": datetime.now().isoformat(),
-                            "type": "emoji_to_text"
-                        })
-                        save_history(history)
-                        
-                        st.success("✨ Interpretation completed!")
-                        st.rerun()
-                    else:
-                        st.error("Interpretation failed. Please try again or check your API key.")
-                        
-                except ValueError as e:
-                    st.error(f"Configuration error: {e}")
-                    st.info("💡 Make sure your OpenAI API key is set in the .env file")
-                except Exception as e:
-                    logger.error(f"Reverse translation error: {e}")
-                    st.error("❌ Interpretation failed. Please try again later.")
+            start_job(EMOJI_TO_TEXT, emoji_input.strip())
         else:
             st.warning("⚠️ Please enter some emojis to interpret.")
 
@@ -545,8 +709,25 @@ st.markdown('''
 </div>
 ''', unsafe_allow_html=True)
 
+# Report jobs that finished since the last run, then poll the ones still running
+for level, message in st.session_state.job_messages:
+    getattr(st, level)(message)
+st.session_state.job_messages = []
+
+if st.session_state.jobs:
+    job_monitor()
+
 # Update translation box display
 if st.session_state.translation_result:
+    # Alternatives came with the same request, so switching between them is free
+    if len(st.session_state.candidates) > 1:
+        choice = st.radio("🎲 Alternatives:", st.session_state.candidates, key="candidate_choice", horizontal=True)
+        if choice != st.session_state.translation_result:
+            st.session_state.translation_result = choice
+            if st.session_state.candidate_kind == TEXT_TO_EMOJI:
+                st.session_state.emoji_codes = ", ".join(get_emoji_codes(choice))
+        st.button("🎲 Regenerate", on_click=next_candidate, help="Show the next alternative without a new request")
+    
     emoji_codes_section = ""
     if st.session_state.emoji_codes:
         emoji_codes_section = f'<div class="emoji-codes"><span class="code-label">Emoji Codes:</span> {st.session_state.emoji_codes}</div>'
@@ -561,6 +742,9 @@ if st.session_state.translation_result:
         unsafe_allow_html=True
     )
     
+    if st.session_state.reverse_translation:
+        st.info(f"🔃 **Round trip:** {st.session_state.reverse_translation}")
+    
     # Add copy buttons below the result with enhanced styling
     if st.session_state.translation_result:
         st.markdown("<br>", unsafe_allow_html=True)
@@ -651,6 +835,29 @@ if st.session_state.get('component_value'):
         elif value['data'] == 'codes':
             copy_to_clipboard(st.session_state.emoji_codes, "Codes copied!")
 
+# Mood analytics, served from the counters kept up to date on every append
+history_store = get_history_store(MAX_HISTORY_ITEMS)
+history_store.refresh_analytics()
+analytics = history_store.analytics
+if analytics.total:
+    with st.expander("📊 Mood Analytics"):
+        type_labels = {"text_to_emoji": "😊 Text → Emoji", "emoji_to_text": "📖 Emoji → Text"}
+        type_mix = analytics.type_mix()
+        metric_cols = st.columns(1 + len(type_mix))
+        metric_cols[0].metric("Translations", analytics.total)
+        for col, (entry_type, share) in zip(metric_cols[1:], sorted(type_mix.items())):
+            col.metric(type_labels.get(entry_type, entry_type), f"{share:.0%}")
+
+        # A text sparkline rather than st.bar_chart, which would import pandas and
+        # altair on every cold start
+        days, counts = zip(*analytics.daily_series(14))
+        st.caption(f"Activity over the last 14 days ({days[0]} → {days[-1]}, peak {max(counts)}/day)")
+        st.text(sparkline(counts))
+
+        st.caption("Most frequent emoji sequences")
+        for sequence, count in analytics.top_sequences(5):
+            st.text(f"{sequence}  × {count}")
+
 # Load user history
 user_history = load_history()
 
@@ -665,7 +872,7 @@ st.markdown('''
 
 if user_history:
     # Add controls for history
-    col1, col2, col3 = st.columns([2, 1, 1])
+    col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
     
     with col1:
         search_query = st.text_input("🔍 Search history:", 
@@ -674,9 +881,13 @@ if user_history:
                                    placeholder="Search translations...")
     
     with col2:
-        show_count = st.selectbox("Show:", [10, 25, 50], key="show_count")
+        since_date = st.date_input("📅 Since:", value=None, key="history_since",
+                                   help="Older entries are searched in the archive")
     
     with col3:
+        show_count = st.selectbox("Show:", [10, 25, 50], key="show_count")
+    
+    with col4:
         if st.button("🗑️ Clear All", help="Clear entire history"):
             st.session_state.confirm_clear = True
 
@@ -686,7 +897,7 @@ if user_history:
         col_yes, col_no = st.columns(2)
         with col_yes:
             if st.button("✅ Yes, clear all"):
-                save_history([])  # Save empty history
+                clear_history()
                 st.session_state.confirm_clear = False
                 st.success("🗑️ History cleared!")
                 st.rerun()
@@ -695,47 +906,35 @@ if user_history:
                 st.session_state.confirm_clear = False
                 st.rerun()
 
-    # Filter and display history
-    filtered_history = user_history
-    if search_query:
-        filtered_history = [
-            item for item in user_history 
-            if search_query.lower() in item['input'].lower() 
-            or search_query.lower() in item['translation'].lower()
-        ]
-    
-    # Show recent items
-    recent_history = list(reversed(filtered_history[-show_count:]))
+    # Filter and display history; archive segments are only opened when a search
+    # or date filter needs more than the recent items
+    if search_query or since_date:
+        recent_history = get_history_writer(MAX_HISTORY_ITEMS).search(
+            search_query,
+            since=since_date.isoformat() if since_date else None,
+            limit=show_count,
+        )
+    else:
+        recent_history = list(reversed(user_history[-show_count:]))
     
     if recent_history:
         for i, item in enumerate(recent_history):
-            is_emoji_to_text = item.get('type') == 'emoji_to_text'
-            timestamp = item.get('timestamp', '')
-            
-            # Format timestamp
-            if timestamp:
-                try:
-                    dt = datetime.fromisoformat(timestamp)
-                    time_str = dt.strftime("%m/%d %H:%M")
-                except:
-                    time_str = ""
-            else:
-                time_str = ""
+            is_emoji_to_text = item.type == 'emoji_to_text'
             
-            # Create expandable history item
-            with st.expander(f"{'📖' if is_emoji_to_text else '😊'} {item['input'][:30]}{'...' if len(item['input']) > 30 else ''} {time_str}"):
+            # Create expandable history item (label precomputed when the entry was written)
+            with st.expander(item.label):
                 col_content, col_copy = st.columns([4, 1])
                 
                 with col_content:
-                    st.write(f"**{'Emojis' if is_emoji_to_text else 'Input'}:** {item['input']}")
-                    st.write(f"**{'Meaning' if is_emoji_to_text else 'Translation'}:** {item['translation']}")
+                    st.write(f"**{'Emojis' if is_emoji_to_text else 'Input'}:** {item.input}")
+                    st.write(f"**{'Meaning' if is_emoji_to_text else 'Translation'}:** {item.translation}")
                     
-                    if item.get('emoji_codes'):
-                        st.caption(f"**Unicode:** {', '.join(item['emoji_codes'][:5])}{'...' if len(item['emoji_codes']) > 5 else ''}")
+                    if item.codes_preview:
+                        st.caption(f"**Unicode:** {item.codes_preview}")
                 
                 with col_copy:
                     if st.button("📋", key=f"copy_{i}", help="Copy result"):
-                        copy_to_clipboard_safe(item['translation'], "Copied!")
+                        copy_to_clipboard_safe(item.translation, "Copied!")
     else:
         st.info("🔍 No results found for your search.")
 else:
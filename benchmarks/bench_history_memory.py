@@ -0,0 +1,97 @@
+"""
+Memory benchmark for in-memory history.
+
+Builds a synthetic history, serializes it to the storage.json layout and
+compares the memory retained after loading it as plain dicts (the previous
+representation), as ``HistoryEntry`` objects and as a ``HistoryBatch``.
+
+Usage:
+    python benchmarks/bench_history_memory.py --entries 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryBatch, HistoryEntry, make_entry  # noqa: E402
+
+PHRASES = [
+    "I'm feeling great today",
+    "Just completed my project",
+    "Learning to code",
+    "Tired after a long week",
+    "Going on vacation tomorrow!",
+    "Stuck in traffic again",
+    "Celebrating my birthday with friends",
+    "Rainy Sunday with a good book",
+]
+EMOJIS = ["😄🌟✨", "✅🎉🏆", "👩‍💻📚✨", "😫💤🛌", "✈️🌴☀️", "🚗🚦😤", "🎂🎉🥳", "🌧️📖☕"]
+
+
+def synthetic_history(count: int, seed: int = 0) -> str:
+    """Return ``count`` realistic history records serialized as storage.json."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    records = []
+    for i in range(count):
+        index = rng.randrange(len(PHRASES))
+        reverse = rng.random() < 0.3
+        emojis = EMOJIS[index]
+        text = f"{PHRASES[index]} #{rng.randrange(1000)}"
+        codes = [f"U+{ord(c):04X}" for c in emojis if ord(c) > 127]
+        timestamp = (start + timedelta(seconds=37 * i)).isoformat()
+        if reverse:
+            entry = make_entry(emojis, text, codes, "emoji_to_text", timestamp=timestamp)
+        else:
+            entry = make_entry(text, emojis, codes, "text_to_emoji", timestamp=timestamp)
+        records.append(entry.to_dict())
+    return json.dumps(records, ensure_ascii=False)
+
+
+def retained(build):
+    """Return (retained bytes, seconds) for the object produced by ``build``."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    payload = synthetic_history(args.entries)
+    variants = {
+        "list of dicts": lambda: json.loads(payload),
+        "HistoryEntry list": lambda: [HistoryEntry.from_dict(d) for d in json.loads(payload)],
+        "HistoryBatch": lambda: HistoryBatch.from_dicts(json.loads(payload)),
+    }
+
+    baseline = None
+    print(f"{args.entries} entries")
+    for label, build in variants.items():
+        size, elapsed = retained(build)
+        baseline = baseline or size
+        print(
+            f"  {label:>18}: {size / 2**20:8.1f} MiB "
+            f"({size / args.entries:6.0f} B/entry, {size / baseline:5.0%}) load {elapsed:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
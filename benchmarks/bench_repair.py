@@ -0,0 +1,41 @@
+"""
+Speed of the local emoji validation/repair pass.
+
+Times ``repair_emojis`` on typical model responses (clean, with stray text,
+too long, ZWJ/flag/keycap sequences) and reports microseconds per response.
+
+Usage:
+    python benchmarks/bench_repair.py --rounds 100000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translator import repair_emojis  # noqa: E402
+
+RESPONSES = {
+    "clean": "😄🌟✨",
+    "stray text": "Sure! Here you go: 😄🌟✨",
+    "too many": "🎉🎂🥳🎈🎁🍰🕯️✨🎊",
+    "sequences": "👩‍💻🇯🇵1️⃣👍🏽❤️‍🔥",
+    "no emojis": "I'm sorry, I can only answer with emojis.",
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100_000)
+    args = parser.parse_args()
+
+    repair_emojis("")  # compile the pattern outside the timed loop
+    for name, response in RESPONSES.items():
+        seconds = timeit.timeit(lambda: repair_emojis(response, "Standard"), number=args.rounds)
+        print(f"{name:<12} {seconds / args.rounds * 1e6:6.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
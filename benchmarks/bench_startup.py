@@ -0,0 +1,118 @@
+"""
+Cold-start benchmark for EmoTranslator.
+
+Measures, in fresh interpreters, how long ``import translator`` takes and how long
+the Streamlit app needs for its first render (via streamlit.testing's AppTest).
+Pass ``--baseline <git-ref>`` to run the same measurements against an older
+revision and print both side by side. Both sides run on a full copy of their
+tree in a temporary directory, so every module the app imports is present and
+files the app writes (history, analytics sidecar) never land in the repository.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10 --baseline HEAD~1
+"""
+
+import argparse
+import io
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import translator
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import os, time
+os.environ.setdefault("OPENAI_API_KEY", "bench-key")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=60)
+at.run()
+print(time.perf_counter() - start)
+"""
+
+
+def export_revision(ref: str, dest: str) -> None:
+    """Extract the whole tree at ``ref`` into ``dest``."""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref], cwd=REPO_ROOT, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+
+
+def export_working_tree(dest: str) -> None:
+    """Copy the tracked files as they are on disk, uncommitted edits included, into ``dest``."""
+    names = subprocess.run(
+        ["git", "ls-files", "-z"], cwd=REPO_ROOT, capture_output=True, check=True, text=True
+    ).stdout.split("\0")
+    for name in filter(None, names):
+        source = os.path.join(REPO_ROOT, name)
+        if os.path.isfile(source):
+            os.makedirs(os.path.dirname(os.path.join(dest, name)), exist_ok=True)
+            shutil.copy2(source, os.path.join(dest, name))
+
+
+def time_snippet(snippet: str, cwd: str, runs: int) -> Optional[List[float]]:
+    """Run ``snippet`` in ``runs`` fresh interpreters and collect the printed timings."""
+    timings = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", snippet], cwd=cwd, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            last_line = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+            print(f"  skipped ({last_line})", file=sys.stderr)
+            return None
+        timings.append(float(proc.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def measure(cwd: str, runs: int) -> Dict[str, Optional[List[float]]]:
+    """Measure import and first-render times for the sources in ``cwd``."""
+    return {
+        "import translator": time_snippet(IMPORT_SNIPPET, cwd, runs),
+        "first render": time_snippet(RENDER_SNIPPET, cwd, runs),
+    }
+
+
+def format_timings(timings: Optional[List[float]]) -> str:
+    if not timings:
+        return "n/a"
+    return f"{statistics.median(timings) * 1000:8.1f} ms (min {min(timings) * 1000:.1f})"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--baseline", help="git ref to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        export_working_tree(tmp)
+        results["current"] = measure(tmp, args.runs)
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_revision(args.baseline, tmp)
+            results[args.baseline] = measure(tmp, args.runs)
+
+    for metric in ["import translator", "first render"]:
+        print(metric)
+        for label, measured in results.items():
+            print(f"  {label:>12}: {format_timings(measured[metric])}")
+
+
+if __name__ == "__main__":
+    main()
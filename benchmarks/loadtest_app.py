@@ -0,0 +1,294 @@
+"""
+Concurrent-session load test for the Streamlit app.
+
+Drives many simulated sessions through streamlit.testing's AppTest against a
+stub OpenAI client with a fixed latency. AppTest cannot run concurrently inside
+one process (Streamlit's runtime is process-global), so ``--concurrency``
+worker processes each run their share of the sessions one after another, all
+against the same history files. Each session types a phrase, translates it and
+waits for the job, searches its history and occasionally clears it. A rerun
+that raises inside the app fails its session and is not counted as a timing.
+
+Reports rerun latency percentiles per action, markdown bytes sent per rerun,
+worker process memory and how long the app waited on the history store's
+cross-process file lock,
+plus an estimate of how many sessions this machine can serve.
+
+The app runs in a temporary directory, so the real history is never touched.
+
+Usage:
+    python benchmarks/loadtest_app.py --sessions 200 --concurrency 20 --api-latency 0.3
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import openai_client  # noqa: E402
+import store  # noqa: E402
+from history import make_entry  # noqa: E402
+from router import LocalBackend  # noqa: E402
+
+APP_PATH = os.path.join(REPO_ROOT, "app.py")
+PHRASES = [
+    "I'm feeling great today",
+    "Just completed my project",
+    "Learning to code",
+    "Tired after a long week",
+    "Going on vacation tomorrow!",
+    "Rainy Sunday with coffee and music",
+    "Celebrating my birthday with friends",
+    "Stressed about work",
+]
+SEARCHES = ["happy", "coffee", "work", "party", "zzz"]
+
+
+class StubOpenAI:
+    """Stands in for ``openai.OpenAI``: sleeps ``latency`` seconds, then answers like the local backend."""
+
+    latency = 0.3
+    _local = LocalBackend()
+
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, max_tokens, temperature, n=1):
+        time.sleep(self.latency)
+        content = self._local.complete(messages, max_tokens, temperature)[0]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content)) for _ in range(n)])
+
+
+class RerunFailed(Exception):
+    """The app raised during a rerun (AppTest reports it in ``at.exception``)."""
+
+
+class Recorder:
+    """Thread-safe collection of per-action rerun timings."""
+
+    def __init__(self):
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.markdown_bytes: List[int] = []
+        self.lock_waits: List[float] = []
+        self.errors = 0
+        self.failed_reruns = 0
+        self.peak_rss: List[float] = []
+        self._lock = threading.Lock()
+
+    def run(self, at, action: str) -> None:
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            with self._lock:
+                self.failed_reruns += 1
+            raise RerunFailed(f"{action}: {at.exception[0].message}")
+        size = sum(len(element.value) for element in at.markdown)
+        with self._lock:
+            self.timings[action].append(elapsed)
+            self.markdown_bytes.append(size)
+
+    def failed(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def export(self) -> Dict:
+        """Plain-data copy, to send back from a worker process."""
+        with self._lock:
+            return {
+                "timings": dict(self.timings),
+                "markdown_bytes": list(self.markdown_bytes),
+                "lock_waits": list(self.lock_waits),
+                "errors": self.errors,
+                "failed_reruns": self.failed_reruns,
+                "peak_rss": peak_rss_mib(),
+            }
+
+    def merge(self, data: Dict) -> None:
+        """Add a worker process's results."""
+        with self._lock:
+            for action, timings in data["timings"].items():
+                self.timings[action].extend(timings)
+            self.markdown_bytes.extend(data["markdown_bytes"])
+            self.lock_waits.extend(data["lock_waits"])
+            self.errors += data["errors"]
+            self.failed_reruns += data["failed_reruns"]
+            self.peak_rss.append(data["peak_rss"])
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def instrument_store(recorder: Recorder) -> None:
+    """Record how long every history store waits for its cross-process file lock."""
+    lock_file = store._lock_file
+
+    def timed_lock_file(f) -> None:
+        started = time.perf_counter()
+        lock_file(f)
+        recorder.lock_waits.append(time.perf_counter() - started)
+
+    store._lock_file = timed_lock_file
+
+
+def seed_history(count: int) -> None:
+    """Pre-fill the (temporary) history so searches and archive reads have work to do."""
+    history = store.HistoryStore("storage.json")
+    local = LocalBackend()
+    start = datetime.now() - timedelta(days=60)
+    entries = []
+    for i in range(count):
+        phrase = PHRASES[i % len(PHRASES)]
+        emojis = local.complete([{"role": "user", "content": f"Translate this to emoji: {phrase}"}], 15, 0.5)[0]
+        codes = [f"U+{ord(c):04X}" for c in emojis if ord(c) > 127]
+        timestamp = (start + timedelta(minutes=15 * i)).isoformat()
+        entries.append(make_entry(phrase, emojis, codes, "text_to_emoji", timestamp=timestamp))
+    history.append(entries)
+
+
+def button(at, label: str):
+    """The first button whose label contains ``label``, or None if it isn't rendered."""
+    return next((element for element in at.button if label in element.label), None)
+
+
+def run_session(session: int, args: argparse.Namespace, recorder: Recorder) -> None:
+    """One user: load, then type/translate/search rounds, occasionally clearing history."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(session)
+    at = AppTest.from_file(APP_PATH, default_timeout=args.timeout)
+    try:
+        recorder.run(at, "load")
+        for _ in range(args.rounds):
+            at.sidebar.text_area[0].input(rng.choice(PHRASES))
+            recorder.run(at, "type")
+
+            button(at, "Translate to Emoji").click()
+            recorder.run(at, "translate")
+            deadline = time.monotonic() + args.timeout
+            while at.session_state["jobs"] and time.monotonic() < deadline:
+                time.sleep(args.poll)
+                recorder.run(at, "poll")
+
+            search = [element for element in at.text_input if element.key == "search_history"]
+            if search:
+                search[0].input(rng.choice(SEARCHES))
+                recorder.run(at, "search")
+                search[0].input("")
+                recorder.run(at, "search")
+
+            clear = button(at, "Clear All")
+            if clear is not None and rng.random() < args.clear_rate:
+                clear.click()
+                recorder.run(at, "clear")
+                confirm = button(at, "Yes, clear all")
+                if confirm is not None:
+                    confirm.click()
+                    recorder.run(at, "clear")
+    except Exception as e:
+        print(f"session {session} failed: {e}", file=sys.stderr)
+        recorder.failed()
+
+
+def run_worker(sessions: List[int], args: argparse.Namespace, workdir: str) -> Dict:
+    """Entry point of one worker process: run ``sessions`` one after another against ``workdir``."""
+    os.environ["OPENAI_API_KEY"] = "loadtest"
+    os.environ["SPECULATIVE_TRANSLATION"] = "false"
+    os.environ["CACHE_WARM_ON_START"] = "false"
+    StubOpenAI.latency = args.api_latency
+    openai_client.OpenAI = StubOpenAI
+    os.chdir(workdir)
+
+    recorder = Recorder()
+    instrument_store(recorder)
+    for session in sessions:
+        run_session(session, args, recorder)
+    return recorder.export()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(recorder: Recorder, args: argparse.Namespace, wall: float) -> None:
+    all_timings = [t for timings in recorder.timings.values() for t in timings]
+    print(f"sessions {args.sessions}, {args.concurrency} worker processes, API latency "
+          f"{args.api_latency * 1000:.0f} ms, {wall:.1f}s wall, {recorder.errors} failed sessions "
+          f"({recorder.failed_reruns} reruns raised)")
+    print(f"{'action':<10} {'reruns':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for action, timings in list(recorder.timings.items()) + [("all", all_timings)]:
+        if timings:
+            print(f"{action:<10} {len(timings):>7} {percentile(timings, 0.5) * 1000:>8.1f} "
+                  f"{percentile(timings, 0.9) * 1000:>8.1f} {percentile(timings, 0.99) * 1000:>8.1f}")
+    if recorder.markdown_bytes:
+        print(f"markdown per rerun: {statistics.mean(recorder.markdown_bytes) / 1024:.1f} KiB")
+    if recorder.peak_rss:
+        print(f"worker process memory: peak {max(recorder.peak_rss):.0f} MiB "
+              f"(mean {statistics.mean(recorder.peak_rss):.0f} MiB over {len(recorder.peak_rss)} processes)")
+    waits = recorder.lock_waits
+    if waits:
+        contended = [w for w in waits if w > 0.001]
+        print(f"history store file lock: {len(waits)} acquisitions, {len(contended)} waited >1 ms, "
+              f"p99 wait {percentile(waits, 0.99) * 1000:.1f} ms, total wait {sum(waits):.2f}s")
+    if all_timings:
+        throughput = len(all_timings) / wall
+        p90 = percentile(all_timings, 0.9)
+        verdict = "within" if p90 <= args.slo else "OVER"
+        print(f"throughput {throughput:.1f} reruns/s; p90 {p90 * 1000:.0f} ms is {verdict} the {args.slo:.1f}s SLO")
+        print(f"estimated capacity: ~{throughput * args.think_time:.0f} sessions on this machine "
+              f"({os.cpu_count()} CPUs, one interaction every {args.think_time:.0f}s each)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200, help="simulated users")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker processes running sessions at once")
+    parser.add_argument("--rounds", type=int, default=3, help="type/translate/search rounds per session")
+    parser.add_argument("--api-latency", type=float, default=0.3, help="stub OpenAI latency in seconds")
+    parser.add_argument("--clear-rate", type=float, default=0.02, help="chance per round of clearing history")
+    parser.add_argument("--history-entries", type=int, default=500, help="history to pre-fill")
+    parser.add_argument("--poll", type=float, default=0.5, help="seconds between job polls (JOB_POLL_INTERVAL)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="AppTest timeout per rerun")
+    parser.add_argument("--slo", type=float, default=1.0, help="p90 rerun latency target in seconds")
+    parser.add_argument("--think-time", type=float, default=10.0, help="seconds between a real user's interactions")
+    args = parser.parse_args()
+
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        seed_history(args.history_entries)
+        os.chdir(cwd)
+        shares = [list(range(worker, args.sessions, args.concurrency)) for worker in range(args.concurrency)]
+        started = time.perf_counter()
+        # Fresh interpreters: Streamlit's runtime state must not be inherited through fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=context) as pool:
+            futures = [pool.submit(run_worker, share, args, workdir) for share in shares if share]
+            for future in futures:
+                recorder.merge(future.result())
+        wall = time.perf_counter() - started
+    report(recorder, args, wall)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Small thread-safe caches shared by the translation components.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from jsonfile import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after ``ttl`` seconds.
+
+    ``clock`` can be replaced (e.g. in tests); it defaults to ``time.monotonic``.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the live value for ``key``, or ``default`` if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entry when full."""
+        with self._lock:
+            self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Remove ``key`` and return its live value, or ``default``."""
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is None or item[0] <= self._clock():
+            return default
+        return item[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+TRANSLATION_CACHE_VERSION = 1
+
+
+def translation_key(text: str, style: str = "Standard") -> str:
+    """Cache key for a translation: the style plus the input with case and spacing normalized."""
+    return f"{style}:{' '.join(text.split()).lower()}"
+
+
+class TranslationCache(TTLCache):
+    """
+    Finished text-to-emoji translations (lists of candidates), keyed by ``translation_key``.
+
+    Uses wall-clock expiry so the cache can be saved to a JSON file, e.g. by the
+    cache warmer, and loaded by the app.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        maxsize: int = 5000,
+        ttl: float = 7 * 24 * 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str, **kwargs: Any) -> "TranslationCache":
+        """Load a saved cache, starting empty if the file is missing or unreadable."""
+        cache = cls(path, **kwargs)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cache
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Invalid translation cache, starting empty: {e}")
+            return cache
+        if data.get("v") != TRANSLATION_CACHE_VERSION:
+            return cache
+        now = cache._clock()
+        with cache._lock:
+            for key, (expires, candidates) in data["entries"].items():
+                if expires > now:
+                    cache._data[key] = (expires, candidates)
+            while len(cache._data) > cache.maxsize:
+                cache._data.popitem(last=False)
+        return cache
+
+    def lookup(self, text: str, style: str = "Standard") -> Optional[List[str]]:
+        """Cached candidates for ``text`` in ``style``, or None."""
+        return self.get(translation_key(text, style))
+
+    def store(self, text: str, style: str, candidates: List[str]) -> None:
+        """Remember the candidates for ``text`` in ``style``."""
+        self.set(translation_key(text, style), list(candidates))
+
+    def save(self) -> None:
+        """Write the live entries to ``path`` (atomically)."""
+        if self.path is None:
+            return
+        now = self._clock()
+        with self._lock:
+            entries = {key: [expires, value] for key, (expires, value) in self._data.items() if expires > now}
+        atomic_write_json(self.path, {"v": TRANSLATION_CACHE_VERSION, "entries": entries})
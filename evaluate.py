@@ -0,0 +1,279 @@
+"""
+Round-trip quality and throughput evaluation over a text corpus.
+
+Each corpus line is translated to emojis and interpreted back to text, with
+many items in flight at once. The interpretation is scored against the
+original with two local metrics: word-token overlap (Jaccard) and character
+trigram cosine similarity. Per-item latency, tokens and translation-cache hits
+are written as JSONL. The corpus is streamed and the summary aggregates use
+bounded memory, so corpus size is not limited by RAM. One or two
+configurations (model, routed backends, style, cache) are compared side by side.
+
+Usage:
+    python evaluate.py corpus.txt --config "baseline:model=gpt-3.5-turbo" \\
+        --config "candidate:backends=gpt-4o-mini,local;style=Minimal" --out results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO
+
+from cache import TranslationCache
+from translator import EmojiTranslator, build_translator, configure, take_usage
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SAMPLE_SIZE = 10_000
+_WORD = re.compile(r"\w+")
+
+
+def read_corpus(path: str) -> Iterator[str]:
+    """
+    Stream corpus texts: one per line, or the "text" field of each line for ``.jsonl`` files.
+
+    Blank lines are skipped.
+    """
+    jsonl = path.endswith(".jsonl")
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            text = json.loads(line).get("text", "") if jsonl else line
+            if text.strip():
+                yield text.strip()
+
+
+def token_overlap(a: str, b: str) -> float:
+    """Jaccard similarity of the lowercase word sets of ``a`` and ``b``."""
+    words_a: Set[str] = set(_WORD.findall(a.lower()))
+    words_b: Set[str] = set(_WORD.findall(b.lower()))
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def ngram_cosine(a: str, b: str, n: int = 3) -> float:
+    """Cosine similarity of the character ``n``-gram counts of ``a`` and ``b`` (spacing and case ignored)."""
+    a, b = " ".join(a.lower().split()), " ".join(b.lower().split())
+    grams_a = Counter(a[i:i + n] for i in range(max(1, len(a) - n + 1)))
+    grams_b = Counter(b[i:i + n] for i in range(max(1, len(b) - n + 1)))
+    dot = sum(count * grams_b[gram] for gram, count in grams_a.items())
+    norm = math.sqrt(sum(c * c for c in grams_a.values())) * math.sqrt(sum(c * c for c in grams_b.values()))
+    return dot / norm if norm else 0.0
+
+
+class EvalConfig(NamedTuple):
+    """One configuration under evaluation."""
+
+    name: str
+    translator: EmojiTranslator
+    style: str = "Standard"
+    cache: Optional[TranslationCache] = None
+
+
+def parse_config(spec: str) -> EvalConfig:
+    """
+    Build a configuration from ``"name:key=value;key=value"``.
+
+    Keys: ``model``, ``backends`` (as in TRANSLATION_BACKENDS), ``style`` and
+    ``cache`` (a translation cache file to consult before calling the API).
+    """
+    name, _, options = spec.partition(":")
+    settings = dict(item.split("=", 1) for item in options.split(";") if item.strip())
+    unknown = set(settings) - {"model", "backends", "style", "cache"}
+    if unknown:
+        raise ValueError(f"Unknown config keys: {', '.join(sorted(unknown))}")
+    translator = build_translator(settings.get("model", "gpt-3.5-turbo"), settings.get("backends", ""))
+    cache = TranslationCache.load(settings["cache"]) if "cache" in settings else None
+    return EvalConfig(name, translator, settings.get("style", "Standard"), cache)
+
+
+def evaluate_item(config: EvalConfig, index: int, text: str) -> Dict:
+    """Round-trip one text under ``config`` and score it; runs on a worker thread."""
+    take_usage()  # drop anything left on this worker thread
+    started = time.perf_counter()
+    emojis = config.cache.lookup(text, config.style) if config.cache is not None else None
+    cache_hit = emojis is not None
+    emojis = emojis[0] if cache_hit else config.translator.translate(text, config.style)
+    forward = time.perf_counter() - started
+
+    record = {"index": index, "config": config.name, "text": text, "emojis": emojis, "cache_hit": cache_hit}
+    if not emojis or emojis.startswith("❌"):
+        interpretation, reverse, error = "", 0.0, "translation failed"
+    else:
+        interpretation = config.translator.translate_reverse(emojis)
+        reverse = time.perf_counter() - started - forward
+        error = "interpretation failed" if interpretation.startswith("Error:") else None
+    usage = take_usage()
+    record.update(
+        interpretation=interpretation,
+        token_overlap=round(token_overlap(text, interpretation), 4) if not error else 0.0,
+        ngram_cosine=round(ngram_cosine(text, interpretation), 4) if not error else 0.0,
+        latency_forward=round(forward, 4),
+        latency_reverse=round(reverse, 4),
+        latency=round(forward + reverse, 4),
+        prompt_tokens=usage["prompt_tokens"],
+        completion_tokens=usage["completion_tokens"],
+        error=error,
+    )
+    return record
+
+
+class Aggregate:
+    """
+    Running summary of one configuration's results in constant memory.
+
+    Latency percentiles come from a fixed-size reservoir sample.
+    """
+
+    def __init__(self, sample_size: int = LATENCY_SAMPLE_SIZE, seed: int = 0):
+        self.count = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.sums: Counter = Counter()
+        self.latencies: List[float] = []
+        self._sample_size = sample_size
+        self._rng = random.Random(seed)
+
+    def add(self, record: Dict) -> None:
+        self.count += 1
+        self.errors += record["error"] is not None
+        self.cache_hits += record["cache_hit"]
+        for field in ("token_overlap", "ngram_cosine", "latency", "prompt_tokens", "completion_tokens"):
+            self.sums[field] += record[field]
+        if len(self.latencies) < self._sample_size:
+            self.latencies.append(record["latency"])
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < self._sample_size:
+                self.latencies[slot] = record["latency"]
+
+    def mean(self, field: str) -> float:
+        return self.sums[field] / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "items": self.count,
+            "errors": self.errors,
+            "cache hit rate": self.cache_hits / self.count if self.count else 0.0,
+            "token overlap": self.mean("token_overlap"),
+            "trigram cosine": self.mean("ngram_cosine"),
+            "latency p50 (s)": self.percentile(0.5),
+            "latency p90 (s)": self.percentile(0.9),
+            "latency p99 (s)": self.percentile(0.99),
+            "prompt tokens/item": self.mean("prompt_tokens"),
+            "completion tokens/item": self.mean("completion_tokens"),
+        }
+
+
+def run_evaluation(
+    texts: Iterable[str],
+    configs: List[EvalConfig],
+    executor: Executor,
+    max_in_flight: int = 16,
+    out: Optional[TextIO] = None,
+) -> Dict[str, Aggregate]:
+    """
+    Evaluate every text under every configuration.
+
+    At most ``max_in_flight`` items are submitted at once, so memory stays
+    bounded however long ``texts`` is. Each result is written to ``out`` as a
+    JSON line as soon as it finishes.
+
+    Returns:
+        Aggregates per configuration name
+    """
+    aggregates = {config.name: Aggregate() for config in configs}
+    in_flight: Set[Future] = set()
+
+    def _drain(block_until: int) -> None:
+        nonlocal in_flight
+        while len(in_flight) > block_until:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                aggregates[record["config"]].add(record)
+                if out is not None:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    for index, text in enumerate(texts):
+        for config in configs:
+            in_flight.add(executor.submit(evaluate_item, config, index, text))
+        _drain(max(0, max_in_flight - len(configs)))
+    _drain(0)
+    return aggregates
+
+
+def format_report(aggregates: Dict[str, Aggregate]) -> str:
+    """Side-by-side summary table, with the difference when two configurations are compared."""
+    names = list(aggregates)
+    summaries = [aggregates[name].summary() for name in names]
+    header = f"{'metric':<24}" + "".join(f"{name:>14}" for name in names)
+    if len(names) == 2:
+        header += f"{'delta':>14}"
+    lines = [header, "-" * len(header)]
+    for metric in summaries[0]:
+        values = [summary[metric] for summary in summaries]
+        line = f"{metric:<24}" + "".join(f"{value:>14.3f}" if isinstance(value, float) else f"{value:>14}"
+                                         for value in values)
+        if len(values) == 2:
+            delta = values[1] - values[0]
+            line += f"{delta:>+14.3f}" if isinstance(delta, float) else f"{delta:>+14}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", help="Text file (one input per line) or JSONL with a \"text\" field")
+    parser.add_argument("--config", action="append", default=[],
+                        help="\"name:key=value;...\" with keys model, backends, style, cache (at most two)")
+    parser.add_argument("--out", help="Write per-item results as JSONL")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N inputs")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=16)
+    args = parser.parse_args()
+
+    configure()
+    specs = args.config or ["default:"]
+    if len(specs) > 2:
+        parser.error("compare at most two configurations")
+    configs = [parse_config(spec) for spec in specs]
+
+    texts: Iterable[str] = read_corpus(args.corpus)
+    if args.limit is not None:
+        texts = islice(texts, args.limit)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="evaluate") as executor:
+            aggregates = run_evaluation(texts, configs, executor, args.max_in_flight, out)
+    finally:
+        if out is not None:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    print(format_report(aggregates))
+    items = sum(aggregate.count for aggregate in aggregates.values())
+    print(f"\n{items} round trips in {elapsed:.1f}s ({items / elapsed:.1f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
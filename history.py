@@ -0,0 +1,391 @@
+"""
+Translation history persistence.
+
+Entries are stored as JSON objects. Besides the raw fields (input, translation,
+emoji_codes, timestamp, type) every entry carries the values the history view
+needs, computed once when the entry is written:
+
+    display_time   timestamp formatted for the history list ("10/18 14:05")
+    label          expander label (type icon, truncated input, display time)
+    search_key     lowercased input and translation, for substring search
+    codes_preview  the first few emoji codes, comma-joined
+
+Entries written before these fields existed are upgraded lazily when loaded.
+
+In memory, entries are held as compact ``HistoryEntry`` objects (``__slots__``,
+emoji code points in an ``array('I')``, the entry type interned) and bulk
+operations use the columnar ``HistoryBatch``. Both convert back to exactly the
+JSON objects they were built from.
+"""
+
+import json
+import logging
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from jsonfile import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SCHEMA_VERSION = 2
+LABEL_INPUT_CHARS = 30
+CODES_PREVIEW_COUNT = 5
+
+
+def format_display_time(timestamp: str) -> str:
+    """Format an ISO timestamp for the history list, or return "" if it cannot be parsed."""
+    if not timestamp:
+        return ""
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%m/%d %H:%M")
+    except (TypeError, ValueError):
+        return ""
+
+
+def _derive_fields(entry: Dict) -> Dict:
+    """Compute the display and search fields for ``entry`` in place."""
+    input_text = entry.get("input", "")
+    translation = entry.get("translation", "")
+    codes = entry.get("emoji_codes") or []
+    display_time = format_display_time(entry.get("timestamp", ""))
+    icon = "📖" if entry.get("type") == "emoji_to_text" else "😊"
+    ellipsis = "..." if len(input_text) > LABEL_INPUT_CHARS else ""
+
+    entry["display_time"] = display_time
+    entry["label"] = f"{icon} {input_text[:LABEL_INPUT_CHARS]}{ellipsis} {display_time}"
+    # Inputs are single-line search queries, so "\n" can never produce a match across fields.
+    entry["search_key"] = f"{input_text.lower()}\n{translation.lower()}"
+    entry["codes_preview"] = ", ".join(codes[:CODES_PREVIEW_COUNT]) + (
+        "..." if len(codes) > CODES_PREVIEW_COUNT else ""
+    )
+    entry["v"] = HISTORY_SCHEMA_VERSION
+    return entry
+
+
+def make_entry(
+    input_text: str,
+    translation: str,
+    emoji_codes: List[str],
+    entry_type: str,
+    timestamp: Optional[str] = None,
+) -> "HistoryEntry":
+    """
+    Build a history entry with its derived fields precomputed.
+
+    Args:
+        input_text: The text or emojis the user submitted
+        translation: The translation result
+        emoji_codes: Unicode code labels ("U+1F622") for the emojis involved
+        entry_type: "text_to_emoji" or "emoji_to_text"
+        timestamp: ISO timestamp (default: now)
+
+    Returns:
+        The history entry in the current schema
+    """
+    return HistoryEntry.from_dict(
+        _derive_fields(
+            {
+                "input": input_text,
+                "translation": translation,
+                "emoji_codes": emoji_codes,
+                "timestamp": timestamp or datetime.now().isoformat(),
+                "type": entry_type,
+            }
+        )
+    )
+
+
+def upgrade_entry(entry: Dict) -> Dict:
+    """Bring an entry up to the current schema, recomputing derived fields only if needed."""
+    if entry.get("v") == HISTORY_SCHEMA_VERSION:
+        return entry
+    entry.setdefault("input", "")
+    entry.setdefault("translation", "")
+    return _derive_fields(entry)
+
+
+def load_history(path: str) -> List["HistoryEntry"]:
+    """Load translation history from a JSON file, upgrading old entries on the way."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        logger.info("No history file found, creating new one")
+        return []
+    except json.JSONDecodeError:
+        logger.error("Invalid JSON in history file, resetting")
+        return []
+    return [HistoryEntry.from_dict(upgrade_entry(entry)) for entry in history]
+
+
+def save_history(history: Sequence["HistoryEntry"], path: str, max_items: int) -> None:
+    """Save the most recent ``max_items`` history entries to a JSON file."""
+    if len(history) > max_items:
+        history = history[-max_items:]
+    atomic_write_json(path, [entry.to_dict() for entry in history], indent=2)
+
+
+def search_history(history: List["HistoryEntry"], query: str) -> List["HistoryEntry"]:
+    """Return the entries whose input or translation contains ``query`` (case-insensitive)."""
+    if not query:
+        return history
+    needle = query.lower()
+    return [entry for entry in history if needle in entry.search_key]
+
+
+# Compact in-memory representation
+
+# JSON keys held in string slots. Values of any other type are kept verbatim in ``extra``.
+_STR_FIELDS = frozenset(
+    ["input", "translation", "timestamp", "type", "display_time", "label", "search_key", "codes_preview"]
+)
+_CANONICAL_LAYOUT = (
+    "input",
+    "translation",
+    "emoji_codes",
+    "timestamp",
+    "type",
+    "display_time",
+    "label",
+    "search_key",
+    "codes_preview",
+    "v",
+)
+_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {_CANONICAL_LAYOUT: _CANONICAL_LAYOUT}
+
+
+def _intern_layout(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Share one tuple per distinct key order instead of one per entry."""
+    return _layouts.setdefault(keys, keys)
+
+
+def encode_codes(codes: Any) -> Optional[array]:
+    """Pack ["U+1F622", ...] into array('I'), or return None if it would not format back identically."""
+    if not isinstance(codes, list):
+        return None
+    packed = array("I")
+    for code in codes:
+        if not isinstance(code, str) or not code.startswith("U+"):
+            return None
+        try:
+            value = int(code[2:], 16)
+        except ValueError:
+            return None
+        if not 0 <= value <= 0x10FFFF or f"U+{value:04X}" != code:
+            return None
+        packed.append(value)
+    return packed
+
+
+def decode_codes(packed: Iterable[int]) -> List[str]:
+    """Format packed code points back into ["U+1F622", ...]."""
+    return [f"U+{value:04X}" for value in packed]
+
+
+class HistoryEntry:
+    """
+    A single history entry stored compactly.
+
+    Emoji codes are kept as code points in an ``array('I')`` and the entry type,
+    one of a handful of values, is interned. ``layout`` records the JSON key
+    order and ``extra`` holds any key or value that does not fit the typed
+    slots, so ``to_dict`` reproduces the original object exactly.
+    """
+
+    __slots__ = (
+        "input",
+        "translation",
+        "codepoints",
+        "timestamp",
+        "type",
+        "display_time",
+        "label",
+        "search_key",
+        "codes_preview",
+        "version",
+        "layout",
+        "extra",
+    )
+
+    def __init__(self) -> None:
+        self.input = ""
+        self.translation = ""
+        self.codepoints: Optional[array] = None
+        self.timestamp = ""
+        self.type = ""
+        self.display_time = ""
+        self.label = ""
+        self.search_key = ""
+        self.codes_preview = ""
+        self.version = 0
+        self.layout: Tuple[str, ...] = ()
+        self.extra: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HistoryEntry":
+        """Build an entry from its JSON object."""
+        entry = cls()
+        extra = {}
+        for key, value in data.items():
+            packed = encode_codes(value) if key == "emoji_codes" else None
+            if key in _STR_FIELDS and isinstance(value, str):
+                # Other fields are mostly unique per entry; interning them would share
+                # little, and interned strings are immortal on CPython 3.12+
+                setattr(entry, key, sys.intern(value) if key == "type" else value)
+            elif packed is not None:
+                entry.codepoints = packed
+            elif key == "v" and type(value) is int:
+                entry.version = value
+            else:
+                extra[key] = value
+        entry.layout = _intern_layout(tuple(data))
+        entry.extra = extra or None
+        return entry
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the entry as the JSON object it was built from."""
+        extra = self.extra or {}
+        result = {}
+        for key in self.layout:
+            if key in extra:
+                result[key] = extra[key]
+            elif key == "emoji_codes":
+                result[key] = decode_codes(self.codepoints)
+            elif key == "v":
+                result[key] = self.version
+            else:
+                result[key] = getattr(self, key)
+        return result
+
+    @property
+    def emoji_codes(self) -> List[str]:
+        """The emoji codes as "U+XXXX" labels."""
+        if self.codepoints is not None:
+            return decode_codes(self.codepoints)
+        codes = (self.extra or {}).get("emoji_codes")
+        return codes if isinstance(codes, list) else []
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, HistoryEntry):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"HistoryEntry({self.to_dict()!r})"
+
+
+class HistoryBatch:
+    """
+    Column-oriented container for bulk history operations.
+
+    Each field lives in its own list; all emoji code points share one flat
+    ``array('I')`` indexed by ``code_offsets``. Rows convert to and from
+    ``HistoryEntry`` and JSON objects without loss.
+    """
+
+    _COLUMNS = (
+        "input",
+        "translation",
+        "timestamp",
+        "type",
+        "display_time",
+        "label",
+        "search_key",
+        "codes_preview",
+        "version",
+        "layout",
+        "extra",
+    )
+
+    def __init__(self) -> None:
+        for column in self._COLUMNS:
+            setattr(self, column, [])
+        self.code_points = array("I")
+        self.code_offsets = array("L", [0])
+        # 1 for rows whose emoji codes are packed into code_points
+        self.has_codes = bytearray()
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[HistoryEntry]) -> "HistoryBatch":
+        batch = cls()
+        batch.extend(entries)
+        return batch
+
+    @classmethod
+    def from_dicts(cls, records: Iterable[Dict[str, Any]]) -> "HistoryBatch":
+        return cls.from_entries(HistoryEntry.from_dict(record) for record in records)
+
+    def __len__(self) -> int:
+        return len(self.input)
+
+    def append(self, entry: HistoryEntry) -> None:
+        for column in self._COLUMNS:
+            getattr(self, column).append(getattr(entry, column))
+        if entry.codepoints is not None:
+            self.code_points.extend(entry.codepoints)
+        self.has_codes.append(entry.codepoints is not None)
+        self.code_offsets.append(len(self.code_points))
+
+    def extend(self, entries: Iterable[HistoryEntry]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def entry(self, index: int) -> HistoryEntry:
+        """Materialize row ``index`` as a ``HistoryEntry``."""
+        entry = HistoryEntry()
+        for column in self._COLUMNS:
+            setattr(entry, column, getattr(self, column)[index])
+        if self.has_codes[index]:
+            entry.codepoints = self.code_points[self.code_offsets[index] : self.code_offsets[index + 1]]
+        return entry
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        for index in range(len(self)):
+            yield self.entry(index)
+
+    def to_dicts(self) -> Iterator[Dict[str, Any]]:
+        """Yield every row as its JSON object."""
+        for entry in self:
+            yield entry.to_dict()
+
+    def select(self, indices: Iterable[int]) -> "HistoryBatch":
+        """Return a new batch holding the given rows, in order."""
+        return HistoryBatch.from_entries(self.entry(index) for index in indices)
+
+    def matching(
+        self,
+        query: str = "",
+        types: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> List[int]:
+        """
+        Return the row indices matching every given filter.
+
+        Args:
+            query: Case-insensitive substring of input or translation
+            types: Allowed entry types
+            since: Inclusive lower bound on the ISO timestamp
+            until: Exclusive upper bound on the ISO timestamp
+
+        Returns:
+            Matching row indices in ascending order
+        """
+        needle = query.lower()
+        allowed = set(types) if types is not None else None
+        indices = []
+        for index, (search_key, entry_type, timestamp) in enumerate(
+            zip(self.search_key, self.type, self.timestamp)
+        ):
+            if needle and needle not in search_key:
+                continue
+            if allowed is not None and entry_type not in allowed:
+                continue
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp >= until:
+                continue
+            indices.append(index)
+        return indices
@@ -0,0 +1,138 @@
+"""
+Background translation jobs.
+
+Translations run on a shared thread pool instead of the Streamlit script
+thread. The app keeps the returned ``TranslationJob`` objects in
+``st.session_state`` and polls them, so several jobs (a forward translation,
+an interpretation and a round trip) can be in flight at once.
+"""
+
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from translator import EmojiTranslator
+
+TEXT_TO_EMOJI = "text_to_emoji"
+EMOJI_TO_TEXT = "emoji_to_text"
+ROUND_TRIP = "round_trip"
+
+
+class TranslationJob(NamedTuple):
+    """A submitted translation and the future that will hold its result."""
+
+    kind: str
+    text: str
+    future: Future
+    submitted_at: float
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def elapsed(self) -> float:
+        """Seconds since submission."""
+        return time.monotonic() - self.submitted_at
+
+
+def completed_job(kind: str, text: str, result: Any) -> TranslationJob:
+    """A job whose result is already known, e.g. served from the translation cache."""
+    future: Future = Future()
+    future.set_result(result)
+    return TranslationJob(kind, text, future, time.monotonic())
+
+
+def chain(executor: Executor, future: Future, fn: Callable[[Any], Any]) -> Future:
+    """
+    Run ``fn(result)`` on ``executor`` once ``future`` completes, without blocking a worker while waiting.
+
+    Returns:
+        A future for the result of ``fn``; it fails if either step fails
+    """
+    chained: Future = Future()
+
+    def _start(first: Future) -> None:
+        if first.cancelled():
+            chained.cancel()
+            return
+        error = first.exception()
+        if error is not None:
+            chained.set_exception(error)
+            return
+        try:
+            second = executor.submit(fn, first.result())
+        except Exception as e:  # e.g. executor shut down
+            chained.set_exception(e)
+            return
+        second.add_done_callback(_finish)
+
+    def _finish(second: Future) -> None:
+        error = second.exception()
+        if error is not None:
+            chained.set_exception(error)
+        else:
+            chained.set_result(second.result())
+
+    future.add_done_callback(_start)
+    return chained
+
+
+def round_trip(
+    executor: Executor, translator: EmojiTranslator, text: str, style: str = "Standard"
+) -> "Future[Tuple[str, Optional[str]]]":
+    """
+    Translate ``text`` to emojis in the given style, then interpret those emojis back into text.
+
+    Returns:
+        A future for ``(emojis, interpretation)``; the interpretation is None when
+        the forward translation failed
+    """
+    forward = executor.submit(translator.translate, text, style)
+
+    def _interpret(emojis: str) -> Tuple[str, Optional[str]]:
+        if not emojis or emojis.startswith("❌"):
+            return emojis, None
+        return emojis, translator.translate_reverse(emojis)
+
+    return chain(executor, forward, _interpret)
+
+
+def submit_job(
+    executor: Executor,
+    translator: EmojiTranslator,
+    kind: str,
+    text: str,
+    candidates: int = 1,
+    style: str = "Standard",
+) -> TranslationJob:
+    """
+    Start a translation job.
+
+    Args:
+        executor: Shared thread pool
+        translator: Translator to call
+        kind: TEXT_TO_EMOJI, EMOJI_TO_TEXT or ROUND_TRIP
+        text: Text (or emojis) to translate
+        candidates: Alternatives to request for TEXT_TO_EMOJI and EMOJI_TO_TEXT jobs
+        style: Translation style for TEXT_TO_EMOJI and ROUND_TRIP jobs
+
+    Returns:
+        The submitted job; TEXT_TO_EMOJI and EMOJI_TO_TEXT futures hold a list of
+        candidates, ROUND_TRIP futures an ``(emojis, interpretation)`` tuple
+    """
+    if kind == TEXT_TO_EMOJI:
+        future = executor.submit(translator.translate_candidates, text, candidates, style)
+    elif kind == EMOJI_TO_TEXT:
+        future = executor.submit(translator.translate_reverse_candidates, text, candidates)
+    elif kind == ROUND_TRIP:
+        future = round_trip(executor, translator, text, style)
+    else:
+        raise ValueError(f"Unknown translation job kind: {kind}")
+    return TranslationJob(kind, text, future, time.monotonic())
+
+
+def pop_finished(jobs: Dict[str, TranslationJob]) -> List[TranslationJob]:
+    """Remove and return the finished jobs, leaving running ones in ``jobs``."""
+    finished = [job for job in jobs.values() if job.done()]
+    for job in finished:
+        del jobs[job.kind]
+    return finished
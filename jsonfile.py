@@ -0,0 +1,32 @@
+"""
+Atomic JSON file writes shared by the history, analytics and cache files.
+"""
+
+import json
+import os
+from typing import Any
+
+
+def atomic_write_json(path: str, data: Any, **dump_options: Any) -> None:
+    """
+    Write ``data`` as JSON to ``path`` so that readers never see a half-written file.
+
+    The data goes to a per-process temporary file, since several app workers
+    may save the same file, which then replaces ``path``. The temporary file
+    is removed if writing fails.
+
+    Args:
+        path: File to write
+        data: JSON-serialisable value
+        **dump_options: Passed to ``json.dump`` (``ensure_ascii`` defaults to False)
+    """
+    dump_options.setdefault("ensure_ascii", False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
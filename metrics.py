@@ -0,0 +1,49 @@
+"""
+Process-wide counters for operational metrics.
+
+Components increment named counters on the shared ``metrics`` registry
+(e.g. ``metrics.incr("speculation.hits")``); the app and benchmarks read them
+back with ``snapshot`` or ``ratio``.
+"""
+
+import threading
+from collections import Counter
+from typing import Dict
+
+
+class Metrics:
+    """A thread-safe registry of named counters."""
+
+    def __init__(self) -> None:
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        """Add ``amount`` to counter ``name``."""
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, name: str) -> float:
+        """Current value of counter ``name`` (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def ratio(self, numerator: str, *others: str) -> float:
+        """``numerator / (numerator + others)``, e.g. a hit rate from hits and misses; 0 if all are zero."""
+        with self._lock:
+            hits = self._counters.get(numerator, 0)
+            total = hits + sum(self._counters.get(name, 0) for name in others)
+        return hits / total if total else 0.0
+
+    def snapshot(self, prefix: str = "") -> Dict[str, float]:
+        """Copy of all counters whose name starts with ``prefix``."""
+        with self._lock:
+            return {name: value for name, value in self._counters.items() if name.startswith(prefix)}
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        with self._lock:
+            self._counters.clear()
+
+
+metrics = Metrics()
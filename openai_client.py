@@ -0,0 +1,62 @@
+"""
+The lazily imported OpenAI SDK and per-thread token accounting.
+
+Shared by the translator and the router's OpenAI backends. The SDK is slow to
+import, so ``OpenAI``/``OpenAIError`` are only loaded on first use.
+"""
+
+import threading
+from typing import Dict
+
+from metrics import metrics
+
+OPENAI_NAMES = ("OpenAI", "OpenAIError")
+
+
+def __getattr__(name: str):
+    """Import ``OpenAI``/``OpenAIError`` from the SDK the first time they are accessed."""
+    if name in OPENAI_NAMES:
+        import openai
+
+        value = getattr(openai, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def lazy_openai(name: str):
+    """Resolve a lazily imported OpenAI symbol, honouring anything already bound (e.g. test patches)."""
+    try:
+        return globals()[name]
+    except KeyError:
+        return __getattr__(name)
+
+
+_usage = threading.local()
+
+
+def record_usage(usage) -> None:
+    """
+    Count the tokens reported for one API response.
+
+    Totals go to the shared metrics registry and to a per-thread tally that
+    ``take_usage`` reads, so callers can attribute tokens to the work they just did.
+    """
+    counts = {}
+    for field in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, field, None)
+        if isinstance(value, int):
+            counts[field] = value
+            metrics.incr(f"translator.tokens.{field}", value)
+    tally = getattr(_usage, "tally", None)
+    if tally is None:
+        tally = _usage.tally = {"prompt_tokens": 0, "completion_tokens": 0}
+    for field, value in counts.items():
+        tally[field] += value
+
+
+def take_usage() -> Dict[str, int]:
+    """Tokens used by this thread's requests since the last call, and reset the tally."""
+    tally = getattr(_usage, "tally", None) or {"prompt_tokens": 0, "completion_tokens": 0}
+    _usage.tally = None
+    return tally
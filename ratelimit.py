@@ -0,0 +1,69 @@
+"""
+Request budgets for optional API traffic (speculation, cache warming).
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class RateBudget:
+    """
+    Allows at most ``limit`` calls per sliding ``window`` seconds.
+
+    ``try_acquire`` never blocks, for traffic that can simply be skipped;
+    ``acquire`` waits for the next free slot, for jobs that must pace themselves.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._calls and self._calls[0] <= now - self.window:
+            self._calls.popleft()
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free right now."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if len(self._calls) >= self.limit:
+                return False
+            self._calls.append(now)
+            return True
+
+    def acquire(self) -> None:
+        """Take a slot, sleeping until one frees up."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._expire(now)
+                if len(self._calls) < self.limit:
+                    self._calls.append(now)
+                    return
+                wait = self._calls[0] + self.window - now
+            self._sleep(max(wait, 0.001))
+
+    def release(self) -> None:
+        """Give back the most recently taken slot, e.g. when a second budget refused the call."""
+        with self._lock:
+            if self._calls:
+                self._calls.pop()
+
+    def remaining(self) -> int:
+        """Slots free right now."""
+        with self._lock:
+            self._expire(self._clock())
+            return max(0, self.limit - len(self._calls))
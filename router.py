@@ -0,0 +1,298 @@
+"""
+Latency-aware routing across several models or endpoints.
+
+A ``ModelRouter`` holds a list of backends (OpenAI models, OpenAI-compatible
+endpoints, or the offline ``LocalBackend``) and tracks an exponentially
+weighted moving average (EWMA) of each one's latency and error rate. Short
+or "Minimal" requests go to the fastest healthy backend; everything else goes
+to the first healthy backend in configured order. A backend whose error rate
+crosses the threshold, or whose latency exceeds ``max_latency``, is skipped
+for a cooldown period, and a failed call falls through to the next backend.
+Fallback-only backends (the ``LocalBackend``) are never ranked by latency and
+are tried only after every other backend has failed.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from metrics import Metrics, metrics
+from openai_client import lazy_openai, record_usage
+
+logger = logging.getLogger(__name__)
+
+LOCAL_BACKEND = "local"
+
+
+class Backend(ABC):
+    """Something that can run a chat completion and return the choices' text."""
+
+    name = "backend"
+    # Only used once every other backend has failed; never picked for speed
+    fallback_only = False
+
+    @abstractmethod
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, n: int = 1) -> List[str]:
+        """Return the text of ``n`` completion choices for ``messages``."""
+
+
+class OpenAIBackend(Backend):
+    """An OpenAI model, optionally behind a custom (OpenAI-compatible) endpoint."""
+
+    def __init__(
+        self,
+        model: str,
+        api_key: Optional[str],
+        base_url: Optional[str] = None,
+        client_factory: Optional[Callable[..., Any]] = None,
+    ):
+        """
+        Initialize the backend; the client is built on first use.
+
+        Args:
+            model: The OpenAI model to call
+            api_key: OpenAI API key
+            base_url: Custom OpenAI-compatible endpoint
+            client_factory: Builds the client from its keyword arguments (default: ``openai.OpenAI``)
+        """
+        self.model = model
+        self.name = f"{model}@{base_url}" if base_url else model
+        self._api_key = api_key
+        self._base_url = base_url
+        self._client_factory = client_factory
+        self._client = None
+
+    @property
+    def client(self):
+        """The OpenAI client, constructed on first access."""
+        if self._client is None:
+            kwargs = {"api_key": self._api_key}
+            if self._base_url:
+                kwargs["base_url"] = self._base_url
+            factory = self._client_factory or lazy_openai("OpenAI")
+            self._client = factory(**kwargs)
+        return self._client
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, n: int = 1) -> List[str]:
+        params = {"model": self.model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        if n > 1:
+            params["n"] = n
+        response = self.client.chat.completions.create(**params)
+        record_usage(getattr(response, "usage", None))
+        return [choice.message.content for choice in response.choices]
+
+
+class LocalBackend(Backend):
+    """
+    Offline stand-in that maps keywords to emojis (and back) without any API call.
+
+    Useful as a last-resort fallback, for demos without an API key, and for load tests.
+    Its near-zero latency says nothing about answer quality, so the router only
+    falls back to it.
+    """
+
+    name = LOCAL_BACKEND
+    fallback_only = True
+
+    KEYWORDS = {
+        "happy": "😄", "great": "🌟", "good": "🙂", "love": "❤️", "sad": "😢", "cry": "😭",
+        "angry": "😠", "tired": "😴", "sleep": "😴", "stress": "😫", "work": "💼", "job": "💼",
+        "code": "💻", "coding": "💻", "learn": "📚", "school": "📚", "study": "📚", "party": "🎉",
+        "birthday": "🎂", "done": "✅", "finished": "✅", "completed": "✅", "win": "🏆",
+        "travel": "✈️", "vacation": "🌴", "home": "🏡", "food": "🍕", "coffee": "☕", "music": "🎵",
+        "rain": "🌧️", "sun": "☀️", "friend": "🤝", "friends": "🤝", "money": "💰", "sick": "🤒",
+        "excited": "🤩", "scared": "😨", "bored": "🥱", "hope": "✨", "project": "🛠️",
+    }
+
+    def __init__(self):
+        self._meanings: Dict[str, str] = {}
+        for word, emoji in self.KEYWORDS.items():
+            self._meanings.setdefault(emoji, word)
+
+    def complete(self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, n: int = 1) -> List[str]:
+        prompt = messages[-1]["content"]
+        if prompt.startswith("Interpret these emojis:"):
+            emojis = prompt.split(":", 1)[1]
+            words = [meaning for emoji, meaning in self._meanings.items() if emoji in emojis]
+            return ["Feeling " + ", ".join(words) if words else "A mix of feelings"]
+        text = prompt.split(":", 1)[1].lower() if ":" in prompt else prompt.lower()
+        emojis = []
+        for word in text.replace("!", " ").replace(".", " ").replace(",", " ").split():
+            emoji = self.KEYWORDS.get(word)
+            if emoji and emoji not in emojis:
+                emojis.append(emoji)
+        return ["".join(emojis[:6]) or "🙂"]
+
+
+class BackendHealth:
+    """EWMA latency and error rate for one backend."""
+
+    __slots__ = ("latency", "measured_at", "error_rate", "cooldown_until", "requests", "errors")
+
+    def __init__(self):
+        self.latency: Optional[float] = None
+        self.measured_at = 0.0
+        self.error_rate = 0.0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+
+class ModelRouter:
+    """Routes completions across backends by EWMA latency and health."""
+
+    def __init__(
+        self,
+        backends: Sequence[Backend],
+        alpha: float = 0.3,
+        error_threshold: float = 0.5,
+        max_latency: Optional[float] = None,
+        cooldown: float = 30.0,
+        remeasure_after: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        registry: Metrics = metrics,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            backends: Backends in order of preference
+            alpha: EWMA weight of the newest observation
+            error_threshold: Error rate above which a backend is put in cooldown
+            max_latency: EWMA latency (seconds) above which a backend is put in cooldown
+            cooldown: Seconds a degraded backend is skipped before being retried
+            remeasure_after: Seconds after which a backend's latency counts as stale,
+                so fast requests try it again instead of trusting an old measurement
+            clock: Time source (for tests)
+            registry: Metrics registry for the router counters
+        """
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        self.backends = list(backends)
+        self.alpha = alpha
+        self.error_threshold = error_threshold
+        self.max_latency = max_latency
+        self.cooldown = cooldown
+        self.remeasure_after = remeasure_after
+        self._clock = clock
+        self._metrics = registry
+        self._health = {backend.name: BackendHealth() for backend in self.backends}
+        self._lock = threading.Lock()
+
+    def health(self, name: str) -> BackendHealth:
+        return self._health[name]
+
+    def is_healthy(self, backend: Backend) -> bool:
+        return self._clock() >= self._health[backend.name].cooldown_until
+
+    def order(self, fast: bool = False) -> List[Backend]:
+        """
+        Backends in the order they will be tried.
+
+        Healthy backends come first: by EWMA latency when ``fast`` (untried ones
+        and ones not measured for ``remeasure_after`` seconds first, so they get
+        measured), otherwise in configured order. Degraded backends follow,
+        soonest-to-recover first, and fallback-only backends come last.
+        """
+        with self._lock:
+            now = self._clock()
+            primary = [backend for backend in self.backends if not backend.fallback_only]
+            fallback = [backend for backend in self.backends if backend.fallback_only]
+            healthy = [backend for backend in primary if self.is_healthy(backend)]
+            degraded = [backend for backend in primary if not self.is_healthy(backend)]
+            if fast:
+                healthy.sort(key=lambda backend: self._measured_latency(backend, now))
+            degraded.sort(key=lambda backend: self._health[backend.name].cooldown_until)
+        return healthy + degraded + fallback
+
+    def _measured_latency(self, backend: Backend, now: float) -> float:
+        health = self._health[backend.name]
+        if health.latency is None or now - health.measured_at > self.remeasure_after:
+            return 0.0
+        return health.latency
+
+    def _record(self, backend: Backend, latency: Optional[float], failed: bool) -> None:
+        with self._lock:
+            health = self._health[backend.name]
+            health.requests += 1
+            health.error_rate += self.alpha * ((1.0 if failed else 0.0) - health.error_rate)
+            if failed:
+                health.errors += 1
+            elif latency is not None:
+                health.latency = latency if health.latency is None else (
+                    health.latency + self.alpha * (latency - health.latency)
+                )
+                health.measured_at = self._clock()
+            too_slow = self.max_latency is not None and (health.latency or 0.0) > self.max_latency
+            if health.error_rate > self.error_threshold or too_slow:
+                if self._clock() >= health.cooldown_until:
+                    logger.warning(f"Backend {backend.name} degraded, cooling down for {self.cooldown:.0f}s")
+                health.cooldown_until = self._clock() + self.cooldown
+                # Give it a clean slate once the cooldown is over
+                health.error_rate = 0.0
+                health.latency = None
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        n: int = 1,
+        fast: bool = False,
+    ) -> List[str]:
+        """
+        Run a completion on the best available backend, failing over on errors.
+
+        Args:
+            messages: Chat messages
+            max_tokens: Completion token limit
+            temperature: Sampling temperature
+            n: Number of candidates to request
+            fast: Prefer the lowest-latency backend (for short or "Minimal" requests)
+
+        Returns:
+            The choices' text from the first backend that succeeded
+
+        Raises:
+            The last backend's error if every backend failed
+        """
+        last_error: Optional[Exception] = None
+        for attempt, backend in enumerate(self.order(fast)):
+            if attempt:
+                self._metrics.incr("router.failovers")
+            started = self._clock()
+            try:
+                choices = backend.complete(messages, max_tokens, temperature, n)
+            except Exception as e:
+                self._record(backend, None, failed=True)
+                self._metrics.incr(f"router.{backend.name}.errors")
+                logger.warning(f"Backend {backend.name} failed: {e}")
+                last_error = e
+                continue
+            self._record(backend, self._clock() - started, failed=False)
+            self._metrics.incr(f"router.{backend.name}.requests")
+            return choices
+        raise last_error
+
+
+def build_backends(spec: str, api_key: Optional[str]) -> List[Backend]:
+    """
+    Parse a comma-separated backend list such as ``"gpt-4o-mini,gpt-3.5-turbo@https://proxy/v1,local"``.
+
+    Raises:
+        ValueError: If an OpenAI backend is listed but no API key is available
+    """
+    backends: List[Backend] = []
+    for item in (part.strip() for part in spec.split(",")):
+        if not item:
+            continue
+        if item == LOCAL_BACKEND:
+            backends.append(LocalBackend())
+            continue
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required")
+        model, _, base_url = item.partition("@")
+        backends.append(OpenAIBackend(model, api_key, base_url or None))
+    return backends
@@ -0,0 +1,160 @@
+"""
+Speculative translation while the user is typing.
+
+Once a session's input has stayed the same for ``debounce`` seconds, the
+``Speculator`` starts translating it in the background and keeps the future
+in a short-lived cache.
+
+The app can only observe what Streamlit reports: ``st.text_area`` sends its
+value when it loses focus or on Ctrl+Enter, not on every keystroke. Speculation
+therefore starts after the user leaves the text box (Tab, Ctrl+Enter, or
+changing another setting) and then waits ``debounce`` seconds. It cannot help
+when the user clicks "Translate" straight from the text box, because the value
+arrives in the same rerun as the click. When the user then clicks "Translate", ``take``
+hands back that future (finished or still running) instead of issuing a new
+request. Speculations for text the user has since changed are discarded.
+
+Speculation is limited by a global ``RateBudget`` and a per-session one, and
+reports ``speculation.*`` counters on the shared metrics registry.
+"""
+
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional
+
+from cache import TTLCache
+from metrics import Metrics, metrics
+from ratelimit import RateBudget
+
+
+class SpeculationState:
+    """What one session has typed, and whether it has been speculated on yet."""
+
+    __slots__ = ("text", "changed_at", "speculated", "budget")
+
+    def __init__(self, budget: RateBudget):
+        self.text = ""
+        self.changed_at = 0.0
+        self.speculated = False
+        self.budget = budget
+
+
+class Speculator:
+    """Starts translations ahead of the click and caches them briefly."""
+
+    def __init__(
+        self,
+        executor: Executor,
+        translate: Callable[[str], Any],
+        budget: RateBudget,
+        debounce: float = 1.0,
+        ttl: float = 120.0,
+        session_limit: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+        registry: Metrics = metrics,
+        is_cached: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initialize the speculator.
+
+        Args:
+            executor: Pool the speculative translations run on
+            translate: Function producing the translation (or list of candidates) for a text
+            budget: Speculative calls allowed across all sessions
+            debounce: Seconds the input must stay unchanged before speculating
+            ttl: Seconds a speculative result stays usable
+            session_limit: Speculative calls allowed per session per minute
+            clock: Time source (for tests)
+            registry: Metrics registry for the speculation counters
+            is_cached: Whether a finished translation of a text is already cached, so
+                speculating on it would only spend budget
+        """
+        self.executor = executor
+        self.translate = translate
+        self.budget = budget
+        self.debounce = debounce
+        self.session_limit = session_limit
+        self._clock = clock
+        self._metrics = registry
+        self._is_cached = is_cached
+        self._cache = TTLCache(maxsize=512, ttl=ttl, clock=clock)
+
+    def new_session(self) -> SpeculationState:
+        """State to keep in a session so its typing can be tracked."""
+        return SpeculationState(RateBudget(self.session_limit, 60.0, clock=self._clock))
+
+    def observe(self, state: SpeculationState, text: str) -> bool:
+        """
+        Record the session's current input and speculate once it is stable.
+
+        Returns:
+            True if a speculative translation was started
+        """
+        now = self._clock()
+        text = text.strip()
+        if text != state.text:
+            if state.speculated:
+                self.discard(state.text)
+            state.text, state.changed_at, state.speculated = text, now, False
+            return False
+        if not text or state.speculated or now - state.changed_at < self.debounce:
+            return False
+
+        # One attempt per stable input, even if the budget says no
+        state.speculated = True
+        if text in self._cache:
+            return False
+        if self._is_cached is not None and self._is_cached(text):
+            self._metrics.incr("speculation.cached")
+            return False
+        # The session's own budget first, so a session over its share never spends
+        # global quota; a global refusal hands the session slot back
+        if not state.budget.try_acquire():
+            self._metrics.incr("speculation.budget_denied")
+            return False
+        if not self.budget.try_acquire():
+            state.budget.release()
+            self._metrics.incr("speculation.budget_denied")
+            return False
+        self._cache.set(text, self.executor.submit(self.translate, text))
+        self._metrics.incr("speculation.started")
+        return True
+
+    def discard(self, text: str) -> None:
+        """Drop a speculation the user has typed past."""
+        future = self._cache.pop(text.strip())
+        if future is not None:
+            future.cancel()
+            self._metrics.incr("speculation.discarded")
+
+    def take(self, text: str) -> Optional[Future]:
+        """
+        Claim the speculative translation for ``text``.
+
+        Returns:
+            The (possibly still running) future, or None if there is no usable speculation
+        """
+        future = self._cache.pop(text.strip())
+        if future is None or _failed(future):
+            self._metrics.incr("speculation.misses")
+            return None
+        self._metrics.incr("speculation.hits")
+        return future
+
+    def hit_rate(self) -> float:
+        """Share of clicks answered by a speculation."""
+        return self._metrics.ratio("speculation.hits", "speculation.misses")
+
+
+def _failed(future: Future) -> bool:
+    if future.cancelled():
+        return True
+    if not future.done():
+        return False
+    if future.exception() is not None:
+        return True
+    result = future.result()
+    # Translations may come back as a list of candidates, best first
+    if isinstance(result, (list, tuple)):
+        result = result[0] if result else ""
+    return not result or result.startswith("❌")
@@ -0,0 +1,592 @@
+"""
+Tiered translation history store.
+
+Recent entries live in a small "hot" JSON file (storage.json) that the app
+reads on every rerun. When it grows past its limit, the oldest entries are
+rolled into compressed archive segments, one per time partition (month by
+default), under an archive directory.
+
+Each segment file starts with a fixed-size plain-text header followed by the
+compressed JSONL payload (gzip or xz; new entries are appended as extra
+members/streams). The header records the entry count, first/last timestamp
+and per-type counts, so searches and date filters can skip a segment without
+decompressing it. Segments are only opened when a query reaches past the
+hot entries.
+
+Writers in different processes (app workers, the transfer CLI) coordinate
+through an advisory lock file next to the hot file, so appends, rollovers and
+imports never interleave on the same segment.
+"""
+
+import gzip
+import heapq
+import io
+import json
+import logging
+import lzma
+import os
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from analytics import HistoryAnalytics
+from history import HistoryBatch, HistoryEntry, load_history, save_history
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"EMOSEG1 "
+SEGMENT_HEADER_SIZE = 512
+SEGMENT_SUFFIX = ".seg"
+UNDATED_PARTITION = "undated"
+ROLLOVER_BATCH = 25
+SEGMENT_CACHE_SIZE = 4
+
+_CODECS = {"gzip": gzip, "xz": lzma}
+# Keyword naming each codec's compression level (gzip 0-9, default 9; xz presets 0-9, default 6)
+_LEVEL_ARGS = {"gzip": "compresslevel", "xz": "preset"}
+# One shared encoder: json.dumps with options builds a new encoder on every call
+_encode_record = json.JSONEncoder(ensure_ascii=False).encode
+# Bulk imports trade a little archive size for much faster compression
+IMPORT_LEVELS = {"gzip": 3, "xz": 1}
+# Partitions whose keys an import keeps in memory for dedup; older ones are rescanned if revisited
+IMPORT_OPEN_PARTITIONS = 4
+_PARTITION_WIDTH = {"month": 7, "day": 10}
+
+
+def _lock_file(f) -> None:
+    """Block until this process holds the exclusive lock on the open file ``f``."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+def _unlock_file(f) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SegmentHeader(NamedTuple):
+    """Summary of an archive segment, readable without decompressing it."""
+
+    path: str
+    partition: str
+    codec: str
+    count: int
+    first: str
+    last: str
+    types: Dict[str, int]
+
+    def overlaps(self, since: Optional[str], until: Optional[str]) -> bool:
+        """Whether any entry may fall in [since, until)."""
+        if since is not None and self.last < since:
+            return False
+        if until is not None and self.first >= until:
+            return False
+        return True
+
+    def has_types(self, types: Optional[Iterable[str]]) -> bool:
+        """Whether any entry may have one of ``types``."""
+        return types is None or any(self.types.get(entry_type) for entry_type in types)
+
+
+def _encode_header(header: Dict) -> bytes:
+    raw = SEGMENT_MAGIC + json.dumps(header, ensure_ascii=True, separators=(",", ":")).encode("ascii")
+    if len(raw) >= SEGMENT_HEADER_SIZE:
+        raise ValueError(f"Segment header exceeds {SEGMENT_HEADER_SIZE} bytes")
+    return raw.ljust(SEGMENT_HEADER_SIZE - 1) + b"\n"
+
+
+def read_segment_header(path: str) -> SegmentHeader:
+    """Read a segment's header without touching its payload."""
+    with open(path, "rb") as f:
+        raw = f.read(SEGMENT_HEADER_SIZE)
+    if not raw.startswith(SEGMENT_MAGIC):
+        raise ValueError(f"Not a history segment: {path}")
+    header = json.loads(raw[len(SEGMENT_MAGIC) :].decode("ascii"))
+    return SegmentHeader(
+        path=path,
+        partition=os.path.basename(path)[: -len(SEGMENT_SUFFIX)],
+        codec=header["codec"],
+        count=header["count"],
+        first=header["first"],
+        last=header["last"],
+        types=header["types"],
+    )
+
+
+def append_segment(
+    path: str,
+    records: Sequence[Dict],
+    codec: str = "gzip",
+    level: Optional[int] = None,
+    lines: Optional[Sequence[Optional[str]]] = None,
+) -> SegmentHeader:
+    """
+    Append records to a segment, creating it if needed.
+
+    The records are compressed as one new gzip member / xz stream written after
+    the existing payload, and the header is rewritten in place, so earlier data
+    is never decompressed or copied.
+
+    Args:
+        path: Segment file path
+        records: History records (JSON objects) in chronological order
+        codec: "gzip" or "xz"; ignored for existing segments, which keep their codec
+        level: Compression level for this append (default: the codec's default)
+        lines: Each record's JSON text without the line break, written as is
+            instead of encoding the record again (None entries are encoded)
+
+    Returns:
+        The updated segment header
+    """
+    if os.path.exists(path):
+        current = read_segment_header(path)
+        codec, count, first, last = current.codec, current.count, current.first, current.last
+        types = dict(current.types)
+    else:
+        count, first, last, types = 0, "", "", {}
+
+    timestamps = (record.get("timestamp") for record in records)
+    dated = [timestamp for timestamp in timestamps if timestamp and isinstance(timestamp, str)]
+    if dated:
+        first = min(dated) if not first else min(first, min(dated))
+        last = max(last, max(dated))
+    type_counts = Counter(types)
+    type_counts.update(str(record.get("type", "")) for record in records)
+    types = dict(type_counts)
+    count += len(records)
+
+    if lines is None:
+        lines = [_encode_record(record) for record in records]
+    elif None in lines:
+        lines = [_encode_record(record) if line is None else line for record, line in zip(records, lines)]
+    payload = "\n".join(lines) + "\n" if lines else ""
+    options = {} if level is None else {_LEVEL_ARGS[codec]: level}
+    member = _CODECS[codec].compress(payload.encode("utf-8"), **options)
+    header = _encode_header(
+        {"v": 1, "codec": codec, "count": count, "first": first, "last": last, "types": types}
+    )
+
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    with open(path, mode) as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            f.write(header)
+        f.write(member)
+        f.flush()
+        f.seek(0)
+        f.write(header)
+    return read_segment_header(path)
+
+
+def read_segment(path: str) -> HistoryBatch:
+    """Decompress a segment into a batch, in chronological order of appends."""
+    header = read_segment_header(path)
+    with open(path, "rb") as f:
+        f.seek(SEGMENT_HEADER_SIZE)
+        payload = _CODECS[header.codec].decompress(f.read())
+    return HistoryBatch.from_dicts(json.loads(line) for line in payload.decode("utf-8").split("\n") if line)
+
+
+def iter_segment(path: str) -> Iterator[Dict]:
+    """Stream a segment's records one at a time, decompressing incrementally."""
+    header = read_segment_header(path)
+    with open(path, "rb") as f:
+        f.seek(SEGMENT_HEADER_SIZE)
+        yield from _iter_payload(f, header.codec)
+
+
+def _iter_payload(f: BinaryIO, codec: str) -> Iterator[Dict]:
+    stream = gzip.GzipFile(fileobj=f) if codec == "gzip" else lzma.LZMAFile(f)
+    with io.TextIOWrapper(stream, encoding="utf-8", newline="\n") as lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+class _ImportPartition:
+    """Dedup state of one partition during an import."""
+
+    __slots__ = ("keys", "header", "first", "last")
+
+    def __init__(self) -> None:
+        self.keys: Set[int] = set()
+        self.header: Optional[SegmentHeader] = None
+        # Timestamp range of stored entries whose keys have not been loaded yet ("" once loaded)
+        self.first = self.last = ""
+
+
+class HistoryStore:
+    """
+    History split into a hot JSON file and compressed, time-partitioned archive segments.
+
+    Thread-safe within a process; the Streamlit app shares one instance across
+    sessions. Across processes, every write and segment read holds an advisory
+    lock on ``lock_path``, and the analytics counters are reloaded first when
+    another process has saved them.
+    """
+
+    def __init__(
+        self,
+        hot_path: str,
+        archive_dir: Optional[str] = None,
+        hot_limit: int = 50,
+        codec: str = "gzip",
+        partition: str = "month",
+        rollover_batch: int = ROLLOVER_BATCH,
+        analytics: Optional[HistoryAnalytics] = None,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            hot_path: JSON file holding the most recent entries
+            archive_dir: Directory for archive segments (default: "history_archive" next to hot_path)
+            hot_limit: Entries kept in the hot file after a rollover
+            codec: Compression for new segments, "gzip" or "xz"
+            partition: Segment granularity, "month" or "day"
+            rollover_batch: Extra entries the hot file may hold before rolling over, so
+                segments are appended in batches rather than on every write
+            analytics: Counters to update and persist on every append
+        """
+        if codec not in _CODECS:
+            raise ValueError(f"Unsupported archive codec: {codec}")
+        if partition not in _PARTITION_WIDTH:
+            raise ValueError(f"Unsupported archive partition: {partition}")
+        self.hot_path = hot_path
+        self.archive_dir = archive_dir or os.path.join(
+            os.path.dirname(os.path.abspath(hot_path)), "history_archive"
+        )
+        self.hot_limit = hot_limit
+        self.codec = codec
+        self.partition = partition
+        self.rollover_batch = max(0, rollover_batch)
+        self.analytics = analytics
+        self.lock_path = hot_path + ".lock"
+        self._lock = threading.RLock()
+        self._lock_handle = None
+        self._lock_depth = 0
+        self._segment_cache: "OrderedDict[tuple, HistoryBatch]" = OrderedDict()
+
+    def partition_key(self, timestamp: str) -> str:
+        """Name of the partition an entry with ``timestamp`` is archived in."""
+        if not timestamp:
+            return UNDATED_PARTITION
+        return timestamp[: _PARTITION_WIDTH[self.partition]]
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the in-process lock and the cross-process file lock (re-entrant)."""
+        with self._lock:
+            if self._lock_depth == 0:
+                if self._lock_handle is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+                    self._lock_handle = open(self.lock_path, "a+b")
+                _lock_file(self._lock_handle)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_handle)
+
+    def refresh_analytics(self) -> bool:
+        """
+        Pick up analytics counters saved by other processes, e.g. a ``transfer.py import`` run.
+
+        Returns:
+            Whether the counters were reloaded
+        """
+        if self.analytics is None:
+            return False
+        with self._locked():
+            return self.analytics.reload_if_changed()
+
+    def load_recent(self) -> List[HistoryEntry]:
+        """Return the hot entries, oldest first."""
+        with self._lock:
+            return load_history(self.hot_path)
+
+    def append(self, entries: Sequence[HistoryEntry]) -> None:
+        """Add entries to the hot file, rolling the oldest into the archive when it is full."""
+        if not entries:
+            return
+        with self._locked():
+            hot = load_history(self.hot_path)
+            hot.extend(entries)
+            self._save_hot(hot)
+            if self.analytics is not None:
+                self.analytics.reload_if_changed()
+                self.analytics.record(entries)
+                self.analytics.save()
+
+    def _save_hot(self, hot: List[HistoryEntry]) -> None:
+        """Write the hot entries, rolling the oldest into the archive when there are too many."""
+        if len(hot) > self.hot_limit + self.rollover_batch:
+            overflow = len(hot) - self.hot_limit
+            self._archive(hot[:overflow])
+            hot = hot[overflow:]
+        save_history(hot, self.hot_path, max_items=len(hot))
+
+    def _archive(self, entries: Sequence[HistoryEntry]) -> None:
+        partitions: Dict[str, List[Dict]] = {}
+        for entry in entries:
+            partitions.setdefault(self.partition_key(entry.timestamp), []).append(entry.to_dict())
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for key, records in partitions.items():
+            append_segment(self._segment_path(key), records, codec=self.codec)
+            logger.info(f"Archived {len(records)} history entries into segment {key}")
+
+    def _segment_path(self, partition: str) -> str:
+        return os.path.join(self.archive_dir, partition + SEGMENT_SUFFIX)
+
+    def segments(self) -> List[SegmentHeader]:
+        """Headers of all archive segments, oldest first; undated (legacy) entries count as oldest."""
+        try:
+            names = os.listdir(self.archive_dir)
+        except FileNotFoundError:
+            return []
+        headers = []
+        with self._locked():
+            for name in sorted(names):
+                if not name.endswith(SEGMENT_SUFFIX):
+                    continue
+                try:
+                    headers.append(read_segment_header(os.path.join(self.archive_dir, name)))
+                except (OSError, ValueError) as e:
+                    logger.error(f"Skipping unreadable history segment {name}: {e}")
+        undated = [header for header in headers if header.partition == UNDATED_PARTITION]
+        return undated + [header for header in headers if header.partition != UNDATED_PARTITION]
+
+    def _load_segment(self, header: SegmentHeader) -> HistoryBatch:
+        with self._locked():
+            stat = os.stat(header.path)
+            key = (header.path, stat.st_mtime_ns, stat.st_size)
+            batch = self._segment_cache.get(key)
+            if batch is not None:
+                self._segment_cache.move_to_end(key)
+                return batch
+            # Read under the file lock: another process may be appending to this segment
+            batch = read_segment(header.path)
+            self._segment_cache[key] = batch
+            while len(self._segment_cache) > SEGMENT_CACHE_SIZE:
+                self._segment_cache.popitem(last=False)
+        return batch
+
+    def search(
+        self,
+        query: str = "",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        types: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[HistoryEntry]:
+        """
+        Find entries matching every given filter, newest first.
+
+        The hot file is searched first; archive segments are opened newest
+        first, only if ``limit`` has not been reached, and only when their
+        header says they can contain matches.
+
+        Args:
+            query: Case-insensitive substring of input or translation
+            since: Inclusive lower bound on the ISO timestamp
+            until: Exclusive upper bound on the ISO timestamp
+            types: Allowed entry types
+            limit: Maximum number of entries to return
+
+        Returns:
+            Matching entries, newest first
+        """
+        types = list(types) if types is not None else None
+        hot = HistoryBatch.from_entries(self.load_recent())
+        results = [hot.entry(i) for i in reversed(hot.matching(query, types, since, until))]
+        for header in reversed(self.segments()):
+            if limit is not None and len(results) >= limit:
+                break
+            if not header.overlaps(since, until) or not header.has_types(types):
+                continue
+            batch = self._load_segment(header)
+            results.extend(batch.entry(i) for i in reversed(batch.matching(query, types, since, until)))
+        return results[:limit] if limit is not None else results
+
+    def import_records(self, records: Iterable[Dict], batch_size: int = 10_000) -> Tuple[int, int]:
+        """
+        Bulk-load records, skipping ones already stored.
+
+        Records must be complete entries in the current schema (see
+        ``history.upgrade_entry``). The newest ``hot_limit`` of them are merged
+        into the hot file at the end, so an import shows up in the app's recent
+        history; the rest are buffered and appended in batches of ``batch_size``,
+        one compressed member per touched partition. The file lock is taken
+        per batch, so a running app keeps writing while a long import proceeds.
+
+        A record is a duplicate when an entry with the same timestamp and input
+        is already stored or was imported earlier in the same call. Keys are
+        kept (hashed) for the ``IMPORT_OPEN_PARTITIONS`` most recently touched
+        partitions only, and a stored segment is scanned only once a record falls
+        within its timestamp range, so memory does not grow with the history.
+
+        Returns:
+            (imported, duplicates)
+        """
+        return self.import_encoded(((record, None) for record in records), batch_size)
+
+    def import_encoded(
+        self, items: Iterable[Tuple[Dict, Optional[str]]], batch_size: int = 10_000
+    ) -> Tuple[int, int]:
+        """
+        Like ``import_records``, for records paired with their JSON text.
+
+        The text (one line, without the line break) goes into the segment as
+        is, saving a second encoding; records paired with None are encoded here.
+        """
+        imported = duplicates = 0
+        # Keys of entries outside the archive: the hot file and the newest imports
+        unarchived = {hash((entry.timestamp, entry.input)) for entry in self.load_recent()}
+        partitions: "OrderedDict[str, _ImportPartition]" = OrderedDict()
+        # partition -> (records, lines) waiting for the next batch
+        pending: Dict[str, Tuple[List[Dict], List[Optional[str]]]] = {}
+        pending_count = 0
+        # Min-heap of (timestamp, arrival, key, partition, record, line): the newest imports, kept for the hot file
+        newest: List[Tuple[str, int, int, str, Dict, Optional[str]]] = []
+        width = _PARTITION_WIDTH[self.partition]
+        name, partition = None, None
+        for arrival, (record, line) in enumerate(items):
+            timestamp = record["timestamp"]
+            key = hash((timestamp, record["input"]))
+            if timestamp[:width] != name:
+                name = self.partition_key(timestamp)
+                partition = partitions.get(name)
+                if partition is None:
+                    if name in pending:
+                        # Revisiting a partition whose keys were dropped: store its buffer so the rescan sees it
+                        group = pending.pop(name)
+                        pending_count -= len(group[0])
+                        imported += self._import_batch({name: group})
+                    partition = partitions[name] = self._open_partition(name)
+                    if len(partitions) > IMPORT_OPEN_PARTITIONS:
+                        partitions.popitem(last=False)
+                else:
+                    partitions.move_to_end(name)
+            if partition.first <= timestamp <= partition.last:
+                partition.keys.update(
+                    hash((old.get("timestamp", ""), old.get("input", "")))
+                    for old in self.iter_segment(partition.header)
+                )
+                partition.first = partition.last = ""
+            if key in partition.keys or key in unarchived:
+                duplicates += 1
+                continue
+            partition.keys.add(key)
+            item = (timestamp, arrival, key, name, record, line)
+            unarchived.add(key)
+            if len(newest) < self.hot_limit:
+                heapq.heappush(newest, item)
+                continue
+            if item > newest[0]:
+                item = heapq.heapreplace(newest, item)
+            unarchived.discard(item[2])
+            group = pending.get(item[3])
+            if group is None:
+                group = pending[item[3]] = ([], [])
+            group[0].append(item[4])
+            group[1].append(item[5])
+            pending_count += 1
+            if pending_count >= batch_size:
+                imported += self._import_batch(pending)
+                pending = {}
+                pending_count = 0
+        imported += self._import_batch(pending)
+        imported += self._import_recent([item[4] for item in sorted(newest)])
+        return imported, duplicates
+
+    def _open_partition(self, name: str) -> "_ImportPartition":
+        partition = _ImportPartition()
+        path = self._segment_path(name)
+        if os.path.exists(path):
+            with self._locked():
+                partition.header = read_segment_header(path)
+            partition.first, partition.last = partition.header.first, partition.header.last
+        return partition
+
+    def _import_recent(self, records: List[Dict]) -> int:
+        if not records:
+            return 0
+        with self._locked():
+            hot = load_history(self.hot_path) + [HistoryEntry.from_dict(record) for record in records]
+            hot.sort(key=lambda entry: entry.timestamp)
+            self._save_hot(hot)
+            if self.analytics is not None:
+                self.analytics.reload_if_changed()
+                self.analytics.record_dicts(records)
+                self.analytics.save()
+        return len(records)
+
+    def _import_batch(self, partitions: Dict[str, Tuple[List[Dict], List[Optional[str]]]]) -> int:
+        count = sum(len(records) for records, _ in partitions.values())
+        if not count:
+            return 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with self._locked():
+            for key, (records, lines) in partitions.items():
+                path = self._segment_path(key)
+                # Existing segments keep their codec; pick the import level for that one
+                codec = read_segment_header(path).codec if os.path.exists(path) else self.codec
+                append_segment(path, records, codec=codec, level=IMPORT_LEVELS[codec], lines=lines)
+            if self.analytics is not None:
+                self.analytics.reload_if_changed()
+                for records, _ in partitions.values():
+                    self.analytics.record_dicts(records)
+                self.analytics.save()
+        logger.info(f"Imported {count} history entries into {len(partitions)} segments")
+        return count
+
+    def iter_segment(self, header: SegmentHeader) -> Iterator[Dict]:
+        """
+        Stream a segment's records, decompressing incrementally.
+
+        The compressed payload is read under the file lock, so a concurrent
+        append is either fully included or not at all.
+        """
+        with self._locked():
+            with open(header.path, "rb") as f:
+                f.seek(SEGMENT_HEADER_SIZE)
+                payload = f.read()
+        yield from _iter_payload(io.BytesIO(payload), header.codec)
+
+    def iter_entries(self) -> Iterator[HistoryEntry]:
+        """Yield every entry, archive segments first, then the hot file."""
+        for header in self.segments():
+            with self._locked():
+                batch = read_segment(header.path)
+            yield from batch
+        yield from self.load_recent()
+
+    def count(self) -> int:
+        """Total number of entries, from segment headers and the hot file."""
+        return sum(header.count for header in self.segments()) + len(self.load_recent())
+
+    def clear(self) -> None:
+        """Delete all history, hot and archived."""
+        with self._locked():
+            for header in self.segments():
+                os.remove(header.path)
+            self._segment_cache.clear()
+            save_history([], self.hot_path, max_items=0)
+            if self.analytics is not None:
+                self.analytics.reset()
+                self.analytics.save()
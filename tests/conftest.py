@@ -0,0 +1,28 @@
+"""
+Fixtures shared by the test modules.
+"""
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from store import HistoryStore
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """Factory for a history store on ``storage.json`` in the test's temporary directory."""
+
+    def make(**options):
+        return HistoryStore(str(tmp_path / "storage.json"), **options)
+
+    return make
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store()
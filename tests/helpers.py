@@ -0,0 +1,23 @@
+"""
+Test doubles and factories shared by the test modules.
+"""
+
+from history import make_entry
+
+
+class FakeClock:
+    """Clock that only moves when a test advances ``now`` (or calls ``sleep``)."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def entry_at(timestamp=None, text="hello", entry_type="text_to_emoji", translation="👋", codes=("U+1F44B",)):
+    """A history entry; ``timestamp`` defaults to now."""
+    return make_entry(text, translation, list(codes), entry_type, timestamp=timestamp)
@@ -0,0 +1,204 @@
+"""
+Tests for the incremental history analytics.
+"""
+
+import json
+import threading
+import pytest
+from datetime import date
+from analytics import HistoryAnalytics, sidecar_path, sparkline
+from store import HistoryStore
+from tests.helpers import entry_at
+
+
+class TestHistoryAnalytics:
+    """Test cases for HistoryAnalytics."""
+
+    def test_record_updates_counters(self):
+        """Test that every counter reflects the recorded entries."""
+        analytics = HistoryAnalytics()
+        analytics.record(
+            [
+                entry_at("2024-03-05T14:07:00", "happy", translation="😄✨"),
+                entry_at("2024-03-05T14:30:00", "glad", translation="😄✨"),
+                entry_at("2024-03-06T09:00:00", "🎉", "emoji_to_text", translation="party"),
+            ]
+        )
+
+        assert analytics.total == 3
+        assert analytics.sequence_count("😄✨") == 2
+        assert analytics.sequence_count("🎉") == 1
+        assert analytics.type_count("text_to_emoji") == 2
+        assert analytics.day_count("2024-03-05") == 2
+        assert analytics.hour_count("2024-03-05T14") == 2
+        assert analytics.top_sequences(1) == [("😄✨", 2)]
+        assert analytics.type_mix() == pytest.approx({"text_to_emoji": 2 / 3, "emoji_to_text": 1 / 3})
+
+    def test_record_dicts_matches_record(self):
+        """Test that recording JSON records counts the same as recording entries."""
+        entries = [
+            entry_at("2024-03-05T14:07:00", "happy", translation="😄✨"),
+            entry_at("2024-03-06T09:00:00", "🎉", "emoji_to_text", translation="party"),
+        ]
+        from_entries, from_dicts = HistoryAnalytics(), HistoryAnalytics()
+
+        from_entries.record(entries)
+        from_dicts.record_dicts(entry.to_dict() for entry in entries)
+
+        for counter in ("types", "sequences", "daily", "hourly"):
+            assert getattr(from_dicts, counter) == getattr(from_entries, counter)
+        assert from_dicts.total == from_entries.total == 2
+
+    def test_readers_safe_during_concurrent_record(self):
+        """Test that reading the counters while another thread records never sees them change mid-iteration."""
+        analytics = HistoryAnalytics()
+        done = threading.Event()
+
+        def writer():
+            for i in range(2000):
+                timestamp = f"2024-03-{1 + i % 28:02d}T{i % 24:02d}:00:00"
+                analytics.record([entry_at(timestamp, f"t{i}", translation=f"😀{i}")])
+            done.set()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        while not done.is_set():
+            analytics.type_mix()
+            analytics.top_sequences(5)
+            analytics.daily_series(14)
+        thread.join()
+
+        assert analytics.total == 2000
+
+    def test_daily_series_zero_fills(self):
+        """Test that the daily series covers every day in the window."""
+        analytics = HistoryAnalytics()
+        analytics.record([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+
+        series = analytics.daily_series(3, today=date(2024, 3, 6))
+
+        assert series == [("2024-03-04", 0), ("2024-03-05", 1), ("2024-03-06", 0)]
+
+    def test_old_hourly_buckets_pruned(self):
+        """Test that hourly buckets outside the retention window are dropped."""
+        analytics = HistoryAnalytics()
+        analytics.record([entry_at("2024-01-01T10:00:00", "hi", translation="👋")])
+        analytics.record([entry_at("2024-03-01T10:00:00", "hi", translation="👋")])
+
+        assert analytics.hour_count("2024-01-01T10") == 0
+        assert analytics.day_count("2024-01-01") == 1
+
+    def test_save_and_load(self, tmp_path):
+        """Test that counters survive a round trip through the sidecar."""
+        path = str(tmp_path / "storage.analytics.json")
+        analytics = HistoryAnalytics(path)
+        analytics.record([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+        analytics.save()
+
+        loaded = HistoryAnalytics.load(path)
+
+        assert loaded.exists()
+        assert loaded.total == 1
+        assert loaded.sequence_count("👋") == 1
+        assert loaded.hour_count("2024-03-05T10") == 1
+
+    def test_reload_if_changed(self, tmp_path):
+        """Test that counters saved by another instance are picked up, and only when the file changed."""
+        path = str(tmp_path / "storage.analytics.json")
+        app = HistoryAnalytics.load(path)
+        app.record([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+        app.save()
+        assert not app.reload_if_changed()
+
+        other = HistoryAnalytics.load(path)
+        other.record([entry_at("2024-03-06T10:00:00", "bye", translation="👋")])
+        other.save()
+
+        assert app.reload_if_changed()
+        assert app.total == 2
+        assert app.sequence_count("👋") == 2
+
+    def test_failed_reload_is_retried(self, tmp_path):
+        """Test that a sidecar that could not be read is not marked as seen, so the next reload tries again."""
+        path = tmp_path / "storage.analytics.json"
+        app = HistoryAnalytics(str(path))
+        app.record([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+        app.save()
+        path.write_text("{oops", encoding="utf-8")
+
+        assert app.reload_if_changed()
+        assert app.total == 1
+        assert app.reload_if_changed()
+
+    def test_store_refreshes_analytics_under_file_lock(self, tmp_path):
+        """Test that refreshing from the store reloads the counters while holding its file lock."""
+        history_path = str(tmp_path / "storage.json")
+        store = HistoryStore(history_path, analytics=HistoryAnalytics(sidecar_path(history_path)))
+        other = HistoryAnalytics.load(sidecar_path(history_path))
+        other.record([entry_at("2024-03-06T10:00:00", "bye", translation="👋")])
+        other.save()
+        locked = []
+        reload = store.analytics.reload_if_changed
+
+        def reload_if_changed():
+            locked.append(store._lock_depth)
+            return reload()
+
+        store.analytics.reload_if_changed = reload_if_changed
+
+        assert store.refresh_analytics()
+        assert locked == [1]
+        assert store.analytics.total == 1
+        assert not HistoryStore(str(tmp_path / "other.json")).refresh_analytics()
+
+    def test_load_missing_or_invalid(self, tmp_path):
+        """Test that a missing, corrupt or outdated sidecar starts empty."""
+        path = tmp_path / "storage.analytics.json"
+        assert HistoryAnalytics.load(str(path)).total == 0
+
+        path.write_text("{oops", encoding="utf-8")
+        assert HistoryAnalytics.load(str(path)).total == 0
+
+        path.write_text(json.dumps({"v": 0, "total": 3}), encoding="utf-8")
+        assert HistoryAnalytics.load(str(path)).total == 0
+
+    def test_sparkline(self):
+        """Test that values are scaled to the largest one, and all-zero series stay flat."""
+        assert sparkline([0, 2, 5]) == "▁▄█"
+        assert sparkline([0, 0]) == "▁▁"
+        assert sparkline([]) == ""
+
+    def test_sidecar_path(self):
+        """Test the sidecar naming scheme."""
+        assert sidecar_path("data/storage.json") == "data/storage.analytics.json"
+
+    def test_store_updates_analytics_on_append(self, tmp_path):
+        """Test that the history store keeps the sidecar current."""
+        history_path = str(tmp_path / "storage.json")
+        analytics = HistoryAnalytics(sidecar_path(history_path))
+        store = HistoryStore(history_path, hot_limit=1, rollover_batch=0, analytics=analytics)
+
+        store.append([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+        store.append([entry_at("2024-03-06T10:00:00", "🎉", "emoji_to_text", translation="party")])
+
+        persisted = HistoryAnalytics.load(sidecar_path(history_path))
+        assert persisted.total == 2
+        assert persisted.type_count("emoji_to_text") == 1
+
+        store.clear()
+        assert HistoryAnalytics.load(sidecar_path(history_path)).total == 0
+
+    def test_rebuild_from_store(self, tmp_path):
+        """Test that counters can be backfilled from existing history."""
+        store = HistoryStore(str(tmp_path / "storage.json"), hot_limit=1, rollover_batch=0)
+        store.append([entry_at("2024-03-05T10:00:00", "hi", translation="👋")])
+        store.append([entry_at("2024-03-06T10:00:00", "yo", translation="👋")])
+
+        analytics = HistoryAnalytics()
+        analytics.rebuild(store.iter_entries())
+
+        assert analytics.sequence_count("👋") == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
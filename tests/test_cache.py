@@ -0,0 +1,101 @@
+"""
+Tests for the shared caches and request budgets.
+"""
+
+import pytest
+from cache import TTLCache, TranslationCache, translation_key
+from ratelimit import RateBudget
+from tests.helpers import FakeClock
+
+
+class TestTTLCache:
+    """Test cases for TTLCache."""
+
+    def test_expiry(self):
+        """Test that entries disappear after their TTL."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+
+        clock.now = 11
+        assert cache.get("a") is None
+        assert "b" in cache
+        assert cache.pop("b") == 2
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+class TestTranslationCache:
+    """Test cases for the persistent TranslationCache."""
+
+    def test_key_normalization(self):
+        """Test that case and spacing don't matter, but the style does."""
+        assert translation_key("  I'm  Happy ") == translation_key("i'm happy")
+        assert translation_key("hi", "Minimal") != translation_key("hi")
+
+    def test_save_and_load(self, tmp_path):
+        """Test that live entries survive a save/load round trip and expired ones don't."""
+        clock = FakeClock()
+        clock.now = 1000.0
+        path = str(tmp_path / "translation_cache.json")
+        cache = TranslationCache(path, ttl=60, clock=clock)
+        cache.store("I'm happy", "Standard", ["😄✨", "🥳"])
+        cache.set(translation_key("old news"), ["📰"], ttl=5)
+        cache.save()
+
+        clock.now += 10
+        loaded = TranslationCache.load(path, clock=clock)
+
+        assert loaded.lookup("i'm HAPPY") == ["😄✨", "🥳"]
+        assert loaded.lookup("old news") is None
+        assert loaded.lookup("I'm happy", "Minimal") is None
+
+    def test_load_missing_or_invalid(self, tmp_path):
+        """Test that a missing or corrupt file gives an empty cache."""
+        bad = tmp_path / "bad.json"
+        bad.write_text("{not json", encoding="utf-8")
+
+        assert len(TranslationCache.load(str(tmp_path / "missing.json"))) == 0
+        assert len(TranslationCache.load(str(bad))) == 0
+
+
+class TestRateBudget:
+    """Test cases for RateBudget."""
+
+    def test_try_acquire_sliding_window(self):
+        """Test that slots free up as the window slides."""
+        clock = FakeClock()
+        budget = RateBudget(2, window=60, clock=clock)
+
+        assert budget.try_acquire() and budget.try_acquire()
+        assert not budget.try_acquire()
+        assert budget.remaining() == 0
+
+        clock.now = 60
+        assert budget.remaining() == 2
+        assert budget.try_acquire()
+
+    def test_acquire_waits_for_slot(self):
+        """Test that acquire sleeps until the oldest call leaves the window."""
+        clock = FakeClock()
+        budget = RateBudget(1, window=10, clock=clock, sleep=clock.sleep)
+
+        budget.acquire()
+        budget.acquire()
+
+        assert clock.now == pytest.approx(10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
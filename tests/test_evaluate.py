@@ -0,0 +1,149 @@
+"""
+Tests for the round-trip evaluation pipeline.
+"""
+
+import io
+import json
+import os
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from cache import TranslationCache
+from evaluate import (
+    Aggregate, EvalConfig, format_report, ngram_cosine, parse_config, read_corpus, run_evaluation, token_overlap,
+)
+from translator import record_usage
+
+
+def fake_translator(reply="I am happy"):
+    fake = Mock()
+
+    def translate(text, style):
+        record_usage(SimpleNamespace(prompt_tokens=50, completion_tokens=3))
+        return "😄"
+
+    def translate_reverse(emojis):
+        record_usage(SimpleNamespace(prompt_tokens=40, completion_tokens=5))
+        return reply
+
+    fake.translate.side_effect = translate
+    fake.translate_reverse.side_effect = translate_reverse
+    return fake
+
+
+class TestScores:
+    """Test cases for the similarity metrics."""
+
+    def test_token_overlap(self):
+        """Test Jaccard overlap of word sets, ignoring case and punctuation."""
+        assert token_overlap("I am happy!", "i AM happy") == 1.0
+        assert token_overlap("I am happy", "I am sad") == pytest.approx(2 / 4)
+        assert token_overlap("", "") == 1.0
+
+    def test_ngram_cosine(self):
+        """Test trigram cosine similarity bounds and ordering."""
+        assert ngram_cosine("Feeling great", "feeling   GREAT") == pytest.approx(1.0)
+        assert ngram_cosine("abc", "xyz") == 0.0
+        assert ngram_cosine("I love coffee", "I love tea") > ngram_cosine("I love coffee", "Going running")
+
+
+class TestPipeline:
+    """Test cases for running an evaluation."""
+
+    def test_read_corpus(self, tmp_path):
+        """Test that text and JSONL corpora are streamed without blank lines."""
+        text = tmp_path / "corpus.txt"
+        text.write_text("I'm happy\n\n  Tired  \n", encoding="utf-8")
+        jsonl = tmp_path / "corpus.jsonl"
+        jsonl.write_text('{"text": "Hello"}\n{"text": ""}\n', encoding="utf-8")
+
+        assert list(read_corpus(str(text))) == ["I'm happy", "Tired"]
+        assert list(read_corpus(str(jsonl))) == ["Hello"]
+
+    def test_records_and_aggregates(self, executor):
+        """Test per-item records for two configurations and their side-by-side summary."""
+        cache = TranslationCache()
+        cache.store("I am happy", "Standard", ["🥳"])
+        configs = [
+            EvalConfig("a", fake_translator()),
+            EvalConfig("b", fake_translator("Something else"), cache=cache),
+        ]
+        out = io.StringIO()
+
+        aggregates = run_evaluation(["I am happy", "Rainy day"], configs, executor, max_in_flight=2, out=out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert len(records) == 4
+        first_a = next(r for r in records if r["config"] == "a" and r["index"] == 0)
+        assert first_a["token_overlap"] == 1.0
+        assert (first_a["prompt_tokens"], first_a["completion_tokens"]) == (90, 8)
+        cached = next(r for r in records if r["config"] == "b" and r["index"] == 0)
+        assert cached["cache_hit"] and cached["emojis"] == "🥳"
+        assert cached["prompt_tokens"] == 40
+
+        assert aggregates["a"].count == 2 and aggregates["b"].cache_hits == 1
+        report = format_report(aggregates)
+        assert "delta" in report and "token overlap" in report
+
+    def test_bounded_in_flight(self):
+        """Test that no more than max_in_flight items run at once, even for a long corpus."""
+        active, peak, lock = [0], [0], threading.Lock()
+        translator = fake_translator()
+
+        def translate(text, style):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            try:
+                return "😄"
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        translator.translate.side_effect = translate
+
+        def corpus():
+            for i in range(200):
+                yield f"text {i}"
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            aggregates = run_evaluation(corpus(), [EvalConfig("a", translator)], pool, max_in_flight=3)
+
+        assert aggregates["a"].count == 200
+        assert peak[0] <= 3
+
+    def test_failures_are_counted(self, executor):
+        """Test that failed translations are recorded as errors without an interpretation."""
+        translator = fake_translator()
+        translator.translate.side_effect = lambda text, style: "❌🤖"
+
+        aggregates = run_evaluation(["hi"], [EvalConfig("a", translator)], executor)
+
+        assert aggregates["a"].errors == 1
+        translator.translate_reverse.assert_not_called()
+
+    def test_latency_sample_is_bounded(self):
+        """Test that the latency reservoir never grows past its size."""
+        aggregate = Aggregate(sample_size=10)
+        for i in range(1000):
+            aggregate.add({"error": None, "cache_hit": False, "token_overlap": 1.0, "ngram_cosine": 1.0,
+                           "latency": i / 1000, "prompt_tokens": 1, "completion_tokens": 1})
+
+        assert aggregate.count == 1000 and len(aggregate.latencies) == 10
+        assert aggregate.mean("latency") == pytest.approx(0.4995)
+
+    def test_parse_config(self):
+        """Test building a configuration from its command-line spec."""
+        with patch.dict(os.environ, {}, clear=True):
+            config = parse_config("offline:backends=local;style=Minimal")
+
+        assert config.name == "offline" and config.style == "Minimal"
+        assert config.translator.router.backends[0].name == "local"
+        with pytest.raises(ValueError):
+            parse_config("bad:temperature=2")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,206 @@
+"""
+Tests for the history persistence helpers.
+"""
+
+import json
+import pytest
+from array import array
+from unittest.mock import patch
+from history import (
+    HISTORY_SCHEMA_VERSION,
+    HistoryBatch,
+    HistoryEntry,
+    load_history,
+    make_entry,
+    save_history,
+    search_history,
+    upgrade_entry,
+)
+
+
+class TestHistory:
+    """Test cases for history entries and storage."""
+
+    def test_make_entry_precomputes_fields(self):
+        """Test that derived display and search fields are stored with the entry."""
+        entry = make_entry(
+            "I'm Feeling GREAT about this long sentence today",
+            "😄🌟",
+            ["U+1F604", "U+1F31F"],
+            "text_to_emoji",
+            timestamp="2024-03-05T14:07:00",
+        )
+
+        assert entry.version == HISTORY_SCHEMA_VERSION
+        assert entry.display_time == "03/05 14:07"
+        assert entry.label == "😊 I'm Feeling GREAT about this l... 03/05 14:07"
+        assert entry.search_key == "i'm feeling great about this long sentence today\n😄🌟"
+        assert entry.codes_preview == "U+1F604, U+1F31F"
+        assert entry.codepoints == array("I", [0x1F604, 0x1F31F])
+
+    def test_codes_preview_truncated(self):
+        """Test that only the first five codes are previewed."""
+        codes = [f"U+1F60{i}" for i in range(7)]
+        entry = make_entry("🙂", "smile", codes, "emoji_to_text", timestamp="2024-03-05T14:07:00")
+
+        assert entry.codes_preview == ", ".join(codes[:5]) + "..."
+        assert entry.label.startswith("📖 🙂")
+
+    def test_upgrade_legacy_entry(self):
+        """Test that entries without derived fields are upgraded."""
+        legacy = {
+            "input": "✨😢",
+            "translation": "Feeling sad but hopeful.",
+            "type": "reverse",
+            "emoji_codes": ["U+2728", "U+1F622"],
+        }
+
+        entry = upgrade_entry(legacy)
+
+        assert entry["v"] == HISTORY_SCHEMA_VERSION
+        assert entry["display_time"] == ""
+        assert entry["label"] == "😊 ✨😢 "
+        assert "hopeful" in entry["search_key"]
+
+    def test_upgrade_current_entry_is_noop(self):
+        """Test that current entries are returned untouched."""
+        entry = make_entry("hi", "👋", ["U+1F44B"], "text_to_emoji").to_dict()
+        entry["label"] = "custom"
+
+        assert upgrade_entry(entry)["label"] == "custom"
+
+    def test_search_history(self):
+        """Test case-insensitive search over input and translation."""
+        history = [
+            make_entry("Happy Days", "😄", ["U+1F604"], "text_to_emoji"),
+            make_entry("🎉", "A Party", ["U+1F389"], "emoji_to_text"),
+        ]
+
+        assert search_history(history, "happy") == [history[0]]
+        assert search_history(history, "PARTY") == [history[1]]
+        assert search_history(history, "") == history
+        assert search_history(history, "days\na") == []
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """Test that saving keeps only the newest items and loading upgrades them."""
+        path = str(tmp_path / "storage.json")
+        history = [make_entry(f"item {i}", "😊", ["U+1F60A"], "text_to_emoji") for i in range(5)]
+
+        save_history(history, path, max_items=3)
+        loaded = load_history(path)
+
+        assert [entry.input for entry in loaded] == ["item 2", "item 3", "item 4"]
+        assert loaded == history[2:]
+
+    def test_save_is_atomic(self, tmp_path):
+        """Test that a save that fails midway leaves the previous file intact and no temporary file behind."""
+        path = str(tmp_path / "storage.json")
+        save_history([make_entry("kept", "😊", [], "text_to_emoji")], path, max_items=3)
+
+        with patch("history.json.dump", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                save_history([make_entry("lost", "😢", [], "text_to_emoji")], path, max_items=3)
+
+        assert [entry.input for entry in load_history(path)] == ["kept"]
+        assert [p.name for p in tmp_path.iterdir()] == ["storage.json"]
+
+    def test_load_missing_or_invalid_file(self, tmp_path):
+        """Test that missing or corrupt history files load as empty."""
+        path = tmp_path / "storage.json"
+        assert load_history(str(path)) == []
+
+        path.write_text("{not json", encoding="utf-8")
+        assert load_history(str(path)) == []
+
+    def test_load_upgrades_legacy_file(self, tmp_path):
+        """Test that a history file written by older versions still loads."""
+        path = tmp_path / "storage.json"
+        path.write_text(json.dumps([{"input": "hi", "translation": "👋", "type": "text_to_emoji"}]))
+
+        loaded = load_history(str(path))
+
+        assert loaded[0].version == HISTORY_SCHEMA_VERSION
+        assert loaded[0].codes_preview == ""
+
+
+class TestCompactHistory:
+    """Test cases for HistoryEntry and HistoryBatch."""
+
+    def test_entry_round_trip(self):
+        """Test that a current-schema entry converts back to the identical object."""
+        record = make_entry("I'm happy", "😄✨", ["U+1F604", "U+2728"], "text_to_emoji").to_dict()
+
+        restored = HistoryEntry.from_dict(record).to_dict()
+
+        assert restored == record
+        assert json.dumps(restored) == json.dumps(record)
+
+    def test_entry_round_trip_preserves_unusual_records(self):
+        """Test that key order, unknown keys and odd values survive conversion."""
+        record = {
+            "type": "reverse",
+            "input": "✨😢",
+            "emoji_codes": ["U+2728", "u+1f622"],
+            "translation": None,
+            "rating": 5,
+            "v": True,
+        }
+
+        entry = HistoryEntry.from_dict(record)
+
+        assert entry.codepoints is None
+        assert entry.emoji_codes == ["U+2728", "u+1f622"]
+        assert json.dumps(entry.to_dict()) == json.dumps(record)
+
+    def test_entry_slots(self):
+        """Test that entries do not carry a per-instance __dict__."""
+        entry = make_entry("hi", "👋", ["U+1F44B"], "text_to_emoji")
+
+        assert not hasattr(entry, "__dict__")
+        assert entry.emoji_codes == ["U+1F44B"]
+
+    def test_entry_interns_type_only(self):
+        """Test that repeated entry types share one object, but other strings are not interned."""
+        record = {"input": "a fairly unique sentence", "type": "text_to_emoji", "display_time": "Mar 05, 14:07"}
+        first = HistoryEntry.from_dict(json.loads(json.dumps(record)))
+        second = HistoryEntry.from_dict(json.loads(json.dumps(record)))
+
+        assert first.type is second.type
+        assert first.display_time is not second.display_time
+        assert first.input is not second.input
+
+    def test_batch_round_trip(self):
+        """Test that a batch reproduces every record in order."""
+        records = [
+            make_entry("one", "1️⃣", ["U+0031", "U+FE0F", "U+20E3"], "text_to_emoji").to_dict(),
+            {"input": "legacy", "translation": "old", "emoji_codes": ["bad"]},
+            make_entry("🎉", "party", [], "emoji_to_text").to_dict(),
+        ]
+
+        batch = HistoryBatch.from_dicts(records)
+
+        assert len(batch) == 3
+        assert list(batch.to_dicts()) == records
+        assert list(batch.code_offsets) == [0, 3, 3, 3]
+
+    def test_batch_matching_and_select(self):
+        """Test filtering a batch by query, type and time range."""
+        batch = HistoryBatch.from_entries(
+            [
+                make_entry("Happy", "😄", ["U+1F604"], "text_to_emoji", timestamp="2024-01-01T10:00:00"),
+                make_entry("🎉", "Party", ["U+1F389"], "emoji_to_text", timestamp="2024-01-02T10:00:00"),
+                make_entry("happy again", "😄", ["U+1F604"], "text_to_emoji", timestamp="2024-01-03T10:00:00"),
+            ]
+        )
+
+        assert batch.matching(query="HAPPY") == [0, 2]
+        assert batch.matching(types=["emoji_to_text"]) == [1]
+        assert batch.matching(since="2024-01-02", until="2024-01-03") == [1]
+
+        selected = batch.select([2, 0])
+        assert [entry.input for entry in selected] == ["happy again", "Happy"]
+        assert selected.entry(1).codepoints == array("I", [0x1F604])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,110 @@
+"""
+Tests for background translation jobs.
+"""
+
+import threading
+import pytest
+from concurrent.futures import Future
+from unittest.mock import Mock
+from jobs import EMOJI_TO_TEXT, ROUND_TRIP, TEXT_TO_EMOJI, chain, pop_finished, submit_job
+
+
+@pytest.fixture
+def translator():
+    fake = Mock()
+    fake.translate.side_effect = lambda text, style: "😄✨"
+    fake.translate_reverse.side_effect = lambda emojis: f"happy ({emojis})"
+    fake.translate_candidates.side_effect = lambda text, n, style: ["😄✨", "🥳"][:n]
+    fake.translate_reverse_candidates.side_effect = lambda emojis, n: [f"happy ({emojis})"]
+    return fake
+
+
+class TestJobs:
+    """Test cases for translation jobs."""
+
+    def test_submit_forward_and_reverse(self, executor, translator):
+        """Test that each direction calls the matching translator method."""
+        forward = submit_job(executor, translator, TEXT_TO_EMOJI, "I'm happy", candidates=2)
+        reverse = submit_job(executor, translator, EMOJI_TO_TEXT, "🎉")
+
+        assert forward.future.result(timeout=2) == ["😄✨", "🥳"]
+        assert reverse.future.result(timeout=2) == ["happy (🎉)"]
+        assert forward.kind == TEXT_TO_EMOJI and forward.text == "I'm happy"
+
+    def test_style_is_passed_through(self, executor, translator):
+        """Test that the translation style reaches the translator."""
+        submit_job(executor, translator, TEXT_TO_EMOJI, "hi", style="Minimal").future.result(timeout=2)
+        submit_job(executor, translator, ROUND_TRIP, "hi", style="Minimal").future.result(timeout=2)
+
+        translator.translate_candidates.assert_called_once_with("hi", 1, "Minimal")
+        translator.translate.assert_called_once_with("hi", "Minimal")
+
+    def test_round_trip(self, executor, translator):
+        """Test that a round trip interprets the emojis it produced."""
+        job = submit_job(executor, translator, ROUND_TRIP, "I'm happy")
+
+        assert job.future.result(timeout=2) == ("😄✨", "happy (😄✨)")
+
+    def test_round_trip_skips_interpretation_on_failure(self, executor, translator):
+        """Test that a failed forward translation is not interpreted."""
+        translator.translate.side_effect = lambda text, style: "❌🤖"
+
+        job = submit_job(executor, translator, ROUND_TRIP, "I'm happy")
+
+        assert job.future.result(timeout=2) == ("❌🤖", None)
+        translator.translate_reverse.assert_not_called()
+
+    def test_jobs_run_side_by_side(self, executor, translator):
+        """Test that a forward and a reverse job are in flight at the same time."""
+        both_started = threading.Barrier(2, timeout=2)
+
+        def rendezvous(result):
+            both_started.wait()
+            return result
+
+        translator.translate_candidates.side_effect = lambda text, n, style: rendezvous(["😄"])
+        translator.translate_reverse_candidates.side_effect = lambda emojis, n: rendezvous(["party"])
+
+        forward = submit_job(executor, translator, TEXT_TO_EMOJI, "hi")
+        reverse = submit_job(executor, translator, EMOJI_TO_TEXT, "🎉")
+
+        assert reverse.future.result(timeout=2) == ["party"]
+        forward.future.result(timeout=2)
+
+    def test_unknown_kind(self, executor, translator):
+        """Test that unknown job kinds are rejected."""
+        with pytest.raises(ValueError):
+            submit_job(executor, translator, "sideways", "hi")
+
+    def test_chain_propagates_errors(self, executor):
+        """Test that a failure in either step fails the chained future."""
+        first: Future = Future()
+        chained = chain(executor, first, lambda value: value * 2)
+        first.set_exception(RuntimeError("boom"))
+        with pytest.raises(RuntimeError):
+            chained.result(timeout=2)
+
+        failing = chain(executor, executor.submit(lambda: 1), lambda value: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            failing.result(timeout=2)
+
+    def test_pop_finished(self, executor, translator):
+        """Test that only finished jobs are removed from the session's job table."""
+        gate = threading.Event()
+        translator.translate_reverse_candidates.side_effect = lambda emojis, n: gate.wait(2) and ["done"]
+        forward = submit_job(executor, translator, TEXT_TO_EMOJI, "hi")
+        reverse = submit_job(executor, translator, EMOJI_TO_TEXT, "🎉")
+        forward.future.result(timeout=2)
+        jobs = {TEXT_TO_EMOJI: forward, EMOJI_TO_TEXT: reverse}
+
+        assert pop_finished(jobs) == [forward]
+        assert list(jobs) == [EMOJI_TO_TEXT]
+
+        gate.set()
+        reverse.future.result(timeout=2)
+        assert pop_finished(jobs) == [reverse]
+        assert jobs == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
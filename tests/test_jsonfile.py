@@ -0,0 +1,37 @@
+"""
+Tests for atomic JSON file writes.
+"""
+
+import json
+import pytest
+from jsonfile import atomic_write_json
+
+
+class TestAtomicWriteJson:
+    """Test cases for atomic_write_json."""
+
+    def test_writes_and_replaces(self, tmp_path):
+        """Test that the file is replaced with the new data and no temporary file is left behind."""
+        path = tmp_path / "data.json"
+        path.write_text("old", encoding="utf-8")
+
+        atomic_write_json(str(path), {"emoji": "😄"}, indent=2)
+
+        assert json.loads(path.read_text(encoding="utf-8")) == {"emoji": "😄"}
+        assert "😄" in path.read_text(encoding="utf-8")
+        assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+    def test_failed_write_keeps_file_and_cleans_up(self, tmp_path):
+        """Test that a value that cannot be serialised leaves the old file and no temporary file."""
+        path = tmp_path / "data.json"
+        path.write_text("old", encoding="utf-8")
+
+        with pytest.raises(TypeError):
+            atomic_write_json(str(path), {"bad": object()})
+
+        assert path.read_text(encoding="utf-8") == "old"
+        assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
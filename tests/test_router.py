@@ -0,0 +1,218 @@
+"""
+Tests for the latency-aware model router.
+"""
+
+import pytest
+from unittest.mock import Mock
+from metrics import Metrics
+from openai_client import take_usage
+from router import Backend, LocalBackend, ModelRouter, OpenAIBackend, build_backends
+from tests.helpers import FakeClock
+
+
+class FakeBackend(Backend):
+    """Backend whose calls take scripted latencies (or raise) on a fake clock."""
+
+    def __init__(self, name, clock, latencies, reply=None):
+        self.name = name
+        self.clock = clock
+        self.latencies = list(latencies)
+        self.reply = reply or name
+        self.calls = 0
+
+    def complete(self, messages, max_tokens, temperature, n=1):
+        self.calls += 1
+        latency = self.latencies.pop(0) if len(self.latencies) > 1 else self.latencies[0]
+        if isinstance(latency, Exception):
+            raise latency
+        self.clock.now += latency
+        return [self.reply]
+
+
+MESSAGES = [{"role": "user", "content": "Translate this to emoji: I'm happy"}]
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_router(clock, *backends, **kwargs):
+    return ModelRouter(list(backends), clock=clock, registry=Metrics(), **kwargs)
+
+
+class TestModelRouter:
+    """Test cases for ModelRouter."""
+
+    def test_primary_used_in_configured_order(self, clock):
+        """Test that regular requests go to the first healthy backend even if it is slower."""
+        slow = FakeBackend("slow", clock, [2.0])
+        fast = FakeBackend("fast", clock, [0.1])
+        router = make_router(clock, slow, fast)
+
+        for _ in range(3):
+            assert router.complete(MESSAGES, 15, 0.5) == ["slow"]
+        assert fast.calls == 0
+
+    def test_fast_requests_pick_lowest_latency(self, clock):
+        """Test that fast requests settle on the backend with the lowest EWMA latency."""
+        slow = FakeBackend("slow", clock, [2.0])
+        fast = FakeBackend("fast", clock, [0.1])
+        router = make_router(clock, slow, fast)
+
+        replies = [router.complete(MESSAGES, 15, 0.5, fast=True)[0] for _ in range(5)]
+
+        # Both get measured once, then the faster one wins
+        assert replies[:2] == ["slow", "fast"]
+        assert replies[2:] == ["fast"] * 3
+        assert router.health("slow").latency == pytest.approx(2.0)
+        assert router.health("fast").latency == pytest.approx(0.1)
+
+    def test_ewma_tracks_latency_changes(self, clock):
+        """Test that a backend that slows down loses the fast path."""
+        a = FakeBackend("a", clock, [0.1, 0.1, 3.0, 3.0, 3.0, 3.0])
+        b = FakeBackend("b", clock, [0.5])
+        router = make_router(clock, a, b, alpha=0.5)
+
+        replies = [router.complete(MESSAGES, 15, 0.5, fast=True)[0] for _ in range(6)]
+
+        assert replies[:4] == ["a", "b", "a", "a"]
+        assert replies[-1] == "b"
+
+    def test_stale_latency_is_remeasured(self, clock):
+        """Test that a backend that lost the fast path is tried again once its measurement is stale."""
+        slow = FakeBackend("slow", clock, [2.0, 0.05])
+        fast = FakeBackend("fast", clock, [0.1])
+        router = make_router(clock, slow, fast, remeasure_after=60.0)
+
+        replies = [router.complete(MESSAGES, 15, 0.5, fast=True)[0] for _ in range(3)]
+        assert replies == ["slow", "fast", "fast"]
+
+        clock.now += 61.0
+        assert router.complete(MESSAGES, 15, 0.5, fast=True) == ["slow"]
+        assert router.health("slow").latency == pytest.approx(2.0 + 0.3 * (0.05 - 2.0))
+
+    def test_local_backend_is_fallback_only(self, clock):
+        """Test that the near-instant local stand-in never wins the fast path and only serves after failures."""
+        model = FakeBackend("gpt-4o-mini", clock, [0.8])
+        other = FakeBackend("gpt-3.5-turbo", clock, [0.5, RuntimeError("down")])
+        router = make_router(clock, model, other, LocalBackend(), remeasure_after=1.0)
+
+        replies = [router.complete(MESSAGES, 15, 0.5, fast=True)[0] for _ in range(5)]
+        assert "🙂" not in replies and "😄" not in replies
+        assert [backend.name for backend in router.order(fast=True)][-1] == "local"
+
+        model.latencies = [RuntimeError("down")]
+        assert router.complete(MESSAGES, 15, 0.5, fast=True) == ["😄"]
+
+    def test_failover_on_error(self, clock):
+        """Test that a failed call is retried on the next backend."""
+        broken = FakeBackend("broken", clock, [RuntimeError("503")])
+        backup = FakeBackend("backup", clock, [0.2])
+        router = make_router(clock, broken, backup)
+
+        assert router.complete(MESSAGES, 15, 0.5) == ["backup"]
+        assert router._metrics.get("router.failovers") == 1
+        assert router.health("broken").errors == 1
+
+    def test_degraded_backend_skipped_until_cooldown(self, clock):
+        """Test that a backend over the error threshold is skipped, then retried after the cooldown."""
+        flaky = FakeBackend("flaky", clock, [RuntimeError("503"), RuntimeError("503"), RuntimeError("503"), 0.1])
+        backup = FakeBackend("backup", clock, [0.2])
+        router = make_router(clock, flaky, backup, alpha=0.5, cooldown=30.0)
+
+        router.complete(MESSAGES, 15, 0.5)  # error rate 0.5, still healthy
+        router.complete(MESSAGES, 15, 0.5)  # 0.75: degraded
+        assert not router.is_healthy(flaky)
+        assert [backend.name for backend in router.order()] == ["backup", "flaky"]
+
+        calls = flaky.calls
+        router.complete(MESSAGES, 15, 0.5)
+        assert flaky.calls == calls
+
+        clock.now += 31.0
+        assert router.is_healthy(flaky)
+        assert router.complete(MESSAGES, 15, 0.5) == ["backup"]  # one more 503, then failover
+        assert router.complete(MESSAGES, 15, 0.5) == ["flaky"]
+
+    def test_too_slow_backend_is_degraded(self, clock):
+        """Test that a backend over max_latency fails over to the next one."""
+        sluggish = FakeBackend("sluggish", clock, [5.0])
+        backup = FakeBackend("backup", clock, [0.2])
+        router = make_router(clock, sluggish, backup, max_latency=2.0)
+
+        assert router.complete(MESSAGES, 15, 0.5) == ["sluggish"]
+        assert router.complete(MESSAGES, 15, 0.5) == ["backup"]
+
+    def test_degraded_backends_are_last_resort(self, clock):
+        """Test that a degraded backend is still tried when everything else fails."""
+        a = FakeBackend("a", clock, [RuntimeError("down"), 0.1])
+        b = FakeBackend("b", clock, [RuntimeError("down")])
+        router = make_router(clock, a, b, error_threshold=0.1)
+
+        with pytest.raises(RuntimeError):
+            router.complete(MESSAGES, 15, 0.5)
+        assert router.complete(MESSAGES, 15, 0.5) == ["a"]
+
+    def test_requires_backends(self, clock):
+        """Test that a router needs at least one backend."""
+        with pytest.raises(ValueError):
+            make_router(clock)
+
+
+class TestBackends:
+    """Test cases for the backend helpers."""
+
+    def test_backend_is_abstract(self):
+        """Test that a backend must implement complete()."""
+        with pytest.raises(TypeError):
+            Backend()
+
+    def test_local_backend_round_trip(self):
+        """Test that the local stand-in translates keywords both ways."""
+        backend = LocalBackend()
+
+        emojis = backend.complete([{"role": "user", "content": "Translate this to emoji: Happy party!"}], 15, 0.5)
+        text = backend.complete([{"role": "user", "content": f"Interpret these emojis: {emojis[0]}"}], 100, 0.7)
+
+        assert emojis == ["😄🎉"]
+        assert text == ["Feeling happy, party"]
+
+    def test_local_backend_default(self):
+        """Test that unknown words still produce an emoji."""
+        backend = LocalBackend()
+
+        assert backend.complete([{"role": "user", "content": "Translate this to emoji: xyz"}], 15, 0.5) == ["🙂"]
+
+    def test_openai_backend_calls_endpoint_and_counts_tokens(self):
+        """Test that the OpenAI backend builds its client on first use and records the tokens used."""
+        factory = Mock()
+        create = factory.return_value.chat.completions.create
+        create.return_value = Mock(
+            choices=[Mock(message=Mock(content="😄"))], usage=Mock(prompt_tokens=12, completion_tokens=3)
+        )
+        backend = OpenAIBackend("gpt-4o-mini", "sk-test", "http://proxy/v1", client_factory=factory)
+        factory.assert_not_called()
+        take_usage()
+
+        assert backend.complete(MESSAGES, 15, 0.5) == ["😄"]
+        factory.assert_called_once_with(api_key="sk-test", base_url="http://proxy/v1")
+        assert "n" not in create.call_args.kwargs
+        assert take_usage() == {"prompt_tokens": 12, "completion_tokens": 3}
+
+    def test_build_backends(self):
+        """Test parsing a backend list with endpoints and the local stand-in."""
+        backends = build_backends("gpt-4o-mini, gpt-3.5-turbo@http://proxy/v1 ,local", "sk-test")
+
+        assert [backend.name for backend in backends] == ["gpt-4o-mini", "gpt-3.5-turbo@http://proxy/v1", "local"]
+        assert backends[1].model == "gpt-3.5-turbo"
+
+    def test_build_backends_requires_key_for_openai(self):
+        """Test that only the local backend works without an API key."""
+        assert [backend.name for backend in build_backends("local", None)] == ["local"]
+        with pytest.raises(ValueError):
+            build_backends("gpt-4o-mini,local", None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
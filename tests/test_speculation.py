@@ -0,0 +1,192 @@
+"""
+Tests for speculative translation.
+"""
+
+import pytest
+from concurrent.futures import Future
+from metrics import Metrics
+from ratelimit import RateBudget
+from speculation import Speculator
+from tests.helpers import FakeClock
+
+
+class ImmediateExecutor:
+    """Runs submitted calls synchronously and records them."""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        self.calls.append(args)
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1000.0)
+
+
+@pytest.fixture
+def executor():
+    return ImmediateExecutor()
+
+
+@pytest.fixture
+def registry():
+    return Metrics()
+
+
+def make_speculator(executor, clock, registry, limit=10, translate=lambda text: "😄"):
+    return Speculator(
+        executor,
+        translate,
+        budget=RateBudget(limit, clock=clock),
+        debounce=1.0,
+        ttl=30.0,
+        clock=clock,
+        registry=registry,
+    )
+
+
+class TestSpeculator:
+    """Test cases for Speculator."""
+
+    def test_speculates_after_debounce(self, executor, clock, registry):
+        """Test that a translation starts only once the input has been stable."""
+        speculator = make_speculator(executor, clock, registry)
+        state = speculator.new_session()
+
+        assert not speculator.observe(state, "I'm happy")
+        clock.now += 0.5
+        assert not speculator.observe(state, "I'm happy")
+        clock.now += 0.6
+        assert speculator.observe(state, "I'm happy")
+        assert not speculator.observe(state, "I'm happy")
+
+        assert executor.calls == [("I'm happy",)]
+        assert registry.get("speculation.started") == 1
+
+    def test_take_hit_and_miss(self, executor, clock, registry):
+        """Test that a click is served from the speculation and counted."""
+        speculator = make_speculator(executor, clock, registry)
+        state = speculator.new_session()
+        speculator.observe(state, "I'm happy")
+        clock.now += 2
+        speculator.observe(state, "I'm happy")
+
+        assert speculator.take(" I'm happy ").result() == "😄"
+        assert speculator.take("I'm happy") is None
+        assert speculator.take("something else") is None
+        assert registry.get("speculation.hits") == 1
+        assert registry.get("speculation.misses") == 2
+        assert speculator.hit_rate() == pytest.approx(1 / 3)
+
+    def test_changed_text_discards_speculation(self, executor, clock, registry):
+        """Test that editing the input throws away the stale speculation."""
+        speculator = make_speculator(executor, clock, registry)
+        state = speculator.new_session()
+        speculator.observe(state, "I'm happy")
+        clock.now += 2
+        speculator.observe(state, "I'm happy")
+
+        speculator.observe(state, "I'm happy and tired")
+
+        assert registry.get("speculation.discarded") == 1
+        assert speculator.take("I'm happy") is None
+
+    def test_expired_speculation_is_a_miss(self, executor, clock, registry):
+        """Test that speculations are only usable for their TTL."""
+        speculator = make_speculator(executor, clock, registry)
+        state = speculator.new_session()
+        speculator.observe(state, "hi")
+        clock.now += 2
+        speculator.observe(state, "hi")
+
+        clock.now += 31
+        assert speculator.take("hi") is None
+
+    @pytest.mark.parametrize("result", ["❌🤖", ["❌🤖"], []])
+    def test_failed_speculation_is_a_miss(self, executor, clock, registry, result):
+        """Test that an error result (or candidate list) is not handed to the click."""
+        speculator = make_speculator(executor, clock, registry, translate=lambda text: result)
+        state = speculator.new_session()
+        speculator.observe(state, "hi")
+        clock.now += 2
+        speculator.observe(state, "hi")
+
+        assert speculator.take("hi") is None
+
+    def test_global_budget(self, executor, clock, registry):
+        """Test that speculation stops when the shared budget is spent."""
+        speculator = make_speculator(executor, clock, registry, limit=1)
+        for text in ["one", "two"]:
+            state = speculator.new_session()
+            speculator.observe(state, text)
+            clock.now += 2
+            speculator.observe(state, text)
+
+        assert executor.calls == [("one",)]
+        assert registry.get("speculation.budget_denied") == 1
+
+    def test_session_budget(self, executor, clock, registry):
+        """Test that one session cannot use more than its own share."""
+        speculator = make_speculator(executor, clock, registry)
+        speculator.session_limit = 2
+        state = speculator.new_session()
+        for text in ["one", "two", "three"]:
+            speculator.observe(state, text)
+            clock.now += 2
+            speculator.observe(state, text)
+
+        assert executor.calls == [("one",), ("two",)]
+
+    def test_session_denial_keeps_global_quota(self, executor, clock, registry):
+        """Test that a session over its share does not use up the shared budget, and vice versa."""
+        speculator = make_speculator(executor, clock, registry, limit=2)
+        speculator.session_limit = 1
+        greedy, other = speculator.new_session(), speculator.new_session()
+        for text in ["one", "two", "three"]:
+            speculator.observe(greedy, text)
+            clock.now += 2
+            speculator.observe(greedy, text)
+
+        assert speculator.budget.remaining() == 1
+        assert greedy.budget.remaining() == 0
+
+        speculator.budget.try_acquire()  # someone else takes the last shared slot
+        speculator.observe(other, "four")
+        clock.now += 2
+        assert not speculator.observe(other, "four")
+        assert other.budget.remaining() == 1
+
+    def test_empty_input_not_speculated(self, executor, clock, registry):
+        """Test that blank input never triggers a request."""
+        speculator = make_speculator(executor, clock, registry)
+        state = speculator.new_session()
+        speculator.observe(state, "   ")
+        clock.now += 2
+
+        assert not speculator.observe(state, "")
+        assert executor.calls == []
+
+    def test_cached_input_not_speculated(self, executor, clock, registry):
+        """Test that text the translation cache already answers spends no budget."""
+        budget = RateBudget(10, clock=clock)
+        speculator = Speculator(
+            executor, lambda text: "😄", budget, clock=clock, registry=registry, is_cached=lambda text: text == "hi"
+        )
+        state = speculator.new_session()
+        speculator.observe(state, "hi")
+        clock.now += 2
+
+        assert not speculator.observe(state, "hi")
+        assert executor.calls == []
+        assert budget.remaining() == 10
+        assert state.budget.remaining() == 5
+        assert registry.get("speculation.cached") == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,252 @@
+"""
+Tests for the tiered history store.
+"""
+
+import multiprocessing
+import os
+import threading
+import pytest
+from unittest.mock import patch
+from history import make_entry
+from analytics import HistoryAnalytics, sidecar_path
+from store import HistoryStore, SEGMENT_HEADER_SIZE, append_segment, iter_segment, read_segment, read_segment_header
+from tests.helpers import entry_at
+
+
+def _append_days(path, worker):
+    store = HistoryStore(path, hot_limit=5, rollover_batch=0, analytics=HistoryAnalytics.load(sidecar_path(path)))
+    for day in range(1, 21):
+        store.append([entry_at(f"2024-01-{day:02d}T00:00:00", f"worker {worker}")])
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store(hot_limit=3, rollover_batch=2)
+
+
+class TestSegments:
+    """Test cases for archive segment files."""
+
+    @pytest.mark.parametrize("codec", ["gzip", "xz"])
+    def test_append_and_read(self, tmp_path, codec):
+        """Test that appended batches are read back in order with an accurate header."""
+        path = str(tmp_path / "2024-01.seg")
+        first = [entry_at("2024-01-05T10:00:00", "b").to_dict()]
+        second = [
+            entry_at("2024-01-02T10:00:00", "a").to_dict(),
+            entry_at("2024-01-09T10:00:00", "c", "emoji_to_text").to_dict(),
+        ]
+
+        append_segment(path, first, codec=codec)
+        header = append_segment(path, second, codec="gzip")
+
+        assert header.codec == codec
+        assert header.count == 3
+        assert (header.first, header.last) == ("2024-01-02T10:00:00", "2024-01-09T10:00:00")
+        assert header.types == {"text_to_emoji": 2, "emoji_to_text": 1}
+        assert list(read_segment(path).to_dicts()) == first + second
+
+    def test_header_is_fixed_size(self, tmp_path):
+        """Test that the header occupies a fixed prefix of the file."""
+        path = str(tmp_path / "2024-01.seg")
+        append_segment(path, [entry_at("2024-01-05T10:00:00").to_dict()])
+
+        with open(path, "rb") as f:
+            raw = f.read(SEGMENT_HEADER_SIZE)
+        assert raw.endswith(b"\n")
+        assert read_segment_header(path).partition == "2024-01"
+
+    @pytest.mark.parametrize("codec", ["gzip", "xz"])
+    def test_iter_segment_streams_all_members(self, tmp_path, codec):
+        """Test that streaming a segment yields the records of every appended member, at any level."""
+        path = str(tmp_path / "2024-01.seg")
+        records = [entry_at(f"2024-01-0{day}T10:00:00", f"note {day}").to_dict() for day in range(1, 5)]
+
+        append_segment(path, records[:2], codec=codec)
+        append_segment(path, records[2:], codec=codec, level=1)
+
+        assert list(iter_segment(path)) == records
+        assert list(read_segment(path).to_dicts()) == records
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Test that files without the segment magic are refused."""
+        path = tmp_path / "bogus.seg"
+        path.write_bytes(b"not a segment")
+
+        with pytest.raises(ValueError):
+            read_segment_header(str(path))
+
+
+class TestHistoryStore:
+    """Test cases for HistoryStore."""
+
+    def test_rollover_into_partitions(self, store):
+        """Test that overflowing the hot file archives the oldest entries by month."""
+        timestamps = ["2024-01-01T00:00:00", "2024-01-20T00:00:00", "2024-02-01T00:00:00"]
+        timestamps += [f"2024-03-0{day}T00:00:00" for day in range(1, 4)]
+        for timestamp in timestamps:
+            store.append([entry_at(timestamp)])
+
+        assert [entry.timestamp for entry in store.load_recent()] == timestamps[3:]
+        assert [(h.partition, h.count) for h in store.segments()] == [("2024-01", 2), ("2024-02", 1)]
+        assert store.count() == 6
+        assert [entry.timestamp for entry in store.iter_entries()] == timestamps
+
+    def test_no_rollover_within_batch_slack(self, store):
+        """Test that the hot file may exceed its limit by the rollover batch."""
+        store.append([entry_at(f"2024-03-0{day}T00:00:00") for day in range(1, 6)])
+
+        assert len(store.load_recent()) == 5
+        assert store.segments() == []
+
+    def test_undated_entries_are_oldest(self, store):
+        """Test that legacy entries without a timestamp go to the undated segment."""
+        legacy = make_entry("old", "🕰️", [], "text_to_emoji")
+        legacy.timestamp = ""
+        store.append([legacy] + [entry_at(f"2024-03-0{day}T00:00:00") for day in range(1, 6)])
+
+        assert [h.partition for h in store.segments()] == ["undated", "2024-03"]
+        assert next(store.iter_entries()).input == "old"
+
+    def test_search_newest_first_across_tiers(self, store):
+        """Test that search spans hot and archived entries, newest first."""
+        for day in range(1, 10):
+            store.append([entry_at(f"2024-01-0{day}T00:00:00", f"note {day}")])
+
+        results = store.search("NOTE")
+
+        assert [entry.input for entry in results] == [f"note {day}" for day in range(9, 0, -1)]
+
+    def test_search_does_not_open_archive_when_hot_suffices(self, store):
+        """Test that archive segments load only when the hot file cannot satisfy the limit."""
+        for day in range(1, 10):
+            store.append([entry_at(f"2024-01-0{day}T00:00:00")])
+
+        with patch("store.read_segment") as mock_read:
+            assert len(store.search(limit=3)) == 3
+            mock_read.assert_not_called()
+
+    def test_search_skips_segments_by_header(self, tmp_path):
+        """Test that date and type filters skip segments without decompressing them."""
+        store = HistoryStore(str(tmp_path / "storage.json"), hot_limit=1, rollover_batch=0)
+        store.append([entry_at("2024-01-05T00:00:00", "jan")])
+        store.append([entry_at("2024-02-05T00:00:00", "feb", "emoji_to_text")])
+        store.append([entry_at("2024-03-05T00:00:00", "mar")])
+
+        with patch("store.read_segment", wraps=read_segment) as mock_read:
+            results = store.search(since="2024-02-01", until="2024-03-01")
+            assert [entry.input for entry in results] == ["feb"]
+            assert [os.path.basename(c.args[0]) for c in mock_read.call_args_list] == ["2024-02.seg"]
+
+            # January has no emoji_to_text entries and February is already cached
+            mock_read.reset_mock()
+            assert store.search(types=["emoji_to_text"]) == results
+            mock_read.assert_not_called()
+
+    def test_import_records_writes_archive_and_skips_duplicates(self, tmp_path):
+        """Test that imported records go to their partitions and known (timestamp, input) pairs are skipped."""
+        store = HistoryStore(
+            str(tmp_path / "storage.json"), hot_limit=2, rollover_batch=0, analytics=HistoryAnalytics()
+        )
+        store.append([entry_at("2024-03-01T00:00:00", "hot")])
+        records = [
+            entry_at("2024-01-05T00:00:00", "a").to_dict(),
+            entry_at("2024-02-05T00:00:00", "b").to_dict(),
+            entry_at("2024-01-06T00:00:00", "c").to_dict(),
+            entry_at("2024-01-05T00:00:00", "a").to_dict(),  # repeated within the import
+            entry_at("2024-03-01T00:00:00", "hot").to_dict(),  # already in the hot file
+        ]
+
+        assert store.import_records(records, batch_size=2) == (3, 2)
+        # The two newest imports join the hot file, rolling its oldest entry ("c") over
+        assert [entry.input for entry in store.load_recent()] == ["b", "hot"]
+        assert [(h.partition, h.count) for h in store.segments()] == [("2024-01", 2)]
+        assert store.count() == 4
+        assert store.analytics.total == 4
+
+        # Archived keys are found on a second run
+        assert store.import_records(records) == (0, 5)
+        assert store.count() == 4
+
+    def test_import_records_fills_empty_hot_file(self, tmp_path):
+        """Test that an import into an empty store is visible as recent history."""
+        store = HistoryStore(str(tmp_path / "new" / "storage.json"), hot_limit=2, rollover_batch=0)
+        records = [entry_at(f"2024-01-0{day}T00:00:00", f"day {day}").to_dict() for day in [3, 1, 4, 2]]
+
+        assert store.import_records(records, batch_size=1) == (4, 0)
+        assert [entry.input for entry in store.load_recent()] == ["day 3", "day 4"]
+        assert [entry.input for entry in store.iter_entries()] == ["day 1", "day 2", "day 3", "day 4"]
+
+    def test_import_scans_segments_only_within_their_range(self, tmp_path):
+        """Test that stored keys are loaded only for records inside a segment's timestamp range."""
+        store = HistoryStore(str(tmp_path / "storage.json"), hot_limit=1, rollover_batch=0)
+        store.append([entry_at("2024-01-05T00:00:00", "old")])
+        store.append([entry_at("2024-03-01T00:00:00", "hot")])
+
+        with patch.object(HistoryStore, "iter_segment", autospec=True, side_effect=HistoryStore.iter_segment) as scan:
+            assert store.import_records([entry_at("2024-01-20T00:00:00", "newer").to_dict()]) == (1, 0)
+            scan.assert_not_called()
+            assert store.import_records([entry_at("2024-01-05T00:00:00", "old").to_dict()]) == (0, 1)
+            assert scan.call_count == 1
+
+    def test_import_rescans_partitions_after_dropping_their_keys(self, tmp_path):
+        """Test that dedup still works when an import revisits partitions it stopped tracking."""
+        store = HistoryStore(str(tmp_path / "storage.json"), hot_limit=1, rollover_batch=0)
+        months = ["2024-01", "2024-02", "2024-03"]
+        records = [entry_at(f"{month}-0{day}T00:00:00").to_dict() for day in [1, 2] for month in months]
+
+        with patch("store.IMPORT_OPEN_PARTITIONS", 1):
+            assert store.import_records(records + records, batch_size=100) == (6, 6)
+
+        assert store.count() == 6
+
+    def test_writers_in_other_processes_are_serialized(self, tmp_path):
+        """Test that concurrent appends from several processes lose no entries or analytics counts."""
+        path = str(tmp_path / "storage.json")
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_append_days, args=(path, worker)) for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        store = HistoryStore(path)
+        assert [worker.exitcode for worker in workers] == [0] * 4
+        assert store.count() == 4 * 20
+        assert len({(entry.timestamp, entry.input) for entry in store.iter_entries()}) == 4 * 20
+        assert HistoryAnalytics.load(sidecar_path(path)).total == 4 * 20
+
+    def test_file_lock_blocks_other_instances(self, tmp_path):
+        """Test that a second store on the same file waits for the first one's lock."""
+        path = str(tmp_path / "storage.json")
+        first, second = HistoryStore(path), HistoryStore(path)
+        appended = threading.Event()
+        thread = threading.Thread(target=lambda: (second.append([entry_at("2024-01-01T00:00:00")]), appended.set()))
+
+        with first._locked():
+            thread.start()
+            assert not appended.wait(0.2)
+        thread.join(5)
+
+        assert appended.is_set()
+        assert len(first.load_recent()) == 1
+
+    def test_clear(self, store):
+        """Test that clearing removes hot and archived entries."""
+        store.append([entry_at(f"2024-03-0{day}T00:00:00") for day in range(1, 8)])
+
+        store.clear()
+
+        assert store.load_recent() == []
+        assert store.segments() == []
+
+    def test_invalid_options(self, tmp_path):
+        """Test that unsupported codecs and partitions are rejected."""
+        with pytest.raises(ValueError):
+            HistoryStore(str(tmp_path / "s.json"), codec="zip")
+        with pytest.raises(ValueError):
+            HistoryStore(str(tmp_path / "s.json"), partition="year")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
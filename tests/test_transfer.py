@@ -0,0 +1,177 @@
+"""
+Tests for bulk history export and import.
+"""
+
+import io
+import json
+import pytest
+from unittest.mock import patch
+from analytics import HistoryAnalytics, sidecar_path
+from store import HistoryStore
+from tests.helpers import entry_at
+from transfer import (
+    export_csv,
+    export_jsonl,
+    import_jsonl,
+    import_records,
+    iter_records,
+    main,
+    read_csv,
+    read_jsonl,
+    validate_record,
+)
+
+
+def raw(timestamp, text="hello", entry_type="text_to_emoji", codes=("U+1F44B",)):
+    return {"input": text, "translation": "👋", "emoji_codes": list(codes), "timestamp": timestamp, "type": entry_type}
+
+
+@pytest.fixture
+def store(make_store):
+    store = make_store(hot_limit=2, rollover_batch=0)
+    store.append([entry_at("2024-01-05T00:00:00", "jan")])
+    store.append([entry_at("2024-02-05T00:00:00", "feb", "emoji_to_text")])
+    store.append([entry_at("2024-03-05T00:00:00", "mar")])
+    store.append([entry_at("2024-03-06T00:00:00", "mar 2")])
+    return store
+
+
+class TestExport:
+    """Test cases for streaming export."""
+
+    def test_iter_records_oldest_first(self, store):
+        """Test that archived and hot entries are yielded oldest first."""
+        assert [record["input"] for record in iter_records(store)] == ["jan", "feb", "mar", "mar 2"]
+
+    def test_iter_records_filters(self, store):
+        """Test the date range and type filters."""
+        assert [r["input"] for r in iter_records(store, since="2024-02-01", until="2024-03-06")] == ["feb", "mar"]
+        assert [r["input"] for r in iter_records(store, types=["emoji_to_text"])] == ["feb"]
+
+    def test_jsonl_round_trip(self, store):
+        """Test that exported JSON lines read back as the same records."""
+        out = io.StringIO()
+
+        assert export_jsonl(iter_records(store), out) == 4
+        out.seek(0)
+        assert list(read_jsonl(out)) == list(iter_records(store))
+
+    def test_csv_round_trip(self, store):
+        """Test that CSV exports keep the core fields, with codes space-separated."""
+        out = io.StringIO()
+
+        assert export_csv(iter_records(store, types=["text_to_emoji"]), out) == 3
+        out.seek(0)
+        records = list(read_csv(out))
+        assert [record["input"] for record in records] == ["jan", "mar", "mar 2"]
+        assert records[0] == raw("2024-01-05T00:00:00", "jan")
+
+
+class TestImport:
+    """Test cases for validated bulk import."""
+
+    def test_validate_record_upgrades(self):
+        """Test that a valid record is brought to the current schema."""
+        entry = validate_record(raw("2024-01-05T10:00:00"))
+
+        assert entry["v"] == 2
+        assert entry["display_time"]
+        assert entry["input"] == "hello"
+
+    def test_validate_record_keeps_current_entries(self):
+        """Test that entries already in the current schema are returned unchanged."""
+        record = entry_at("2024-01-05T10:00:00").to_dict()
+
+        assert validate_record(record) is record
+        assert validate_record(dict(record, timestamp="not a date")) is None
+
+    @pytest.mark.parametrize("changes", [{"label": None}, {"search_key": "forged"}, {"extra": 1}])
+    def test_validate_record_recomputes_mismatched_entries(self, changes):
+        """Test that current-schema entries whose derived fields disagree are stored recomputed."""
+        record = entry_at("2024-01-05T10:00:00").to_dict()
+        tampered = dict(record, **changes)
+
+        entry = validate_record(tampered)
+
+        assert entry is not tampered
+        assert entry == record
+
+    @pytest.mark.parametrize(
+        "record",
+        [
+            {},
+            raw("2024-01-05T10:00:00", text="  "),
+            raw("2024-01-05T10:00:00", entry_type="other"),
+            raw("not a date"),
+            raw("2024-01-05T10:00:00", codes=["1F44B"]),
+            raw("2024-01-05T10:00:00", codes=[42]),
+            dict(raw("2024-01-05T10:00:00"), translation=None),
+        ],
+    )
+    def test_validate_record_rejects(self, record):
+        """Test that incomplete or malformed records are rejected."""
+        assert validate_record(record) is None
+
+    def test_malformed_jsonl_lines_are_invalid(self):
+        """Test that unparseable lines count as invalid rather than aborting the import."""
+        source = io.StringIO(json.dumps(raw("2024-01-05T10:00:00")) + "\n{oops\n\n[1, 2]\n")
+
+        assert [bool(validate_record(record)) for record in read_jsonl(source)] == [True, False, False]
+
+    def test_import_reports_counts(self, store):
+        """Test that the report counts imported, duplicate and invalid records."""
+        records = [
+            raw("2024-01-05T00:00:00", "jan"),  # already stored
+            raw("2024-01-07T00:00:00", "new"),
+            raw("2024-04-01T00:00:00", "april"),
+            raw("bad"),
+        ]
+
+        report = import_records(store, records, batch_size=1)
+
+        assert tuple(report) == (4, 2, 1, 1)
+        assert [record["input"] for record in iter_records(store, until="2024-02-01")] == ["jan", "new"]
+        assert store.count() == 6
+
+    def test_import_jsonl_stores_exported_lines_verbatim(self, store, tmp_path):
+        """Test that re-importing an export stores its lines without re-encoding them."""
+        out = io.StringIO()
+        export_jsonl(iter_records(store), out)
+        target = HistoryStore(str(tmp_path / "other" / "storage.json"), hot_limit=1, rollover_batch=0)
+
+        with patch("store._encode_record") as encode:
+            report = import_jsonl(target, io.StringIO(out.getvalue()))
+            encode.assert_not_called()
+
+        assert tuple(report) == (4, 4, 0, 0)
+        assert list(iter_records(target)) == list(iter_records(store))
+
+    def test_cli_export_then_import(self, store, tmp_path, capsys):
+        """Test that the command line round-trips history into an empty store."""
+        exported = str(tmp_path / "history.csv")
+        main(["--history", str(tmp_path / "storage.json"), "export", exported, "--since", "2024-02-01"])
+        target = str(tmp_path / "other" / "storage.json")
+
+        main(["--history", target, "import", exported])
+
+        assert "imported 3" in capsys.readouterr().err
+        assert [r["input"] for r in iter_records(HistoryStore(target))] == ["feb", "mar", "mar 2"]
+
+    def test_cli_import_while_app_is_running(self, tmp_path):
+        """Test that counts imported by the CLI survive the running app's next save."""
+        path = str(tmp_path / "storage.json")
+        app_store = HistoryStore(path, analytics=HistoryAnalytics.load(sidecar_path(path)))
+        app_store.append([entry_at("2024-03-01T00:00:00", "app")])
+        exported = tmp_path / "history.jsonl"
+        exported.write_text("".join(json.dumps(raw(f"2024-01-0{day}T00:00:00")) + "\n" for day in range(1, 4)))
+
+        main(["--history", path, "import", str(exported)])
+        app_store.append([entry_at("2024-03-02T00:00:00", "app")])
+
+        assert app_store.analytics.total == 5
+        assert HistoryAnalytics.load(sidecar_path(path)).total == 5
+        assert app_store.count() == 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
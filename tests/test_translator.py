@@ -5,7 +5,15 @@ Tests for the EmojiTranslator class.
 import pytest
 import os
 from unittest.mock import Mock, patch
-from translator import EmojiTranslator
+from metrics import metrics
+from translator import EmojiTranslator, dedupe_candidates, record_usage, repair_emojis, split_emojis, take_usage
+
+
+def completion(*contents):
+    """Build a fake chat completion response with one choice per content."""
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=content)) for content in contents]
+    return response
 
 
 class TestEmojiTranslator:
@@ -29,6 +37,17 @@ class TestEmojiTranslator:
         translator = EmojiTranslator(model="gpt-4")
         assert translator.model_engine == "gpt-4"
 
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch('translator.OpenAI')
+    def test_client_created_on_first_use(self, mock_openai):
+        """Test that the OpenAI client is only built when first needed."""
+        translator = EmojiTranslator()
+        mock_openai.assert_not_called()
+
+        assert translator.client is mock_openai.return_value
+        assert translator.client is mock_openai.return_value
+        mock_openai.assert_called_once_with(api_key='test-key')
+
     @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
     @patch('translator.OpenAI')
     def test_translate_empty_input(self, mock_openai):
@@ -143,6 +162,148 @@ class TestEmojiTranslator:
         
         assert result == "Unable to interpret these emojis"
 
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch('translator.OpenAI')
+    def test_translate_candidates_single_request(self, mock_openai):
+        """Test that several candidates come from one request and are deduplicated."""
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = completion("😄✨", " 😄 ✨ ", "🎉🥳", "🎉", "")
+
+        translator = EmojiTranslator()
+        result = translator.translate_candidates("I'm happy", n=4)
+
+        # "🎉" alone is below the Standard minimum of two
+        assert result == ["😄✨", "🎉🥳"]
+        create.assert_called_once()
+        assert create.call_args.kwargs["n"] == 4
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch('translator.OpenAI')
+    def test_translate_single_candidate_omits_n(self, mock_openai):
+        """Test that plain translations keep the single-choice request shape."""
+        create = mock_openai.return_value.chat.completions.create
+        create.return_value = completion("😄✨")
+
+        translator = EmojiTranslator()
+
+        assert translator.translate("I'm happy") == "😄✨"
+        assert "n" not in create.call_args.kwargs
+
+    @patch.dict(os.environ, {'OPENAI_API_KEY': 'test-key'})
+    @patch('translator.OpenAI')
+    def test_translate_reverse_candidates(self, mock_openai):
+        """Test reverse translation candidates and the empty-input fallback."""
+        mock_openai.return_value.chat.completions.create.return_value = completion(
+            "I'm happy", "I'm happy", "Feeling joyful"
+        )
+
+        translator = EmojiTranslator()
+
+        assert translator.translate_reverse_candidates("😄", n=3) == ["I'm happy", "Feeling joyful"]
+        assert translator.translate_reverse_candidates("  ") == ["No emojis provided"]
+
+    def test_dedupe_candidates(self):
+        """Test that whitespace variants and empty choices are dropped."""
+        assert dedupe_candidates(["😄 ✨", "😄✨", None, "  ", "🎉"]) == ["😄 ✨", "🎉"]
+
+    def test_router_routes_minimal_requests_fast(self):
+        """Test that a routed translator needs no API key and marks Minimal requests as fast."""
+        router = Mock()
+        router.complete.return_value = ["😄"]
+        with patch.dict(os.environ, {}, clear=True):
+            translator = EmojiTranslator(router=router)
+
+        long_text = "I finally finished the quarterly report after a very long week"
+        assert translator.translate(long_text, style="Minimal") == "😄"
+        assert router.complete.call_args.kwargs["fast"] is True
+        translator.translate(long_text)
+        assert router.complete.call_args.kwargs["fast"] is False
+
+    def test_translate_repairs_output(self):
+        """Test that stray text and surplus emojis are removed without another request."""
+        router = Mock()
+        router.complete.return_value = ["Sure! 😄🌟", "😄 🌟", "🎉🎂🥳🎈🎁🍰🕯️✨"]
+        with patch.dict(os.environ, {}, clear=True):
+            translator = EmojiTranslator(router=router)
+        metrics.reset()
+
+        assert translator.translate_candidates("It's my birthday", n=3) == ["😄🌟", "🎉🎂🥳🎈🎁🍰"]
+        assert translator.translate("It's my birthday", style="Minimal") == "😄🌟"
+        assert router.complete.call_count == 2
+        assert metrics.get("translator.repair.stripped") == 2
+        assert metrics.get("translator.repair.trimmed") == 2
+        assert metrics.get("translator.repair.retries") == 0
+
+    def test_translate_retries_when_nothing_salvageable(self):
+        """Test that the API is called again only when no emojis are left."""
+        router = Mock()
+        router.complete.side_effect = [["I cannot do that."], ["🙂✨"]]
+        with patch.dict(os.environ, {}, clear=True):
+            translator = EmojiTranslator(router=router)
+        metrics.reset()
+
+        assert translator.translate("I'm fine") == "🙂✨"
+        assert router.complete.call_count == 2
+        assert metrics.get("translator.repair.retries") == 1
+        assert metrics.get("translator.repair.unsalvageable") == 1
+
+    def test_translate_retries_when_too_few_emojis(self):
+        """Test that output below the style's minimum is retried, and kept only if nothing better comes back."""
+        router = Mock()
+        router.complete.side_effect = [["😄"], ["😄🌟"], ["😄"], ["🙂"]]
+        with patch.dict(os.environ, {}, clear=True):
+            translator = EmojiTranslator(router=router)
+        metrics.reset()
+
+        assert translator.translate("I'm happy") == "😄🌟"
+        assert translator.translate("I'm happy") == "😄"
+        assert router.complete.call_count == 4
+        assert metrics.get("translator.repair.short") == 3
+        assert metrics.get("translator.repair.retries") == 2
+
+    def test_usage_is_tallied_per_thread(self):
+        """Test that reported tokens are tallied until taken, and non-integer usage is ignored."""
+        take_usage()
+        record_usage(Mock(prompt_tokens=10, completion_tokens=2))
+        record_usage(Mock(prompt_tokens=5, completion_tokens=1))
+        record_usage(Mock())
+
+        assert take_usage() == {"prompt_tokens": 15, "completion_tokens": 3}
+        assert take_usage() == {"prompt_tokens": 0, "completion_tokens": 0}
+
+
+class TestEmojiRepair:
+    """Test cases for local emoji validation and repair."""
+
+    def test_split_emoji_sequences(self):
+        """Test that multi-code-point sequences stay whole."""
+        scotland = "🏴\U000E0067\U000E0062\U000E0073\U000E0063\U000E0074\U000E007F"
+        text = f"👩\u200d💻 🇯🇵 1️⃣ 👍🏽 ❤️\u200d🔥 {scotland} 🧑🏿\u200d🤝\u200d🧑🏻"
+
+        assert split_emojis(text) == [
+            "👩\u200d💻", "🇯🇵", "1️⃣", "👍🏽", "❤️\u200d🔥", scotland, "🧑🏿\u200d🤝\u200d🧑🏻"
+        ]
+
+    def test_split_drops_text_and_partial_sequences(self):
+        """Test that letters, digits and lone regional indicators are not emojis."""
+        assert split_emojis("Here: 123 \U0001F1EF ok 😄!") == ["😄"]
+
+    def test_repair_valid_output(self):
+        """Test that emoji-only output within the style's count is left alone."""
+        assert repair_emojis("😄 🌟 ✨") == ("😄🌟✨", False, False, False)
+
+    def test_repair_strips_and_trims(self):
+        """Test that stray text is stripped and counts are capped per style."""
+        assert repair_emojis("Sure! 😄🌟✨", style="Minimal") == ("😄🌟", True, True, False)
+        assert repair_emojis("😄" * 12, style="Expressive") == ("😄" * 10, False, True, False)
+        assert repair_emojis("No emojis here") == ("", True, False, False)
+
+    def test_repair_flags_too_few_emojis(self):
+        """Test that output below the style's minimum count is flagged as short."""
+        assert repair_emojis("😄") == ("😄", False, False, True)
+        assert repair_emojis("😄", style="Minimal").short is False
+        assert repair_emojis("😄🌟", style="Expressive").short is True
+
 
 if __name__ == "__main__":
-    pytest.main([__file__])
\ No newline at end of file
+    pytest.main([__file__])
@@ -0,0 +1,111 @@
+"""
+Tests for the translation cache warmer.
+"""
+
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from cache import TranslationCache
+from ratelimit import RateBudget
+from tests.helpers import entry_at
+from translator import DEFAULT_TRANSLATION
+from warm import load_seeds, rank_inputs, warm_cache, warm_from_history
+
+NOW = datetime(2024, 6, 30, 12, 0, 0)
+
+
+@pytest.fixture
+def translator():
+    fake = Mock()
+    fake.translate_candidates.side_effect = lambda text, n, style: [f"✨{len(text)}"]
+    return fake
+
+
+class TestRanking:
+    """Test cases for ranking inputs."""
+
+    def test_frequency_and_recency(self):
+        """Test that frequent inputs rank first and recent ones beat equally frequent old ones."""
+        entries = [
+            entry_at("2024-06-30T08:00:00", "coffee time"),
+            entry_at("2024-06-29T08:00:00", "Coffee  time"),
+            entry_at("2024-06-28T08:00:00", "coffee time"),
+            entry_at("2024-04-01T08:00:00", "old favourite"),
+            entry_at("2024-04-02T08:00:00", "old favourite"),
+            entry_at("2024-06-30T11:00:00", "just now"),
+            entry_at("2024-06-30T11:00:00", "🎉", "emoji_to_text"),
+        ]
+
+        ranked = rank_inputs(entries, now=NOW)
+
+        assert ranked == ["coffee time", "just now", "old favourite"]
+
+    def test_seeds_are_included(self):
+        """Test that seed phrases are ranked alongside history and merged with it."""
+        entries = [entry_at("2024-06-30T08:00:00", "Good morning")]
+
+        ranked = rank_inputs(entries, ["good morning", "new phrase"], now=NOW)
+
+        assert ranked == ["Good morning", "new phrase"]
+
+    def test_load_seeds(self, tmp_path):
+        """Test that blank lines and comments are skipped."""
+        path = tmp_path / "seeds.txt"
+        path.write_text("# popular\nI'm happy\n\n  Tired  \n", encoding="utf-8")
+
+        assert load_seeds(str(path)) == ["I'm happy", "Tired"]
+
+
+class TestWarmCache:
+    """Test cases for filling the cache."""
+
+    def test_fills_cache_and_skips_cached(self, translator, executor):
+        """Test that uncached inputs are translated once and cached ones are skipped."""
+        cache = TranslationCache()
+        cache.store("cached", "Standard", ["👍"])
+
+        warmed = warm_cache(translator, cache, ["hello", "cached", "bye"], executor, RateBudget(10), candidates=2)
+
+        assert warmed == 2
+        assert cache.lookup("hello") == ["✨5"]
+        assert cache.lookup("cached") == ["👍"]
+        assert translator.translate_candidates.call_count == 2
+        translator.translate_candidates.assert_any_call("bye", 2, "Standard")
+
+    def test_failures_are_not_cached(self, translator, executor):
+        """Test that error results, the default placeholder and exceptions stay out of the cache."""
+        def translate(text, n, style):
+            if text == "boom":
+                raise RuntimeError("boom")
+            return {"error": ["❌🤖"], "nothing": [DEFAULT_TRANSLATION]}.get(text, ["😄"])
+
+        translator.translate_candidates.side_effect = translate
+        cache = TranslationCache()
+
+        assert warm_cache(translator, cache, ["boom", "error", "nothing", "ok"], executor, RateBudget(10)) == 1
+        assert cache.lookup("boom") is None and cache.lookup("error") is None and cache.lookup("nothing") is None
+
+    def test_respects_rate_budget(self, translator, executor):
+        """Test that submissions wait for the budget."""
+        budget = Mock(wraps=RateBudget(10))
+
+        warm_cache(translator, TranslationCache(), ["a", "b", "c"], executor, budget)
+
+        assert budget.acquire.call_count == 3
+
+    def test_warm_from_history(self, tmp_path, store, translator, executor):
+        """Test the full run: rank the store, warm the top inputs and save the cache."""
+        now = datetime.now().isoformat()
+        store.append([entry_at(now, "popular"), entry_at(now, "popular"), entry_at(now, "rare")])
+        path = str(tmp_path / "translation_cache.json")
+
+        warmed = warm_from_history(store, TranslationCache(path), translator, executor, RateBudget(10), top=1)
+
+        assert warmed == 1
+        loaded = TranslationCache.load(path)
+        assert loaded.lookup("popular") == ["✨7"]
+        assert loaded.lookup("rare") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,115 @@
+"""
+Tests for the write-behind history writer.
+"""
+
+import time
+import pytest
+from unittest.mock import patch
+from tests.helpers import entry_at
+from writer import HistoryWriter
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestHistoryWriter:
+    """Test cases for HistoryWriter."""
+
+    def test_submit_does_not_write_immediately(self, store):
+        """Test that entries are queued and visible through the writer before they hit disk."""
+        writer = HistoryWriter(store, max_batch=10, max_delay=60)
+        try:
+            writer.submit(entry_at(text="hello"))
+
+            assert store.load_recent() == []
+            assert [e.input for e in writer.load_recent()] == ["hello"]
+            assert [e.input for e in writer.search("HELLO")] == ["hello"]
+        finally:
+            writer.close()
+
+    def test_flush_on_batch_size(self, store):
+        """Test that reaching the batch size triggers one grouped write."""
+        writer = HistoryWriter(store, max_batch=3, max_delay=60)
+        try:
+            with patch.object(store, "append", wraps=store.append) as mock_append:
+                for i in range(3):
+                    writer.submit(entry_at(text=f"item {i}"))
+
+                assert wait_for(lambda: len(store.load_recent()) == 3)
+                mock_append.assert_called_once()
+            assert writer.pending() == []
+        finally:
+            writer.close()
+
+    def test_flush_on_delay(self, store):
+        """Test that a lone entry is written once it has waited max_delay."""
+        writer = HistoryWriter(store, max_batch=100, max_delay=0.05)
+        try:
+            writer.submit(entry_at(text="lonely"))
+
+            assert wait_for(lambda: len(store.load_recent()) == 1)
+        finally:
+            writer.close()
+
+    def test_close_flushes_pending(self, store):
+        """Test that closing writes whatever is still queued."""
+        writer = HistoryWriter(store, max_batch=100, max_delay=60)
+        writer.submit(entry_at(text="last words"))
+
+        writer.close()
+
+        assert [e.input for e in store.load_recent()] == ["last words"]
+        with pytest.raises(RuntimeError):
+            writer.submit(entry_at(text="too late"))
+
+    def test_failed_write_is_retried(self, store):
+        """Test that entries survive a failed write and are retried."""
+        writer = HistoryWriter(store, max_batch=100, max_delay=0.02)
+        original_append = store.append
+        calls = []
+
+        def flaky_append(entries):
+            calls.append(len(entries))
+            if len(calls) == 1:
+                raise OSError("disk full")
+            original_append(entries)
+
+        try:
+            with patch.object(store, "append", side_effect=flaky_append):
+                writer.submit(entry_at(text="persistent"))
+                assert wait_for(lambda: len(store.load_recent()) == 1)
+            assert calls == [1, 1]
+        finally:
+            writer.close()
+
+    def test_search_merges_queue_and_store(self, store):
+        """Test that search lists queued entries first and respects the limit."""
+        store.append([entry_at(text="stored 1"), entry_at(text="stored 2")])
+        writer = HistoryWriter(store, max_batch=100, max_delay=60)
+        try:
+            writer.submit(entry_at(text="queued"))
+
+            assert [e.input for e in writer.search(limit=2)] == ["queued", "stored 2"]
+        finally:
+            writer.close()
+
+    def test_clear_drops_queue(self, store):
+        """Test that clearing removes queued and stored entries."""
+        store.append([entry_at(text="stored")])
+        writer = HistoryWriter(store, max_batch=100, max_delay=60)
+        writer.submit(entry_at(text="queued"))
+
+        writer.clear()
+        writer.close()
+
+        assert store.load_recent() == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,266 @@
+"""
+Bulk export and import of translation history.
+
+Export streams entries (archive segments oldest first, then the hot file) to
+JSONL or CSV through generators, filtered by date and type, so memory use
+does not grow with the history. Import reads JSONL or CSV, validates every
+record, skips entries whose timestamp and input are already stored, and
+writes the rest into archive segments in batches, the newest into the hot file.
+It can run while the app is up: both go through the store's file lock, and
+the analytics sidecar is reloaded before each update rather than overwritten.
+
+Usage:
+    python transfer.py export history.jsonl --since 2024-01-01 --type text_to_emoji
+    python transfer.py export history.csv
+    python transfer.py import history.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from analytics import HistoryAnalytics, sidecar_path
+from history import _derive_fields
+from store import HistoryStore
+from translator import configure
+
+logger = logging.getLogger(__name__)
+
+ENTRY_TYPES = ("text_to_emoji", "emoji_to_text")
+CSV_FIELDS = ["timestamp", "type", "input", "translation", "emoji_codes"]
+IMPORT_BATCH_SIZE = 10_000
+_CODES = re.compile(r"(?:U\+[0-9A-F]{4,6}(?: U\+[0-9A-F]{4,6})*)?")
+
+
+def _matches(record: Dict, since: Optional[str], until: Optional[str], types: Optional[Iterable[str]]) -> bool:
+    timestamp = record.get("timestamp") or ""
+    if since is not None and timestamp < since:
+        return False
+    if until is not None and timestamp >= until:
+        return False
+    return types is None or record.get("type") in types
+
+
+def iter_records(
+    store: HistoryStore,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    types: Optional[Iterable[str]] = None,
+) -> Iterator[Dict]:
+    """
+    Yield stored records oldest partition first, then the hot entries.
+
+    Segments whose header rules out the date range or types are not opened;
+    the others are decompressed incrementally.
+
+    Args:
+        store: History store to export
+        since: Inclusive lower bound on the ISO timestamp
+        until: Exclusive upper bound on the ISO timestamp
+        types: Entry types to include
+    """
+    types = set(types) if types is not None else None
+    for header in store.segments():
+        if header.overlaps(since, until) and header.has_types(types):
+            for record in store.iter_segment(header):
+                if _matches(record, since, until, types):
+                    yield record
+    for entry in store.load_recent():
+        record = entry.to_dict()
+        if _matches(record, since, until, types):
+            yield record
+
+
+def export_jsonl(records: Iterable[Dict], out: TextIO) -> int:
+    """Write records as JSON lines; returns the number written."""
+    count = 0
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def export_csv(records: Iterable[Dict], out: TextIO) -> int:
+    """Write records as CSV with ``CSV_FIELDS`` columns (emoji codes space-separated); returns the number written."""
+    writer = csv.writer(out)
+    writer.writerow(CSV_FIELDS)
+    count = 0
+    for record in records:
+        writer.writerow([
+            record.get("timestamp", ""),
+            record.get("type", ""),
+            record.get("input", ""),
+            record.get("translation", ""),
+            " ".join(record.get("emoji_codes") or []),
+        ])
+        count += 1
+    return count
+
+
+def read_jsonl(source: TextIO) -> Iterator[Dict]:
+    """Yield the JSON object on each non-blank line; malformed lines are yielded as empty dicts."""
+    for record, _ in read_jsonl_lines(source):
+        yield record
+
+
+def read_jsonl_lines(source: TextIO) -> Iterator[Tuple[Dict, str]]:
+    """Like ``read_jsonl``, pairing each record with its line (without the line break)."""
+    for line in source:
+        line = line.rstrip("\r\n")
+        if not line or line.isspace():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = {}
+        yield (record if isinstance(record, dict) else {}), line
+
+
+def read_csv(source: TextIO) -> Iterator[Dict]:
+    """Yield one record per CSV row, splitting the space-separated emoji codes."""
+    for row in csv.DictReader(source):
+        record = dict(row)
+        record["emoji_codes"] = (record.get("emoji_codes") or "").split()
+        yield record
+
+
+def validate_record(record: Dict) -> Optional[Dict]:
+    """
+    Check an imported record and bring it to the current schema.
+
+    The derived fields are always recomputed. A record that already holds
+    exactly the recomputed entry, such as one written by ``export_jsonl``, is
+    returned as it is, so the store can keep its line verbatim.
+
+    Returns:
+        The entry as stored by the history store, or None if the record is invalid
+    """
+    text, translation = record.get("input"), record.get("translation")
+    timestamp, entry_type = record.get("timestamp"), record.get("type")
+    if not isinstance(text, str) or not text.strip() or not isinstance(translation, str):
+        return None
+    if entry_type not in ENTRY_TYPES or not isinstance(timestamp, str):
+        return None
+    codes = record.get("emoji_codes") or []
+    try:
+        if not isinstance(codes, list) or not _CODES.fullmatch(" ".join(codes)):
+            return None
+    except TypeError:  # a code that is not a string
+        return None
+    entry = _derive_fields(
+        {"input": text, "translation": translation, "emoji_codes": codes, "timestamp": timestamp, "type": entry_type}
+    )
+    # The display time is only empty when the timestamp is not valid ISO format
+    if not entry["display_time"]:
+        return None
+    return record if record == entry else entry
+
+
+class ImportReport(NamedTuple):
+    """Outcome of a bulk import."""
+
+    read: int
+    imported: int
+    duplicates: int
+    invalid: int
+
+
+def import_records(store: HistoryStore, records: Iterable[Dict], batch_size: int = IMPORT_BATCH_SIZE) -> ImportReport:
+    """
+    Validate records and bulk-load the valid ones into ``store``.
+
+    Returns:
+        Counts of records read, imported, skipped as duplicates and rejected as invalid
+    """
+    return _import(store, ((record, None) for record in records), batch_size)
+
+
+def import_jsonl(store: HistoryStore, source: TextIO, batch_size: int = IMPORT_BATCH_SIZE) -> ImportReport:
+    """
+    Like ``import_records`` for the JSON lines in ``source``.
+
+    Lines that validate unchanged are stored verbatim instead of being encoded again.
+    """
+    return _import(store, read_jsonl_lines(source), batch_size)
+
+
+def _import(store: HistoryStore, items: Iterable[Tuple[Dict, Optional[str]]], batch_size: int) -> ImportReport:
+    counts = {"read": 0, "invalid": 0}
+
+    def _valid() -> Iterator[Tuple[Dict, Optional[str]]]:
+        for record, line in items:
+            counts["read"] += 1
+            entry = validate_record(record)
+            if entry is None:
+                counts["invalid"] += 1
+                continue
+            yield entry, (line if entry is record else None)
+
+    imported, duplicates = store.import_encoded(_valid(), batch_size=batch_size)
+    if counts["invalid"]:
+        logger.warning(f"Skipped {counts['invalid']} invalid history records")
+    return ImportReport(counts["read"], imported, duplicates, counts["invalid"])
+
+
+def _format_of(path: str, override: Optional[str]) -> str:
+    return override or ("csv" if path.lower().endswith(".csv") else "jsonl")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", default="storage.json", help="Hot history file of the store")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Stream history to a JSONL or CSV file")
+    export.add_argument("path", help="Output file, or - for stdout")
+    export.add_argument("--format", choices=["jsonl", "csv"], help="Default: from the file extension")
+    export.add_argument("--since", help="Inclusive start date/time (ISO)")
+    export.add_argument("--until", help="Exclusive end date/time (ISO)")
+    export.add_argument("--type", action="append", choices=ENTRY_TYPES, dest="types")
+
+    import_ = commands.add_parser("import", help="Validate and load a JSONL or CSV file")
+    import_.add_argument("path", help="Input file, or - for stdin")
+    import_.add_argument("--format", choices=["jsonl", "csv"], help="Default: from the file extension")
+    import_.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    configure()
+    # Keep the app's analytics sidecar in step with imported entries; the store's
+    # file lock makes this safe while the app is running
+    store = HistoryStore(args.history, analytics=HistoryAnalytics.load(sidecar_path(args.history)))
+    fmt = _format_of(args.path, args.format)
+
+    if args.command == "export":
+        records = iter_records(store, args.since, args.until, args.types)
+        write = export_csv if fmt == "csv" else export_jsonl
+        if args.path == "-":
+            count = write(records, sys.stdout)
+        else:
+            with open(args.path, "w", encoding="utf-8", newline="") as out:
+                count = write(records, out)
+        print(f"Exported {count} entries", file=sys.stderr)
+    else:
+
+        def load(source: TextIO) -> ImportReport:
+            if fmt == "csv":
+                return import_records(store, read_csv(source), args.batch_size)
+            return import_jsonl(store, source, args.batch_size)
+
+        if args.path == "-":
+            report = load(sys.stdin)
+        else:
+            with open(args.path, "r", encoding="utf-8", newline="") as source:
+                report = load(source)
+        print(
+            f"Read {report.read}, imported {report.imported}, "
+            f"skipped {report.duplicates} duplicates and {report.invalid} invalid records",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,186 @@
 import os
+import re
 import logging
-from typing import Optional
-from dotenv import load_dotenv
-from openai import OpenAI, OpenAIError
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Pattern, Tuple
+
+from metrics import metrics
+from openai_client import OPENAI_NAMES, lazy_openai, record_usage, take_usage  # noqa: F401 (re-exported)
+from router import ModelRouter, OpenAIBackend, build_backends
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+# Inputs up to this length (and "Minimal" translations) go to the fastest backend
+SHORT_INPUT_CHARS = 20
+# Returned when the model gives nothing usable, even after a retry
+DEFAULT_TRANSLATION = "😊"
+
+# Emojis allowed per translation style (min, max)
+STYLE_EMOJI_COUNTS: Dict[str, Tuple[int, int]] = {
+    "Standard": (2, 6),
+    "Minimal": (1, 2),
+    "Expressive": (3, 10),
+}
+
+
+def __getattr__(name: str):
+    """Bind ``OpenAI``/``OpenAIError`` the first time they are accessed, so tests can patch them here."""
+    if name in OPENAI_NAMES:
+        value = lazy_openai(name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _openai(name: str):
+    """Resolve a lazily imported OpenAI symbol, honouring anything already bound (e.g. test patches)."""
+    try:
+        return globals()[name]
+    except KeyError:
+        return __getattr__(name)
+
+
+def configure(log_level: Optional[str] = None) -> None:
+    """
+    Load settings from .env and configure logging.
+
+    Entry points call this once at startup so that importing the module stays free of side effects.
+
+    Args:
+        log_level: Logging level name (default: LOG_LEVEL environment variable, then INFO)
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    level = (log_level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO))
+
+
+def dedupe_candidates(candidates: Iterable[Optional[str]]) -> List[str]:
+    """Strip candidates and drop empty ones and duplicates (ignoring whitespace), keeping order."""
+    seen = set()
+    unique = []
+    for candidate in candidates:
+        candidate = (candidate or "").strip()
+        key = "".join(candidate.split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(candidate)
+    return unique
+
+
+# Code points that can start an emoji. Regional indicators (U+1F1E6-1F1FF) are
+# left out so that only complete flag pairs are accepted.
+_EMOJI_BASE = (
+    "\u00a9\u00ae\u203c\u2049\u2122\u2139\u2194-\u2199\u21a9\u21aa\u231a\u231b\u2328\u23cf"
+    "\u23e9-\u23f3\u23f8-\u23fa\u24c2\u25aa\u25ab\u25b6\u25c0\u25fb-\u25fe\u2600-\u27bf"
+    "\u2934\u2935\u2b05-\u2b07\u2b1b\u2b1c\u2b50\u2b55\u3030\u303d\u3297\u3299"
+    "\U0001f000-\U0001f1e5\U0001f200-\U0001f3fa\U0001f400-\U0001faff"
+)
+
+
+@lru_cache(maxsize=None)
+def _emoji_pattern() -> Pattern[str]:
+    """
+    Regex matching one complete emoji sequence, compiled on first use.
+
+    Covers flags (regional-indicator pairs), keycaps, tag sequences (subdivision
+    flags such as Scotland's) and ZWJ sequences of bases with optional
+    variation selectors and skin tones.
+    """
+    element = (
+        f"[{_EMOJI_BASE}]"
+        "[\ufe0e\ufe0f]?"  # text/emoji presentation selector
+        "[\U0001f3fb-\U0001f3ff]?"  # skin tone
+        "\ufe0f?"
+        "(?:[\U000e0020-\U000e007e]+\U000e007f)?"  # tag sequence
+    )
+    return re.compile(
+        "[\U0001f1e6-\U0001f1ff]{2}"  # flag
+        "|[0-9#*]\ufe0f?\u20e3"  # keycap
+        f"|{element}(?:\u200d{element})*"
+    )
+
+
+def split_emojis(text: str) -> List[str]:
+    """Split text into complete emoji sequences, dropping everything else."""
+    return _emoji_pattern().findall(text)
+
+
+class Repair(NamedTuple):
+    """Outcome of checking a model response against the emoji-only rules."""
+
+    text: str  # Repaired emojis ("" if nothing was salvageable)
+    stripped: bool  # Non-emoji text was removed
+    trimmed: bool  # Emojis beyond the style's maximum were dropped
+    short: bool  # Fewer emojis than the style's minimum; cannot be fixed locally
+
+
+def repair_emojis(output: str, style: str = "Standard") -> Repair:
+    """
+    Reduce a response to its emojis, capped at the style's maximum count.
+
+    Whitespace between emojis is dropped silently; any other text counts as
+    stripped. A response with fewer emojis than the style's minimum is flagged
+    as ``short``, since there is nothing to add locally.
+    """
+    emojis = split_emojis(output)
+    joined = "".join(emojis)
+    stripped = len(joined) != len(output) and joined != "".join(output.split())
+    least, most = STYLE_EMOJI_COUNTS.get(style, STYLE_EMOJI_COUNTS["Standard"])
+    trimmed = len(emojis) > most
+    if trimmed:
+        joined = "".join(emojis[:most])
+    return Repair(joined, stripped, trimmed, 0 < len(emojis) < least)
+
+
+def repair_rates() -> Dict[str, float]:
+    """Share of checked responses that were repaired, and that were unsalvageable."""
+    outcomes = ("translator.repair.valid", "translator.repair.repaired", "translator.repair.unsalvageable")
+    return {
+        "repaired": metrics.ratio(outcomes[1], outcomes[0], outcomes[2]),
+        "unsalvageable": metrics.ratio(outcomes[2], outcomes[0], outcomes[1]),
+    }
+
+
+def build_translator(
+    model: str = "gpt-3.5-turbo", backends: str = "", max_latency: Optional[float] = None
+) -> "EmojiTranslator":
+    """
+    Translator for ``model``, or routed across ``backends`` (see ``router.build_backends``) when given.
+
+    Raises:
+        ValueError: If the OpenAI API key is required but missing
+    """
+    if not backends:
+        return EmojiTranslator(model=model)
+    router = ModelRouter(build_backends(backends, os.getenv("OPENAI_API_KEY")), max_latency=max_latency)
+    return EmojiTranslator(model=router.backends[0].name, router=router)
+
 
 class EmojiTranslator:
     """
     A class to translate text to emojis and vice versa using OpenAI's API.
     """
     
-    def __init__(self, model: str = "gpt-3.5-turbo"):
+    def __init__(self, model: str = "gpt-3.5-turbo", router: Optional[ModelRouter] = None):
         """
-        Initialize the EmojiTranslator with OpenAI client and model configuration.
+        Initialize the EmojiTranslator with model configuration.
+
+        The OpenAI client is built on first use, so constructing a translator is cheap.
         
         Args:
             model: The OpenAI model to use for translations (default: gpt-3.5-turbo)
+            router: Route requests across several backends instead of calling ``model`` directly
         """
         api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
+        if not api_key and router is None:
             raise ValueError("OPENAI_API_KEY environment variable is required")
             
-        self.client = OpenAI(api_key=api_key)
+        # Resolve the client class on first use, so patching ``translator.OpenAI`` takes effect
+        self._backend = OpenAIBackend(model, api_key, client_factory=lambda **kwargs: _openai("OpenAI")(**kwargs))
         self.model_engine = model
+        self.router = router
         self.few_shot_examples = [
             {"role": "system", "content": "You are an emoji translator. You must respond only with emojis, no text. Combine 2-6 emojis to convey complex emotions and situations accurately."},
             {"role": "user", "content": "I'm feeling great today"},
@@ -45,40 +198,120 @@ class EmojiTranslator:
             {"role": "assistant", "content": "I feel tired and stressed with school work."}
         ]
 
-    def translate(self, text: str) -> str:
+    @property
+    def client(self):
+        """The OpenAI client, constructed on first access."""
+        return self._backend.client
+
+    def _complete(
+        self, messages: List[Dict[str, str]], max_tokens: int, temperature: float, n: int = 1, fast: bool = False
+    ) -> List[str]:
+        """
+        Run one chat completion and return its distinct, non-empty choices in order.
+
+        With ``n > 1`` the API generates several candidates for the price of a
+        single prompt; duplicates are dropped locally. With a router, ``fast``
+        sends the request to the lowest-latency healthy backend.
+        """
+        if self.router is not None:
+            choices = self.router.complete(messages, max_tokens, temperature, n, fast=fast)
+        else:
+            choices = self._backend.complete(messages, max_tokens, temperature, n)
+        candidates = dedupe_candidates(choices)
+
+        metrics.incr("translator.requests")
+        if n > 1:
+            metrics.incr("translator.candidates.requested", n)
+            metrics.incr("translator.candidates.returned", len(choices))
+            metrics.incr("translator.candidates.unique", len(candidates))
+        return candidates
+
+    def _repair(self, results: List[str], style: str) -> Tuple[List[str], List[str]]:
+        """
+        Repair each candidate to emojis only, dropping the unsalvageable ones.
+
+        Returns:
+            Candidates within the style's emoji count, and those with too few emojis
+        """
+        repaired, short = [], []
+        for result in results:
+            repair = repair_emojis(result, style)
+            if not repair.text:
+                metrics.incr("translator.repair.unsalvageable")
+                continue
+            if repair.stripped or repair.trimmed or repair.short:
+                metrics.incr("translator.repair.repaired")
+                if repair.stripped:
+                    metrics.incr("translator.repair.stripped")
+                if repair.trimmed:
+                    metrics.incr("translator.repair.trimmed")
+                if repair.short:
+                    metrics.incr("translator.repair.short")
+            else:
+                metrics.incr("translator.repair.valid")
+            (short if repair.short else repaired).append(repair.text)
+        return dedupe_candidates(repaired), short
+
+    def translate(self, text: str, style: str = "Standard") -> str:
         """
         Translate text to emojis using OpenAI's API.
         
         Args:
             text: The text to translate to emojis
+            style: Translation style ("Standard", "Minimal" or "Expressive")
             
         Returns:
             String containing emojis representing the input text
         """
+        return self.translate_candidates(text, n=1, style=style)[0]
+
+    def translate_candidates(self, text: str, n: int = 3, style: str = "Standard") -> List[str]:
+        """
+        Translate text to up to ``n`` alternative emoji sequences with a single request.
+        
+        Args:
+            text: The text to translate to emojis
+            n: Number of candidates to ask the API for
+            style: Translation style; sets the allowed emoji count, and "Minimal"
+                requests are routed to the fastest backend
+            
+        Returns:
+            Distinct emoji-only translations, first one preferred (a single error or default value on failure)
+        """
         if not text or not text.strip():
-            return "❓"  # Question mark emoji for empty input
+            return ["❓"]  # Question mark emoji for empty input
             
         try:
             messages = self.few_shot_examples.copy()
-            messages.append({"role": "user", "content": f"Translate this to emoji: {text.strip()}"})
+            if style in STYLE_EMOJI_COUNTS and style != "Standard":
+                least, most = STYLE_EMOJI_COUNTS[style]
+                prompt = f"Translate this to emoji using {least}-{most} emojis: {text.strip()}"
+            else:
+                prompt = f"Translate this to emoji: {text.strip()}"
+            messages.append({"role": "user", "content": prompt})
             
-            response = self.client.chat.completions.create(
-                model=self.model_engine,
-                messages=messages,
-                max_tokens=15,  # Increased for better emoji combinations
-                temperature=0.5,
+            # max_tokens increased for better emoji combinations
+            fast = style == "Minimal" or len(text.strip()) <= SHORT_INPUT_CHARS
+            results, short = self._repair(
+                self._complete(messages, max_tokens=15, temperature=0.5, n=n, fast=fast), style
             )
+            if not results:
+                # Nothing usable, or too few emojis, came back; one more try before settling
+                metrics.incr("translator.repair.retries")
+                results, more_short = self._repair(
+                    self._complete(messages, max_tokens=15, temperature=0.5, n=n, fast=fast), style
+                )
+                # Too few emojis still beats the default
+                results = results or dedupe_candidates(short + more_short)
+            logger.info(f"Successfully translated text to emojis: {text[:50]}... -> {results}")
+            return results if results else [DEFAULT_TRANSLATION]
             
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Successfully translated text to emojis: {text[:50]}... -> {result}")
-            return result if result else "😊"  # Default emoji if empty response
-            
-        except OpenAIError as e:
+        except _openai("OpenAIError") as e:
             logger.error(f"OpenAI API error during translation: {str(e)}")
-            return "❌🤖"  # Error emoji combination
+            return ["❌🤖"]  # Error emoji combination
         except Exception as e:
             logger.error(f"Unexpected error during translation: {str(e)}")
-            return "❌"
+            return ["❌"]
 
     def translate_reverse(self, emojis: str) -> str:
         """
@@ -90,27 +323,35 @@ class EmojiTranslator:
         Returns:
             String describing the meaning of the emojis
         """
+        return self.translate_reverse_candidates(emojis, n=1)[0]
+
+    def translate_reverse_candidates(self, emojis: str, n: int = 3) -> List[str]:
+        """
+        Interpret emojis as up to ``n`` alternative descriptions with a single request.
+        
+        Args:
+            emojis: The emojis to translate to text
+            n: Number of candidates to ask the API for
+            
+        Returns:
+            Distinct descriptions, first one preferred (a single error or default value on failure)
+        """
         if not emojis or not emojis.strip():
-            return "No emojis provided"
+            return ["No emojis provided"]
             
         try:
             messages = self.reverse_examples.copy()
             messages.append({"role": "user", "content": f"Interpret these emojis: {emojis.strip()}"})
             
-            response = self.client.chat.completions.create(
-                model=self.model_engine,
-                messages=messages,
-                max_tokens=100,  # Increased for better descriptions
-                temperature=0.7,
-            )
-            
-            result = response.choices[0].message.content.strip()
-            logger.info(f"Successfully translated emojis to text: {emojis} -> {result[:50]}...")
-            return result if result else "Unable to interpret these emojis"
+            # max_tokens increased for better descriptions
+            fast = len(emojis.strip()) <= SHORT_INPUT_CHARS
+            results = self._complete(messages, max_tokens=100, temperature=0.7, n=n, fast=fast)
+            logger.info(f"Successfully translated emojis to text: {emojis} -> {results[:1]}...")
+            return results if results else ["Unable to interpret these emojis"]
             
-        except OpenAIError as e:
+        except _openai("OpenAIError") as e:
             logger.error(f"OpenAI API error during reverse translation: {str(e)}")
-            return "Error: Unable to connect to translation service"
+            return ["Error: Unable to connect to translation service"]
         except Exception as e:
             logger.error(f"Unexpected error during reverse translation: {str(e)}")
-            return "Error: Translation failed"
+            return ["Error: Translation failed"]
@@ -0,0 +1,202 @@
+"""
+Cache warm-up: precompute translations for the most popular inputs.
+
+Past text-to-emoji inputs from the history store, plus an optional seed
+corpus (one phrase per line), are ranked by frequency weighted by recency.
+The top N are translated on a thread pool within a ``RateBudget`` and stored
+in the ``TranslationCache``, so the first users after a deploy or a cache
+flush don't pay full API latency for popular phrases.
+
+Runs as a deploy step, or in a background thread when the app starts
+(``CACHE_WARM_ON_START``).
+
+Usage:
+    python warm.py --top 100 --seed seeds.txt --per-minute 60
+"""
+
+import argparse
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache import TranslationCache, translation_key
+from history import HistoryEntry
+from jobs import TEXT_TO_EMOJI
+from metrics import metrics
+from ratelimit import RateBudget
+from store import HistoryStore
+from translator import DEFAULT_TRANSLATION, EmojiTranslator, build_translator, configure
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = "translation_cache.json"
+
+
+def load_seeds(path: str) -> List[str]:
+    """Read a seed corpus: one phrase per line, blank lines and "#" comments ignored."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def rank_inputs(
+    entries: Iterable[HistoryEntry],
+    seeds: Iterable[str] = (),
+    now: Optional[datetime] = None,
+    half_life_days: float = 7.0,
+    seed_weight: float = 1.0,
+) -> List[str]:
+    """
+    Rank inputs by how often, and how recently, they were translated.
+
+    Each text-to-emoji occurrence scores ``0.5 ** (age_days / half_life_days)``
+    and each seed phrase ``seed_weight``; inputs that differ only in case or
+    spacing are counted together.
+
+    Returns:
+        Inputs in descending score order, each in its most recent spelling
+    """
+    now = now or datetime.now()
+    scores: Dict[str, float] = {}
+    spelling: Dict[str, Tuple[str, str]] = {}
+    for entry in entries:
+        if entry.type != TEXT_TO_EMOJI or not entry.input.strip():
+            continue
+        key = translation_key(entry.input)
+        try:
+            age_days = max(0.0, (now - datetime.fromisoformat(entry.timestamp)).total_seconds() / 86400)
+            weight = 0.5 ** (age_days / half_life_days)
+        except (TypeError, ValueError):
+            weight = 0.5  # undated entries count, but less than today's
+        scores[key] = scores.get(key, 0.0) + weight
+        timestamp = entry.timestamp or ""
+        if key not in spelling or timestamp > spelling[key][0]:
+            spelling[key] = (timestamp, entry.input.strip())
+    for seed in seeds:
+        key = translation_key(seed)
+        scores[key] = scores.get(key, 0.0) + seed_weight
+        spelling.setdefault(key, ("", seed.strip()))
+    ranked = sorted(scores, key=lambda key: -scores[key])
+    return [spelling[key][1] for key in ranked]
+
+
+def warm_cache(
+    translator: EmojiTranslator,
+    cache: TranslationCache,
+    texts: Iterable[str],
+    executor: Executor,
+    budget: RateBudget,
+    style: str = "Standard",
+    candidates: int = 3,
+) -> int:
+    """
+    Translate every text not already cached and store the results.
+
+    Submissions are paced by ``budget`` (blocking the caller, never the pool);
+    failed translations, and the default emoji returned when nothing usable
+    came back, are left out of the cache.
+
+    Returns:
+        Number of inputs added to the cache
+    """
+    pending = []
+    for text in texts:
+        if cache.lookup(text, style) is not None:
+            metrics.incr("warmup.skipped")
+            continue
+        budget.acquire()
+        pending.append((text, executor.submit(translator.translate_candidates, text, candidates, style)))
+
+    warmed = 0
+    for text, future in pending:
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Warm-up translation failed for {text[:50]!r}: {e}")
+            results = []
+        # Neither errors nor the no-usable-answer placeholder are worth keeping for the TTL
+        if results and not results[0].startswith("❌") and results != [DEFAULT_TRANSLATION]:
+            cache.store(text, style, results)
+            warmed += 1
+        else:
+            metrics.incr("warmup.failed")
+    metrics.incr("warmup.warmed", warmed)
+    return warmed
+
+
+def warm_from_history(
+    store: HistoryStore,
+    cache: TranslationCache,
+    translator: EmojiTranslator,
+    executor: Executor,
+    budget: RateBudget,
+    top: int = 50,
+    seed_path: Optional[str] = None,
+    days: int = 30,
+    style: str = "Standard",
+    candidates: int = 3,
+) -> int:
+    """
+    Rank the last ``days`` of history (plus seeds), warm the top ``top`` inputs and save the cache.
+
+    Returns:
+        Number of inputs added to the cache
+    """
+    since = (datetime.now() - timedelta(days=days)).isoformat()
+    entries = store.search(since=since, types=[TEXT_TO_EMOJI])
+    seeds = load_seeds(seed_path) if seed_path else []
+    texts = rank_inputs(entries, seeds)[:top]
+    logger.info(f"Warming translation cache with {len(texts)} inputs")
+    warmed = warm_cache(translator, cache, texts, executor, budget, style, candidates)
+    cache.save()
+    logger.info(f"Translation cache warmed: {warmed} new of {len(texts)} inputs")
+    return warmed
+
+
+def start_background_warmup(*args, **kwargs) -> threading.Thread:
+    """Run ``warm_from_history`` on a daemon thread; arguments are passed through."""
+
+    def _run() -> None:
+        try:
+            warm_from_history(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {e}")
+
+    thread = threading.Thread(target=_run, name="cache-warmer", daemon=True)
+    thread.start()
+    return thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", default="storage.json", help="Hot history file of the store")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_FILE, help="Translation cache file to fill")
+    parser.add_argument("--seed", help="Seed corpus, one phrase per line")
+    parser.add_argument("--top", type=int, default=50, help="Number of inputs to precompute")
+    parser.add_argument("--days", type=int, default=30, help="History window to rank")
+    parser.add_argument("--style", default="Standard")
+    parser.add_argument("--candidates", type=int, default=int(os.getenv("TRANSLATION_CANDIDATES", "3")))
+    parser.add_argument("--per-minute", type=int, default=30, help="API calls allowed per minute")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    configure()
+    translator = build_translator(
+        os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"),
+        os.getenv("TRANSLATION_BACKENDS", ""),
+        max_latency=float(os.getenv("ROUTER_MAX_LATENCY", "0")) or None,
+    )
+
+    cache = TranslationCache.load(args.cache)
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="warm") as executor:
+        warmed = warm_from_history(
+            HistoryStore(args.history), cache, translator, executor, RateBudget(args.per_minute),
+            top=args.top, seed_path=args.seed, days=args.days, style=args.style, candidates=args.candidates,
+        )
+    print(f"Warmed {warmed} translations; {len(cache)} cached in {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
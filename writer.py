@@ -0,0 +1,139 @@
+"""
+Write-behind queue for translation history.
+
+``HistoryWriter`` accepts entries without touching the disk and appends them
+to the ``HistoryStore`` from a background thread, in batches, once enough
+entries are queued or the oldest has waited long enough. Reads made through
+the writer include queued entries, so a session always sees its own
+translations. Anything still queued is flushed when the interpreter exits.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from history import HistoryBatch, HistoryEntry
+from store import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """Batches history appends onto a background thread."""
+
+    def __init__(self, store: HistoryStore, max_batch: int = 20, max_delay: float = 1.0):
+        """
+        Start the writer thread.
+
+        Args:
+            store: Store the queued entries are appended to
+            max_batch: Flush as soon as this many entries are queued
+            max_delay: Flush once the oldest queued entry has waited this many seconds
+        """
+        self.store = store
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self._pending: List[HistoryEntry] = []
+        self._oldest: Optional[float] = None
+        self._retry_at = 0.0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Held while a batch moves from the queue into the store, so readers never
+        # see an entry twice or not at all
+        self._io_lock = threading.RLock()
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, entry: HistoryEntry) -> None:
+        """Queue an entry for writing; returns immediately."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("HistoryWriter is closed")
+            self._pending.append(entry)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._cond.notify()
+
+    def pending(self) -> List[HistoryEntry]:
+        """Entries queued but not yet written, oldest first."""
+        with self._cond:
+            return list(self._pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._pending:
+                        deadline = max(self._oldest + self.max_delay, self._retry_at)
+                        timeout = max(0.0, deadline - time.monotonic())
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+            self.flush()
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        if not self._pending or now < self._retry_at:
+            return False
+        return len(self._pending) >= self.max_batch or now - self._oldest >= self.max_delay
+
+    def flush(self) -> None:
+        """Write every queued entry now, on the calling thread."""
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending, self._oldest = self._pending, [], None
+            if not batch:
+                return
+            try:
+                self.store.append(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} history entries, will retry: {e}")
+                with self._cond:
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+                    self._retry_at = self._oldest + self.max_delay
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def load_recent(self) -> List[HistoryEntry]:
+        """Hot entries from the store followed by queued ones, oldest first."""
+        with self._io_lock:
+            return self.store.load_recent() + self.pending()
+
+    def search(
+        self,
+        query: str = "",
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        types: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[HistoryEntry]:
+        """Like ``HistoryStore.search``, including queued entries; newest first."""
+        types = list(types) if types is not None else None
+        with self._io_lock:
+            queued = HistoryBatch.from_entries(self.pending())
+            results = [queued.entry(i) for i in reversed(queued.matching(query, types, since, until))]
+            remaining = None if limit is None else limit - len(results)
+            if remaining is None or remaining > 0:
+                results.extend(self.store.search(query, since, until, types, remaining))
+        return results[:limit] if limit is not None else results
+
+    def clear(self) -> None:
+        """Drop queued entries and clear the store."""
+        with self._io_lock:
+            with self._cond:
+                self._pending, self._oldest = [], None
+            self.store.clear()